@@ -0,0 +1,87 @@
+# benchmarks/bench_analytics.py
+# Agregaciones de /stats sobre columnas sintéticas (10M participaciones por defecto)
+# vs. el mismo cálculo con bucles de Python, y costo de exportar desde los modelos.
+#   python benchmarks/bench_analytics.py [--participations 10000000] [--export 200000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.models import analytics
+from src.models.analytics import RideColumns
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation, STATUSES
+
+
+def synthetic(participations: int, per_ride: int = 4, drivers: int = 50_000, users: int = 1_000_000,
+              destinations: int = 500, seed: int = 1) -> RideColumns:
+    rng = np.random.default_rng(seed)
+    rides = participations // per_ride
+    return RideColumns(
+        drivers=[f"d{i}" for i in range(drivers)],
+        destinations=[f"dest{i}" for i in range(destinations)],
+        users=[f"u{i}" for i in range(users)],
+        ride_id=np.arange(1, rides + 1, dtype=np.int64),
+        ride_driver=rng.integers(0, drivers, rides, dtype=np.int32),
+        ride_destination=rng.integers(0, destinations, rides, dtype=np.int32),
+        ride_hour=rng.integers(0, 24, rides, dtype=np.int8),
+        ride_seats=rng.integers(per_ride, per_ride + 3, rides, dtype=np.int32),
+        ride_status=rng.integers(0, 3, rides, dtype=np.int8),
+        part_ride=np.repeat(np.arange(rides, dtype=np.int32), per_ride),
+        part_user=rng.integers(0, users, rides * per_ride, dtype=np.int32),
+        part_status=rng.integers(0, len(STATUSES), rides * per_ride, dtype=np.int8),
+        part_seats=np.ones(rides * per_ride, dtype=np.int32),
+    )
+
+
+def loop_occupancy(cols: RideColumns, sample: int) -> float:
+    # referencia: lo mismo que occupancy_by_driver recorriendo filas en Python
+    occupies = analytics._OCCUPIES.tolist()
+    occupied = {}
+    statuses, seats, rows = cols.part_status.tolist(), cols.part_seats.tolist(), cols.part_ride.tolist()
+    t0 = time.perf_counter()
+    for i in range(sample):
+        if occupies[statuses[i]]:
+            occupied[rows[i]] = occupied.get(rows[i], 0) + seats[i]
+    return (time.perf_counter() - t0) * len(statuses) / sample
+
+
+def export_cost(participations: int, per_ride: int = 4) -> float:
+    rides = [Ride(id=i, ride_date_and_time=datetime(2025, 7, 15, i % 24), final_address=f"dest{i % 500}",
+                  allowed_spaces=per_ride, ride_driver=f"d{i % 1000}",
+                  participants=[RideParticipation(participant_alias=f"u{(i * per_ride + j) % 100_000}",
+                                                  destination="X", occupied_spaces=1)
+                                for j in range(per_ride)])
+             for i in range(participations // per_ride)]
+    t0 = time.perf_counter()
+    RideColumns.from_rides(rides)
+    return (time.perf_counter() - t0) / participations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participations", type=int, default=10_000_000)
+    parser.add_argument("--export", type=int, default=200_000, help="participations built as models")
+    args = parser.parse_args()
+    cols = synthetic(args.participations)
+    print(f"participations: {len(cols.part_ride):,}  rides: {len(cols.ride_id):,}")
+    for name, fn in (("occupancy_by_driver", analytics.occupancy_by_driver),
+                     ("missing_by_user", analytics.missing_by_user),
+                     ("rides_by_hour", analytics.rides_by_hour),
+                     ("utilization_by_destination", analytics.utilization_by_destination)):
+        t0 = time.perf_counter()
+        fn(cols)
+        print(f"{name:<28} {(time.perf_counter() - t0) * 1000:>9.1f} ms")
+    print(f"{'python loop (occupancy est.)':<28} {loop_occupancy(cols, 1_000_000) * 1000:>9.1f} ms")
+    per_participation = export_cost(args.export)
+    print(f"{'export from models':<28} {per_participation * 1e9:>9.0f} ns/participation "
+          f"(~{per_participation * args.participations:.1f} s for {args.participations:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_archive.py
+# Memoria residente con N rides históricos (done): todo en memoria vs. archivados.
+# Cada variante corre en un proceso aparte para medir su RSS (Linux, /proc).
+#   python benchmarks/bench_archive.py [--rides 1000000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import gc
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+from src.models.archive import RideArchive
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+DESTINATIONS = ["UTEC", "Barranco", "Miraflores", "San Isidro", "Surco", "Centro de Lima"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def build(rides: int, archive: bool) -> DataHandler:
+    rng = random.Random(1)
+    dh = DataHandler()
+    users = [f"user{i}" for i in range(10_000)]
+    for alias in users:
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    # como en producción: el archivo se va llevando los rides a medida que terminan
+    dh_archive = RideArchive(dh, grace=0, batch_size=10_000) if archive else None
+    base = datetime(2024, 1, 1)
+    for rideid in range(1, rides + 1):
+        ride = Ride(id=rideid, ride_date_and_time=base + timedelta(minutes=rideid), final_address=rng.choice(DESTINATIONS),
+                    allowed_spaces=4, ride_driver=rng.choice(users))
+        dh.add_ride(ride)
+        for alias in rng.sample(users, 3):
+            ride.request_join(RideParticipation(participant_alias=alias, destination=rng.choice(DESTINATIONS),
+                                                occupied_spaces=1))
+            ride.accept(alias)
+        ride.start()
+        for p in ride.participants:
+            p.mark_unloaded()
+        ride.end()
+        if dh_archive is not None and rideid % 10_000 == 0:
+            dh_archive.sweep()
+    if dh_archive is not None:
+        dh_archive.sweep()
+    return dh
+
+
+def run(mode: str, rides: int):
+    start = rss_mb()
+    t0 = time.perf_counter()
+    dh = build(rides, archive=mode == "archived")
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    print(f"{mode}: {rss_mb() - start:,.0f} MiB resident for {rides:,} done rides (built in {elapsed:.0f} s)")
+    if dh.archive is not None:
+        print(f"  {dh.archive.compressed_bytes / 2 ** 20:.0f} MiB compressed, {len(dh.rides)} rides left in memory")
+        t0 = time.perf_counter()
+        for rideid in random.Random(2).sample(range(1, rides + 1), 1000):
+            dh.get_ride(rideid)
+        print(f"  archived get_ride: {(time.perf_counter() - t0) * 1e3:.0f} us/lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["hot", "archived"])
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode, args.rides)
+        return
+    for mode in ("hot", "archived"):
+        subprocess.run([sys.executable, __file__, "--rides", str(args.rides), "--mode", mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_async.py
+# Carga con N clientes concurrentes contra la app síncrona y la async (en proceso, ASGI).
+#   python benchmarks/bench_async.py [--clients 1000] [--requests 5] [--rides 200]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+import warnings
+from datetime import datetime
+
+warnings.simplefilter("ignore")
+import httpx
+
+import src.controller as controller
+import src.async_controller as async_controller
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.user import User
+
+
+def build(clients: int, rides: int) -> DataHandler:
+    dh = DataHandler()
+    dh.add_user(User(alias="drv", name="Driver", carPlate="ABC123"))
+    for i in range(clients):
+        dh.add_user(User(alias=f"c{i}", name=f"C{i}"))
+    for rideid in range(1, rides + 1):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                         allowed_spaces=clients, ride_driver="drv"))
+    return dh
+
+
+async def client_session(http: httpx.AsyncClient, i: int, requests: int, rides: int, latencies: list):
+    # mezcla de lectura y escritura: perfil, listado paginado y pedido de unirse
+    for n in range(requests):
+        t0 = time.perf_counter()
+        if n % 3 == 0:
+            response = await http.get(f"/usuarios/c{i}")
+        elif n % 3 == 1:
+            response = await http.get("/rides", params={"limit": 20, "status": "ready"})
+        else:
+            response = await http.post(f"/usuarios/drv/rides/{(i + n) % rides + 1}/requestToJoin/c{i}",
+                                       params={"destination": "UTEC"})
+        latencies.append(time.perf_counter() - t0)
+        assert response.status_code in (200, 422), response.text
+
+
+async def run(app, clients: int, requests: int, rides: int):
+    controller.data_handler = build(clients, rides)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_session(http, i, requests, rides, latencies) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pct(0.5), pct(0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--rides", type=int, default=200)
+    args = parser.parse_args()
+    print(f"{'app':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, app in (("sync", controller.app), ("async", async_controller.app)):
+        throughput, p50, p99 = asyncio.run(run(app, args.clients, args.requests, args.rides))
+        print(f"{label:<6} {throughput:>8.0f} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
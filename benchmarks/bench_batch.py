@@ -0,0 +1,69 @@
+# benchmarks/bench_batch.py
+# Endpoints individuales vs. por lotes (accept / unloadParticipant) a través de la app FastAPI.
+#   python benchmarks/bench_batch.py [--participants 50] [--rides 20]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import warnings
+
+warnings.simplefilter("ignore")
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+
+
+def setup(client: TestClient, rides: int, participants: int):
+    controller.data_handler = DataHandler()
+    client.post("/usuarios", json={"alias": "drv", "name": "Driver", "carPlate": "ABC123"})
+    for i in range(participants):
+        client.post("/usuarios", json={"alias": f"p{i}", "name": f"P{i}"})
+    ids = []
+    for _ in range(rides):
+        rideid = client.post("/rides", params=dict(rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC",
+                                                   allowedSpaces=participants, rideDriver="drv")).json()["id"]
+        for i in range(participants):
+            client.post(f"/usuarios/drv/rides/{rideid}/requestToJoin/p{i}", params={"destination": "UTEC"})
+        ids.append(rideid)
+    return ids
+
+
+def run(client: TestClient, rides: int, participants: int, batch: bool):
+    ids = setup(client, rides, participants)
+    aliases = [f"p{i}" for i in range(participants)]
+    requests = 0
+    t0 = time.perf_counter()
+    for rideid in ids:
+        if batch:
+            client.post(f"/usuarios/drv/rides/{rideid}/batch/accept", json={"aliases": aliases})
+            client.post(f"/usuarios/drv/rides/{rideid}/start")
+            client.post(f"/usuarios/drv/rides/{rideid}/batch/unloadParticipant", json={"aliases": aliases})
+            requests += 3
+        else:
+            for alias in aliases:
+                client.post(f"/usuarios/drv/rides/{rideid}/accept/{alias}")
+            client.post(f"/usuarios/drv/rides/{rideid}/start")
+            for alias in aliases:
+                client.post(f"/usuarios/drv/rides/{rideid}/unloadParticipant/{alias}")
+            requests += 2 * participants + 1
+    elapsed = time.perf_counter() - t0
+    return requests, elapsed, rides * participants * 2 / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=50)
+    parser.add_argument("--rides", type=int, default=20)
+    args = parser.parse_args()
+    client = TestClient(controller.app)
+    print(f"{'mode':<8} {'requests':>9} {'req/s':>9} {'ops/s':>9}")
+    for label, batch in (("single", False), ("batch", True)):
+        requests, elapsed, ops = run(client, args.rides, args.participants, batch)
+        print(f"{label:<8} {requests:>9} {requests / elapsed:>9.0f} {ops:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
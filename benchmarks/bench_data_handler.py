@@ -0,0 +1,49 @@
+# benchmarks/bench_data_handler.py
+# Costo de get_user / get_ride a medida que crece el DataHandler (1k -> 1M registros).
+#   python benchmarks/bench_data_handler.py [--max 1000000] [--lookups 100000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import timeit
+from datetime import datetime
+
+from src.models.data_handler import DataHandler
+from src.models.user import User
+from src.models.ride import Ride
+
+
+def build(n: int) -> DataHandler:
+    dh = DataHandler()
+    now = datetime.now()
+    for i in range(n):
+        dh.add_user(User(alias=f"user{i}", name=f"User {i}"))
+        dh.add_ride(Ride(
+            id=dh.next_ride_id, ride_date_and_time=now, final_address="X",
+            allowed_spaces=4, ride_driver=f"user{i}", participants=[],
+        ))
+    return dh
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'get_user ns':>12} {'get_ride ns':>12}")
+    n = 1_000
+    while n <= args.max:
+        dh = build(n)
+        aliases = [f"user{random.randrange(n)}" for _ in range(args.lookups)]
+        ids = [random.randrange(1, n + 1) for _ in range(args.lookups)]
+        t_user = timeit.timeit(lambda: [dh.get_user(a) for a in aliases], number=1)
+        t_ride = timeit.timeit(lambda: [dh.get_ride(i) for i in ids], number=1)
+        print(f"{n:>10} {t_user / args.lookups * 1e9:>12.1f} {t_ride / args.lookups * 1e9:>12.1f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
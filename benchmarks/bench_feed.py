@@ -0,0 +1,88 @@
+# benchmarks/bench_feed.py
+# Polling vs. feed de cambios: cada pasajero y conductor sigue su ride
+# durante --minutes. Con polling pide GET /usuarios/{alias}/rides/{rideid}
+# cada --interval segundos; con el feed recibe solo los deltas. Se comparan
+# requests, bytes y tiempo de CPU del servidor para el mismo ciclo de vida.
+#   python benchmarks/bench_feed.py [--rides 1000] [--interval 2] [--minutes 30]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from datetime import datetime
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.feed import ChangeFeed
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+PASSENGERS = 3
+
+
+def build(rides: int) -> DataHandler:
+    dh = DataHandler()
+    for i in range(rides * (PASSENGERS + 1)):
+        dh.add_user(User(alias=f"u{i}", name=f"U{i}"))
+    for rideid in range(1, rides + 1):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                         allowed_spaces=4, ride_driver=f"u{(rideid - 1) * (PASSENGERS + 1)}"))
+    return dh
+
+
+def lifecycle(dh: DataHandler, rideid: int):
+    ride = dh.get_ride(rideid)
+    first = (rideid - 1) * (PASSENGERS + 1) + 1
+    aliases = [f"u{first + k}" for k in range(PASSENGERS)]
+    for alias in aliases:
+        ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+    for alias in aliases[:-1]:
+        ride.accept(alias)
+    ride.reject(aliases[-1])
+    ride.start()
+    for alias in aliases[:-1]:
+        ride.get_participation(alias).mark_unloaded()
+    ride.end()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--minutes", type=float, default=30.0)
+    args = parser.parse_args()
+    clients = args.rides * (PASSENGERS + 1)
+
+    # feed: un suscriptor por usuario, el servidor solo trabaja cuando algo cambia
+    dh = build(args.rides)
+    feed = ChangeFeed(dh, queue_size=1024)
+    subscriptions = [feed.subscribe_user(user.alias) for user in dh.users]
+    t0 = time.perf_counter()
+    for rideid in range(1, args.rides + 1):
+        lifecycle(dh, rideid)
+    feed_cpu = time.perf_counter() - t0
+    frames = [frame for subscription in subscriptions for frame in subscription.drain()]
+    feed_bytes = sum(map(len, frames))
+
+    # polling: el costo de un GET de detalle, medido a mitad del ciclo de vida
+    controller.data_handler = dh
+    samples = min(args.rides, 500)
+    t0 = time.perf_counter()
+    sizes = [len(controller._ride_detail_schema(dh.get_ride(rideid)).model_dump_json())
+             for rideid in range(1, samples + 1)]
+    per_poll = (time.perf_counter() - t0) / samples
+    polls = clients * args.minutes * 60 / args.interval
+    poll_bytes = polls * sum(sizes) / samples
+
+    print(f"{clients:,} clients following {args.rides:,} rides for {args.minutes:g} min")
+    print(f"polling every {args.interval:g}s: {polls:>14,.0f} requests {poll_bytes / 2 ** 20:>10,.1f} MiB "
+          f"{polls * per_poll:>8,.1f} s CPU (schemas only)")
+    print(f"change feed:      {len(frames):>14,} events   {feed_bytes / 2 ** 20:>10,.1f} MiB "
+          f"{feed_cpu:>8,.1f} s CPU (lifecycle + publish)")
+    print(f"reduction: {polls / len(frames):,.0f}x messages, {poll_bytes / feed_bytes:,.0f}x bytes")
+
+
+if __name__ == "__main__":
+    main()
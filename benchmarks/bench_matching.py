@@ -0,0 +1,64 @@
+# benchmarks/bench_matching.py
+# "Rides listos hacia mi destino": índice invertido / grilla vs. recorrer todos los rides listos.
+#   python benchmarks/bench_matching.py [--rides 100000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.models.data_handler import DataHandler
+from src.models.matching import DestinationIndex, tokenize
+from src.models.ride import Ride
+
+DISTRICTS = ["Barranco", "Miraflores", "San Isidro", "Surco", "La Molina", "Lince", "Jesús María",
+             "Magdalena", "San Borja", "Chorrillos", "Pueblo Libre", "San Miguel", "Callao", "Ate"]
+STREETS = ["Av. Arequipa", "Av. Javier Prado", "Jr. Medrano Silva", "Av. Benavides", "Calle Los Pinos",
+           "Av. Primavera", "Av. La Marina", "Av. Brasil", "Jr. Junín", "Av. Angamos"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    base = datetime(2025, 7, 1)
+    dh = DataHandler()
+    for rideid in range(1, args.rides + 1):
+        address = f"{rng.choice(STREETS)} {rng.randrange(1, 2000)}, {rng.choice(DISTRICTS)}"
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=base + timedelta(minutes=rng.randrange(60 * 24 * 7)),
+                         final_address=address, allowed_spaces=4, ride_driver="drv",
+                         final_lat=-12.2 + rng.random() * 0.2, final_lon=-77.1 + rng.random() * 0.2))
+    t0 = time.perf_counter()
+    index = DestinationIndex(dh)
+    build = time.perf_counter() - t0
+    queries = [f"{rng.choice(STREETS)} {rng.choice(DISTRICTS)}" for _ in range(args.queries)]
+    origins = [(-12.2 + rng.random() * 0.2, -77.1 + rng.random() * 0.2) for _ in range(args.queries)]
+
+    t0 = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    text = (time.perf_counter() - t0) / args.queries
+    t0 = time.perf_counter()
+    for origin in origins:
+        index.search(origin=origin, radius_km=1.0)
+    geo = (time.perf_counter() - t0) / args.queries
+    t0 = time.perf_counter()
+    for query in queries[:5]:
+        # referencia: tokenizar y comparar cada ride listo
+        wanted = set(tokenize(query))
+        sorted(((len(wanted & set(tokenize(r.final_address))), r.id) for r in dh.rides_with_status("ready")
+                if r.free_spaces >= 1), reverse=True)[:20]
+    scan = (time.perf_counter() - t0) / 5
+    print(f"ready rides: {len(index):,}  index build: {build:.2f} s")
+    print(f"text search:  {text * 1e3:>8.2f} ms/query")
+    print(f"geo search:   {geo * 1e3:>8.2f} ms/query")
+    print(f"full scan:    {scan * 1e3:>8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_memory.py
+# Bytes por participación: el objeto solo (modelo Pydantic de referencia vs.
+# RideParticipation) y el costo completo dentro de un DataHandler (ride, índices
+# y contadores del usuario incluidos).
+#   python benchmarks/bench_memory.py [--participations 200000] [--per-ride 4]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation, RPStatus
+from src.models.user import User
+
+
+class PydanticParticipation(BaseModel):
+    # la representación anterior, como referencia
+    participant_alias: str
+    destination: str
+    occupied_spaces: int = Field(..., gt=-1)
+    confirmation: Optional[datetime] = None
+    status: RPStatus = RPStatus.waiting
+    _listeners: List[Callable] = PrivateAttr(default_factory=list)
+
+    def subscribe(self, listener: Callable):
+        self._listeners.append(listener)
+
+
+def measure(build: Callable[[], object], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return (after - before) / count
+
+
+def bare(cls, count: int, aliases: List[str]):
+    def build():
+        items = [cls(participant_alias=aliases[i], destination="UTEC", occupied_spaces=1,
+                     confirmation=datetime(2025, 7, 15, 8), status=RPStatus.confirmed) for i in range(count)]
+        for p in items:
+            # dos suscriptores, como dentro de un Ride con su usuario
+            p.subscribe(print)
+            p.subscribe(repr)
+        return items
+    return build
+
+
+def stored(count: int, per_ride: int, aliases: List[str]):
+    def build():
+        dh = DataHandler()
+        dh.add_user(User(alias="drv", name="Driver", carPlate="ABC123"))
+        for alias in aliases[:per_ride]:
+            dh.add_user(User(alias=alias, name=alias))
+        for rideid in range(1, count // per_ride + 1):
+            ride = Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                        allowed_spaces=per_ride, ride_driver="drv")
+            dh.add_ride(ride)
+            for alias in aliases[:per_ride]:
+                ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+        return dh
+    return build
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participations", type=int, default=200_000)
+    parser.add_argument("--per-ride", type=int, default=4)
+    args = parser.parse_args()
+    n = args.participations
+    aliases = [f"user{i}" for i in range(n)]   # fuera de la medición
+    print(f"{'representation':<34} {'bytes/participation':>20}")
+    print(f"{'pydantic model (before)':<34} {measure(bare(PydanticParticipation, n, aliases), n):>20.0f}")
+    print(f"{'RideParticipation':<34} {measure(bare(RideParticipation, n, aliases), n):>20.0f}")
+    print(f"{'stored in DataHandler (all costs)':<34} {measure(stored(n, args.per_ride, aliases), n):>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_metrics.py
+# Costo del middleware de métricas: requests/s de la app con y sin él,
+# llamando a la app ASGI directamente (sin red, el peor caso relativo).
+#   python benchmarks/bench_metrics.py [--requests 20000] [--concurrency 64]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from fastapi import FastAPI
+
+import src.controller as controller
+from src import metrics
+from src.metrics import MetricsMiddleware
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.user import User
+
+
+def scope(path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+            "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+            "server": ("bench", 80)}
+
+
+async def drive(app, requests: int, concurrency: int, paths) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def worker(n: int):
+        for i in range(n):
+            path, query = paths[i % len(paths)]
+            await app(scope(path, query), receive, send)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return (requests // concurrency * concurrency) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=9)
+    args = parser.parse_args()
+    dh = DataHandler()
+    for i in range(100):
+        dh.add_user(User(alias=f"u{i}", name=f"U{i}"))
+    for rideid in range(1, 1001):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                         allowed_spaces=4, ride_driver=f"u{rideid % 100}"))
+    controller.data_handler = dh
+    # la misma app, sola y envuelta en el middleware
+    bare = FastAPI()
+    bare.include_router(controller.app.router)
+    measured = MetricsMiddleware(bare)
+    paths = [(f"/usuarios/u{i}", b"") for i in range(10)] + [("/rides", b"limit=20"), ("/usuarios/nobody", b"")]
+    results = {"without": [], "with": []}
+    for _ in range(args.rounds):        # alternadas, para que el ruido afecte a ambas
+        results["without"].append(asyncio.run(drive(bare, args.requests, args.concurrency, paths)))
+        results["with"].append(asyncio.run(drive(measured, args.requests, args.concurrency, paths)))
+    best = {name: statistics.median(values) for name, values in results.items()}
+    print(f"without metrics: {best['without']:>8,.0f} req/s")
+    print(f"with metrics:    {best['with']:>8,.0f} req/s")
+    print(f"overhead:        {(1 - best['with'] / best['without']) * 100:>7.1f} %")
+    # lo que agrega el middleware por request, aislado del ruido de la app
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        metrics.IN_FLIGHT.inc()
+        metrics.IN_FLIGHT.dec()
+        metrics.REQUEST_LATENCY.observe("GET", "/bench", value=0.003)
+        metrics.RESPONSES.inc("GET", "/bench", "200")
+    print(f"registry cost:   {(time.perf_counter() - t0) / 100_000 * 1e6:>7.2f} us/request "
+          f"(a request takes {1e6 / best['without']:,.0f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_persistence.py
+# Throughput de escritura del log de eventos y tiempo de recuperación
+# (solo log vs. snapshot + cola del log).
+#   python benchmarks/bench_persistence.py [--events 1000000] [--dir /tmp/rides-bench]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from src.models.persistence import Persistence
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+RIDERS = 3  # participantes por ride: joined x3, accepted x2, rejected, started, unloaded, ended, created
+
+
+def generate(dh, events: int):
+    """Drive the DataHandler until roughly ``events`` domain events were produced."""
+    for i in range(100):
+        dh.add_user(User(alias=f"u{i}", name=f"User {i}"))
+    now = datetime.now()
+    produced = 100
+    while produced < events:
+        driver = f"u{dh.next_ride_id % 100}"
+        ride = Ride(id=dh.next_ride_id, ride_date_and_time=now, final_address="UTEC",
+                    allowed_spaces=RIDERS, ride_driver=driver)
+        dh.add_ride(ride)
+        riders = [f"u{(ride.id + k) % 100}" for k in range(1, RIDERS + 1)]
+        for alias in riders:
+            ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+        ride.accept(riders[0])
+        ride.accept(riders[1])
+        ride.reject(riders[2])
+        ride.start()
+        ride.get_participation(riders[0]).mark_unloaded()
+        ride.end()
+        produced += 10
+
+
+def run(directory: str, events: int, snapshot_every: int):
+    engine = Persistence.open(directory, snapshot_every=snapshot_every)
+    t0 = time.perf_counter()
+    generate(engine.data_handler, events)
+    engine.close()
+    t_write = time.perf_counter() - t0
+    written = engine.log.next_seq - 1
+
+    t0 = time.perf_counter()
+    recovered = Persistence.open(directory)
+    t_recover = time.perf_counter() - t0
+    recovered.close()
+    return written, t_write, t_recover
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+
+    print(f"{'mode':<22} {'events':>9} {'write ev/s':>11} {'recover s':>10}")
+    for label, snapshot_every in (("log only", 0), ("snapshot every 100k", 100_000)):
+        directory = args.dir or tempfile.mkdtemp(prefix="rides-bench-")
+        shutil.rmtree(directory, ignore_errors=True)
+        written, t_write, t_recover = run(directory, args.events, snapshot_every)
+        print(f"{label:<22} {written:>9} {written / t_write:>11.0f} {t_recover:>10.2f}")
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_profiling.py
+# Costo del perfilado: requests/s de GET /usuarios/{alias}/rides/{rideid}
+# con el perfilado apagado, encendido muestreando una fracción y muestreando
+# todo, y el costo por llamada de un método instrumentado.
+#   python benchmarks/bench_profiling.py [--requests 20000] [--sample 0.01]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.profiling import PROFILER
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+
+def scope(path: str) -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+            "server": ("bench", 80)}
+
+
+async def drive(app, requests: int, concurrency: int, paths) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def worker(n: int):
+        for i in range(n):
+            await app(scope(paths[i % len(paths)]), receive, send)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return (requests // concurrency * concurrency) / (time.perf_counter() - t0)
+
+
+def per_call(fn, calls: int = 1_000_000) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn(7)
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--sample", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+    dh = DataHandler()
+    for i in range(100):
+        dh.add_user(User(alias=f"u{i}", name=f"U{i}"))
+    for rideid in range(1, 1001):
+        ride = Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                    allowed_spaces=4, ride_driver=f"u{rideid % 100}")
+        dh.add_ride(ride)
+        for k in range(1, 4):
+            ride.request_join(RideParticipation(participant_alias=f"u{(rideid + k) % 100}",
+                                                destination="UTEC", occupied_spaces=1))
+    controller.data_handler = dh
+    owners = controller._profiled_owners()
+    paths = [f"/usuarios/u1/rides/{rideid}" for rideid in range(1, 1001, 7)]
+    modes = {"disabled": 0.0, f"sample {args.sample:g}": args.sample, "sample 1": 1.0}
+    results = {name: [] for name in modes}
+    for _ in range(args.rounds):        # alternadas, para que el ruido afecte a todas
+        for name, rate in modes.items():
+            PROFILER.disable()
+            if rate:
+                PROFILER.enable(rate, owners)
+            results[name].append(asyncio.run(drive(controller.app, args.requests, args.concurrency, paths)))
+    PROFILER.disable()
+    base = statistics.median(results["disabled"])
+    for name, values in results.items():
+        rate = statistics.median(values)
+        print(f"{name:<14} {rate:>8,.0f} req/s  ({(1 - rate / base) * 100:+5.1f} % overhead)")
+    # por llamada: desactivado es la función original; activado sin muestrear, un contextvar.get()
+    disabled = per_call(dh.get_ride)
+    PROFILER.enable(args.sample, owners)
+    unsampled = per_call(dh.get_ride)
+    PROFILER.disable()
+    print(f"get_ride: {disabled:.0f} ns disabled, {unsampled:.0f} ns enabled but not sampled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_ride_counters.py
+# Costo de free_spaces / request_join / accept en un ride con muchos participantes
+# (contadores incrementales vs. recalcular "occupied" sobre la lista completa).
+#   python benchmarks/bench_ride_counters.py [--participants 10000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from datetime import datetime
+
+from src.models.ride import Ride, OCCUPYING
+from src.models.ride_participation import RideParticipation
+
+
+def recomputed_occupied(ride: Ride) -> int:
+    # lo que hacía Ride.occupied antes de los contadores
+    return sum(p.occupied_spaces for p in ride.participants if p.status in OCCUPYING)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=10_000)
+    args = parser.parse_args()
+    n = args.participants
+
+    ride = Ride(id=1, ride_date_and_time=datetime.now(), final_address="X",
+                allowed_spaces=n, ride_driver="drv")
+    parts = [RideParticipation(participant_alias=f"p{i}", destination="X", occupied_spaces=1)
+             for i in range(n)]
+
+    t0 = time.perf_counter()
+    for p in parts:
+        ride.request_join(p)
+    t_join = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for p in parts[: n // 2]:
+        ride.accept(p.participant_alias)
+    t_accept = time.perf_counter() - t0
+
+    reps = 1_000
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        ride.free_spaces
+    t_counter = (time.perf_counter() - t0) / reps
+    t0 = time.perf_counter()
+    for _ in range(10):
+        ride.allowed_spaces - recomputed_occupied(ride)
+    t_recompute = (time.perf_counter() - t0) / 10
+
+    ride.verify_counters()
+    print(f"participants:            {n}")
+    print(f"request_join (avg):      {t_join / n * 1e6:10.2f} us")
+    print(f"accept (avg):            {t_accept / (n // 2) * 1e6:10.2f} us")
+    print(f"free_spaces (counter):   {t_counter * 1e6:10.3f} us")
+    print(f"free_spaces (recompute): {t_recompute * 1e6:10.3f} us")
+
+
+if __name__ == "__main__":
+    main()
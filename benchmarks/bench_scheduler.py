@@ -0,0 +1,67 @@
+# benchmarks/bench_scheduler.py
+# Scheduler: costo de cada tanda y latencia de lecturas mientras se arrancan rides vencidos.
+#   python benchmarks/bench_scheduler.py [--rides 200000] [--batch 500]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.scheduler import RideScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    base = datetime(2025, 7, 1)
+    dh = DataHandler()
+    for rideid in range(1, args.rides + 1):
+        ride = Ride(id=rideid, ride_date_and_time=base + timedelta(seconds=rideid), final_address="UTEC",
+                    allowed_spaces=4, ride_driver="drv")
+        dh.add_ride(ride)
+        ride.request_join(RideParticipation(participant_alias="p1", destination="UTEC", occupied_spaces=1))
+    t0 = time.perf_counter()
+    scheduler = RideScheduler(dh, start_grace=0, expire_after=10 ** 9, batch_size=args.batch, interval=0.01)
+    print(f"rides: {args.rides:,}  timers built in {time.perf_counter() - t0:.2f} s")
+
+    # lecturas concurrentes (como un GET /rides/{id}) mientras el hilo vacía la cola
+    latencies = []
+    done = threading.Event()
+
+    def reader():
+        rideid = 1
+        while not done.is_set():
+            t = time.perf_counter()
+            dh.get_ride(rideid).free_spaces
+            latencies.append(time.perf_counter() - t)
+            rideid = rideid % args.rides + 1
+            time.sleep(0.0005)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    t0 = time.perf_counter()
+    scheduler.start()
+    while scheduler.started < args.rides:
+        time.sleep(0.01)
+    drained = time.perf_counter() - t0
+    done.set()
+    thread.join()
+    stats = scheduler.metrics()
+    scheduler.close()
+    latencies.sort()
+    print(f"drained in {drained:.2f} s  ({args.rides / drained:,.0f} rides/s, {stats['sweeps']} sweeps)")
+    print(f"sweep: last {stats['lastSweepMs']:.1f} ms  max {stats['maxSweepMs']:.1f} ms")
+    print(f"reads during drain: p50 {latencies[len(latencies) // 2] * 1e6:.0f} us  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_serialization.py
+# GET /rides con y sin la caché de rides codificados.
+#   python benchmarks/bench_serialization.py [--rides 10000] [--participants 3] [--requests 20]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import warnings
+from datetime import datetime
+
+warnings.simplefilter("ignore")
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+from src.serialization import RideJSONCache
+
+
+def build(rides: int, participants: int) -> DataHandler:
+    dh = DataHandler()
+    dh.add_user(User(alias="drv", name="Driver", carPlate="ABC123"))
+    for i in range(participants):
+        dh.add_user(User(alias=f"p{i}", name=f"P{i}"))
+    for rideid in range(1, rides + 1):
+        ride = Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                    allowed_spaces=participants + 1, ride_driver="drv")
+        dh.add_ride(ride)
+        for i in range(participants):
+            ride.request_join(RideParticipation(participant_alias=f"p{i}", destination="UTEC", occupied_spaces=1))
+        if participants:
+            ride.accept("p0")
+    return dh
+
+
+def run(client: TestClient, requests: int, cache: RideJSONCache):
+    controller.ride_cache = cache
+    client.get("/rides")            # calienta (y llena la caché)
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        client.get("/rides")
+    return (time.perf_counter() - t0) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=10_000)
+    parser.add_argument("--participants", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    controller.data_handler = build(args.rides, args.participants)
+    client = TestClient(controller.app)
+    print(f"{'mode':<10} {'ms/request':>11} {'hit rate':>9}")
+    for label, cache in (("no cache", RideJSONCache(max_bytes=0)), ("cache", RideJSONCache())):
+        per_request = run(client, args.requests, cache)
+        lookups = cache.hits + cache.misses
+        print(f"{label:<10} {per_request * 1000:>11.1f} {cache.hits / lookups:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
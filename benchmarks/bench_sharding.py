@@ -0,0 +1,135 @@
+# benchmarks/bench_sharding.py
+# Escalado con shards: requests/s del front (ShardRouter) con 1, 2, 4 y 8
+# procesos shard en la misma máquina, con una mezcla de detalle de ride,
+# páginas de GET /rides, perfiles de usuario y altas de rides. El front corre
+# en este proceso y recibe los requests como app ASGI (sin red). Solo mide
+# escalado con al menos un núcleo por shard más el del front; con menos, los
+# procesos se reparten los mismos núcleos y se mide el costo del reparto.
+# --output guarda los resultados en JSON, con los núcleos usables en meta.
+#   python benchmarks/bench_sharding.py [--shards 1,2,4,8] [--requests 20000] [--output sharding.json]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from src.sharding import ShardRouter
+
+from suite import FORMAT, environment
+
+USERS = 2000
+
+
+def scope(method: str, path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+            "root_path": "", "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+
+
+async def call(app, method: str, path: str, query: bytes = b"", body: bytes = b"") -> int:
+    status = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()    # como un servidor: nada más hasta que el cliente corte
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope(method, path, query), receive, send)
+    return status
+
+
+async def load(router: ShardRouter, rides_per_driver: int) -> list:
+    drivers = [f"user{i}" for i in range(0, USERS, 4)]
+    await asyncio.gather(*(call(router, "POST", "/usuarios", body=json.dumps({"alias": f"user{i}", "name": f"U{i}"}).encode())
+                           for i in range(USERS)))
+    for driver in drivers:
+        batch = [{"rideDateAndTime": f"2025-07-{15 + k % 10}T08:00:00", "finalAddress": "UTEC",
+                  "allowedSpaces": 4, "rideDriver": driver} for k in range(rides_per_driver)]
+        await call(router, "POST", "/rides/batch", body=json.dumps({"rides": batch}).encode())
+    rng = random.Random(1)
+    rideids = []
+    for shard in router.clients:
+        status, _, body = await shard.fetch(scope("GET", "/rides"))
+        rideids += [ride["id"] for ride in json.loads(body)]
+    # 3 pasajeros por ride, de cualquier shard
+    for rideid in rideids:
+        for alias in rng.sample(range(USERS), 3):
+            await call(router, "POST", f"/usuarios/x/rides/{rideid}/requestToJoin/user{alias}", b"destination=UTEC")
+    return rideids
+
+
+async def drive(router: ShardRouter, rideids: list, requests: int, concurrency: int) -> float:
+    rng = random.Random(2)
+    ops = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < 0.6:
+            ops.append(("GET", f"/usuarios/user1/rides/{rng.choice(rideids)}", b"", b""))
+        elif roll < 0.8:
+            ops.append(("GET", f"/usuarios/user{rng.randrange(USERS)}", b"", b""))
+        elif roll < 0.9:
+            ops.append(("GET", "/rides", b"limit=20", b""))
+        else:
+            ops.append(("POST", "/rides", f"rideDateAndTime=2025-08-01T08:00:00&finalAddress=UTEC&allowedSpaces=3"
+                                          f"&rideDriver=user{rng.randrange(0, USERS, 4)}".encode(), b""))
+
+    async def worker(mine):
+        for method, path, query, body in mine:
+            await call(router, method, path, query, body)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(ops[k::concurrency]) for k in range(concurrency)))
+    return requests / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", default="1,2,4,8")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rides-per-driver", type=int, default=8)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    print(f"{cores} usable CPU(s)")
+    base = None
+    results = {}
+    for shards in (int(n) for n in args.shards.split(",")):
+        if shards + 1 > cores:
+            print(f"warning: {shards} shard(s) and the front share {cores} CPU(s); this measures overhead, not scaling")
+        router = ShardRouter(shards=shards)
+        router.connect()
+        try:
+            rideids = asyncio.run(load(router, args.rides_per_driver))
+            rate = asyncio.run(drive(router, rideids, args.requests, args.concurrency))
+        finally:
+            router.close()
+        base = base or rate
+        results[str(shards)] = {"reqPerSec": round(rate, 1), "speedup": round(rate / base, 3),
+                                "oversubscribed": shards + 1 > cores}
+        print(f"{shards} shard(s): {rate:>8,.0f} req/s  ({rate / base:.2f}x)")
+    if args.output:
+        params = {"requests": args.requests, "concurrency": args.concurrency,
+                  "rides_per_driver": args.rides_per_driver, "users": USERS}
+        meta = dict(environment(params), usable_cpus=cores)
+        with open(args.output, "w") as f:
+            json.dump({"format": FORMAT, "meta": meta, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
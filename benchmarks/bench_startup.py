@@ -0,0 +1,97 @@
+# benchmarks/bench_startup.py
+# Arranque en frío: tiempo desde lanzar un intérprete nuevo hasta la primera
+# request respondida con éxito (import de la app, lifespan y la request),
+# sin datos y recuperando un snapshot de --rides rides con carga completa o
+# con RIDES_FAST_START=1 (los terminados quedan en el archivo sin construirse).
+# La primera request con datos es el detalle de un ride terminado.
+#   python benchmarks/bench_startup.py [--rides 100000] [--users 10000] [--repeat 3]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+from src.models.persistence import Persistence
+from src.models.ride import RideStatus
+
+from datagen import generate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# corre en el intérprete nuevo; el reloj del padre incluye el arranque de Python
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from fastapi.testclient import TestClient
+import src.controller as controller
+t1 = time.perf_counter()
+with TestClient(controller.app) as client:          # corre el lifespan (scheduler, archivo)
+    t2 = time.perf_counter()
+    method, path, body = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+    response = client.request(method, path, json=body)
+    t3 = time.perf_counter()
+    assert response.status_code == 200, response.text
+    archive = controller.data_handler.archive
+    print(json.dumps({"import": t1 - t0, "lifespan": t2 - t1, "request": t3 - t2,
+                      "unencoded": archive.stats().get("unencoded", 0) if archive else 0}), flush=True)
+"""
+
+
+def build(directory: str, users: int, rides: int) -> int:
+    """Write a snapshot of a generated data set; returns the id of a done ride."""
+    dh = generate(users, rides)
+    persistence = Persistence(dh, directory)
+    persistence.snapshot()
+    persistence.close()
+    return dh.rides_with_status(RideStatus.done)[0].id
+
+
+def launch(env: dict, request: tuple) -> dict:
+    t0 = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", CHILD, *request], env={**os.environ, **env}, cwd=ROOT,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = child.stdout.readline()
+    total = time.perf_counter() - t0     # sin contar la salida del proceso
+    if child.wait() != 0 or not line:
+        raise RuntimeError(f"startup failed with {env}")
+    return {**json.loads(line), "total": total}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        t0 = time.perf_counter()
+        rideid = build(directory, args.users, args.rides)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"snapshot: {args.rides:,} rides, {args.users:,} users, {size / 2 ** 20:,.1f} MiB "
+              f"(built in {time.perf_counter() - t0:.1f} s)")
+        # sin RIDES_DATA_DIR los datos van en memoria y vacíos
+        modes = {
+            "no data": ({}, ("POST", "/usuarios", json.dumps({"alias": "a", "name": "A"}))),
+            "snapshot, full load": ({"RIDES_DATA_DIR": directory},
+                                    ("GET", f"/usuarios/user0/rides/{rideid}", "null")),
+            "snapshot, RIDES_FAST_START=1": ({"RIDES_DATA_DIR": directory, "RIDES_FAST_START": "1"},
+                                             ("GET", f"/usuarios/user0/rides/{rideid}", "null")),
+        }
+        print(f"{'':<30} {'first OK':>9} {'import':>8} {'lifespan':>9} {'request':>8}  (median s)")
+        for name, (env, request) in modes.items():
+            runs = [launch(env, request) for _ in range(args.repeat)]
+            median = {key: statistics.median(run[key] for run in runs)
+                      for key in ("total", "import", "lifespan", "request")}
+            print(f"{name:<30} {median['total']:>9.2f} {median['import']:>8.2f} {median['lifespan']:>9.2f} "
+                  f"{median['request']:>8.3f}  ({runs[-1]['unencoded']:,} rides left to encode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_time_index.py
+# "Rides que salen en los próximos 30 minutos": índice temporal vs. recorrer todos los rides.
+#   python benchmarks/bench_time_index.py [--rides 1000000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    base = datetime(2025, 7, 1)
+    dh = DataHandler()
+    for rideid in range(1, args.rides + 1):
+        departure = base + timedelta(minutes=rng.randrange(60 * 24 * 30))   # un mes
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=departure, final_address="UTEC",
+                         allowed_spaces=4, ride_driver="drv"))
+    starts = [base + timedelta(minutes=rng.randrange(60 * 24 * 30)) for _ in range(args.queries)]
+    window = timedelta(minutes=30)
+
+    t0 = time.perf_counter()
+    found = sum(len(dh.rides_between(s, s + window)) for s in starts)
+    indexed = (time.perf_counter() - t0) / args.queries
+    t0 = time.perf_counter()
+    for s in starts[:5]:
+        [r for r in dh.rides if s <= r.ride_date_and_time <= s + window]
+    scan = (time.perf_counter() - t0) / 5
+    print(f"rides: {args.rides:,}  avg matches: {found / args.queries:.0f}")
+    print(f"time index: {indexed * 1e6:>10.1f} us/query")
+    print(f"full scan:  {scan * 1e6:>10.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
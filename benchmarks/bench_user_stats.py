@@ -0,0 +1,47 @@
+# benchmarks/bench_user_stats.py
+# Costo de User.get_ride_stats para usuarios con historial largo
+# (contadores vivos vs. recuento completo del historial).
+#   python benchmarks/bench_user_stats.py [--history 100000]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+
+from src.models.user import User
+from src.models.ride_participation import RideParticipation, RPStatus
+
+PAST = [RPStatus.done, RPStatus.missing, RPStatus.notmarked, RPStatus.rejected]
+
+
+def timed(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=100_000)
+    args = parser.parse_args()
+
+    user = User(alias="u", name="U")
+    for _ in range(args.history):
+        user.add_ride(RideParticipation(
+            participant_alias="u", destination="X", occupied_spaces=1, status=random.choice(PAST)))
+    latest = RideParticipation(participant_alias="u", destination="X", occupied_spaces=1)
+    user.add_ride(latest)
+    latest.status = RPStatus.confirmed
+
+    live = timed(user.get_ride_stats, 10_000)
+    rebuild = timed(user.rebuild_ride_stats, 3)
+    print(f"history:                 {len(user.rides)}")
+    print(f"get_ride_stats (live):   {live * 1e6:10.2f} us")
+    print(f"rebuild_ride_stats:      {rebuild * 1e3:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
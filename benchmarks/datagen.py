@@ -0,0 +1,125 @@
+# benchmarks/datagen.py
+# Datos sintéticos para la suite de benchmarks: usuarios (una parte son
+# conductores, con placa), rides repartidos con sesgo (pocos conductores hacen
+# la mayoría de los viajes) y pasajeros por ride según una ocupación típica.
+# Todo se arma con las operaciones del modelo (request_join, accept, start,
+# ...), así que contadores, índices e historiales quedan coherentes: los rides
+# que ya salieron están terminados (done / missing / notmarked / rejected),
+# los de las últimas horas en curso y los futuros listos con solicitudes en
+# espera.
+#   python benchmarks/datagen.py [--users 5000] [--rides 20000] [--seed 1]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+NOW = datetime(2025, 7, 15, 12)
+DESTINATIONS = ["UTEC", "Miraflores", "San Isidro", "Barranco", "Surco", "La Molina", "Jesús María",
+                "Lince", "Magdalena", "San Borja", "Chorrillos", "Pueblo Libre"]
+# asientos ofrecidos y solicitudes por ride (pesos relativos)
+SEATS = {2: 2, 3: 4, 4: 3, 6: 1}
+REQUESTS = {0: 12, 1: 25, 2: 27, 3: 18, 4: 10, 5: 5, 6: 3}
+# historia de DAYS días hacia atrás y una semana de rides publicados a futuro
+DAYS = 60
+AHEAD = timedelta(days=7)
+# viajes que todavía no terminaron: salieron hace menos de esto
+IN_PROGRESS = timedelta(hours=2)
+
+
+def generate(users: int = 5000, rides: int = 20_000, drivers: float = 0.25, seed: int = 1,
+             now: datetime = NOW, days: int = DAYS) -> DataHandler:
+    """A DataHandler with ``users`` users (a ``drivers`` fraction of them
+    with a car) and ``rides`` rides numbered from 1, reproducible by ``seed``."""
+    rng = random.Random(seed)
+    dh = DataHandler()
+    aliases = [f"user{i}" for i in range(users)]
+    driver_count = max(1, int(users * drivers))
+    for i, alias in enumerate(aliases):
+        dh.add_user(User(alias=alias, name=f"User {i}",
+                         carPlate=f"ABC-{i:04d}" if i < driver_count else None))
+    # Zipf suave: el conductor k maneja ~ 1 / (k + 1)^0.8 de los viajes
+    driver_weights = [1 / (k + 1) ** 0.8 for k in range(driver_count)]
+    seat_values, seat_weights = list(SEATS), list(SEATS.values())
+    request_values, request_weights = list(REQUESTS), list(REQUESTS.values())
+    span = (now - timedelta(days=days), now + AHEAD)
+    seconds = int((span[1] - span[0]).total_seconds())
+
+    for rideid, driver in enumerate(rng.choices(aliases[:driver_count], driver_weights, k=rides), start=1):
+        # salidas en horario de clases: redondeadas a 15 minutos entre las 6 y las 22
+        departure = span[0] + timedelta(seconds=rng.randrange(seconds))
+        departure = departure.replace(hour=6 + departure.hour % 16, minute=departure.minute // 15 * 15,
+                                      second=0)
+        ride = Ride(id=rideid, ride_date_and_time=departure, final_address=rng.choice(DESTINATIONS),
+                    allowed_spaces=rng.choices(seat_values, seat_weights)[0], ride_driver=driver)
+        dh.add_ride(ride)
+        dh.next_ride_id = rideid + 1
+        requested = rng.choices(request_values, request_weights)[0]
+        riders = [alias for alias in rng.sample(aliases, requested + 1) if alias != driver][:requested]
+        for alias in riders:
+            # la mayoría pide un asiento, a veces dos (equipaje, acompañante)
+            spaces = 1 if rng.random() < 0.85 else 2
+            if spaces > ride.free_spaces:
+                continue
+            ride.request_join(RideParticipation(participant_alias=alias, destination=rng.choice(DESTINATIONS),
+                                                occupied_spaces=spaces))
+        _advance(ride, rng, now - departure)
+    return dh
+
+
+def _advance(ride: Ride, rng: random.Random, elapsed: timedelta):
+    """Decisions of the driver and the riders up to ``elapsed`` after the departure."""
+    future = elapsed < timedelta(0)
+    for p in list(ride.participants):
+        # en rides futuros el conductor todavía no contestó a una parte; en los
+        # pasados alguno quedó sin respuesta y al salir termina como ausente
+        if rng.random() < (0.4 if future else 0.05):
+            continue
+        if rng.random() < 0.15 or p.occupied_spaces > ride.free_spaces:
+            ride.reject(p.participant_alias)
+        else:
+            ride.accept(p.participant_alias)
+    if future:
+        return
+    ride.start()
+    if elapsed < IN_PROGRESS:
+        return
+    for p in ride.participants:
+        if p.can_be_unloaded() and rng.random() < 0.9:
+            p.mark_unloaded()
+    ride.end()
+
+
+def describe(dh: DataHandler) -> dict:
+    """Counts by ride status, participation status and riders per ride."""
+    participations = Counter(p.status.value for ride in dh.rides for p in ride.participants)
+    return {"users": len(dh.users), "drivers": len({ride.ride_driver for ride in dh.rides}),
+            "rides": {status.value: len(dh.rides_with_status(status)) for status in RideStatus},
+            "participations": dict(participations),
+            "ridersPerRide": dict(sorted(Counter(len(ride.participants) for ride in dh.rides).items()))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--rides", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    dh = generate(args.users, args.rides, seed=args.seed)
+    print(f"generated in {time.perf_counter() - t0:.2f} s")
+    for key, value in describe(dh).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# benchmarks/suite.py
+# Suite de benchmarks de la API de rides, sobre datos sintéticos (datagen.py):
+#   - micro: DataHandler (búsquedas, páginas, ventanas, altas), Ride (ciclo de
+#     vida, asientos libres) y User.get_ride_stats, en µs por operación
+#     (mediana de --repeat tandas calibradas a --min-time segundos cada una);
+#   - e2e: flujos completos por la app FastAPI con un cliente en proceso que
+#     llama a la app ASGI directamente (sin red ni httpx): alta de ride,
+#     create/join/accept/reject/start/unload/end, detalle, perfil y listados,
+#     con mediana, p95 y p99 por flujo.
+# --output escribe los resultados en JSON; --baseline los compara contra un
+# JSON guardado (p.ej. benchmarks/baseline.json) y termina con código 1 si la
+# mediana de algún caso empeoró más de --threshold (y su mejor muestra quedó
+# por encima de la mediana guardada); --save-baseline lo reescribe.
+#   python benchmarks/suite.py [--quick] [--only e2e,ride.] [--output results.json]
+#                              [--baseline benchmarks/baseline.json] [--threshold 0.25]
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation
+
+from datagen import NOW, generate
+
+FORMAT = 1
+DEFAULTS = {"users": 5000, "rides": 20_000, "seed": 1, "repeat": 7, "min_time": 0.05, "flows": 300}
+QUICK = {"users": 1000, "rides": 3000, "seed": 1, "repeat": 5, "min_time": 0.01, "flows": 60}
+
+
+# --- Medición -------------------------------------------------------------
+
+def measure(fn: Callable, repeat: int, min_time: float) -> List[float]:
+    """Seconds per call of ``fn``: one sample per batch, with the batch size
+    grown until a batch takes at least ``min_time``."""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return samples
+
+
+def latencies(fn: Callable, count: int, warmup: int = 5) -> List[float]:
+    """Seconds of each of ``count`` calls of ``fn`` (for the end-to-end flows)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def summarize(samples: List[float], group: str) -> dict:
+    us = sorted(sample * 1e6 for sample in samples)
+    result = {"group": group, "unit": "us", "samples": len(us), "median": statistics.median(us),
+              "min": us[0], "max": us[-1], "opsPerSec": 1e6 / statistics.median(us)}
+    if len(us) >= 20:
+        cuts = statistics.quantiles(us, n=100)
+        result["p95"], result["p99"] = cuts[94], cuts[98]
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+
+
+# --- Cliente en proceso ---------------------------------------------------
+
+class InProcessClient:
+    """Calls an ASGI app on its own event loop, without sockets."""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method: str, path: str, params: Optional[dict] = None,
+                json_body=None) -> Tuple[int, bytes]:
+        return self.loop.run_until_complete(self._call(method, path, params, json_body))
+
+    def expect(self, method: str, path: str, params: Optional[dict] = None, json_body=None) -> bytes:
+        status, body = self.request(method, path, params, json_body)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} -> {status}: {body[:200]!r}")
+        return body
+
+    def close(self):
+        self.loop.close()
+
+    async def _call(self, method, path, params, json_body):
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+                 "scheme": "http", "path": path, "raw_path": path.encode(),
+                 "query_string": urlencode(params or {}).encode(), "root_path": "",
+                 "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                             (b"content-length", str(len(body)).encode())],
+                 "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+        status = 0
+        chunks = []
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                await asyncio.Event().wait()    # como un servidor: nada más hasta que el cliente corte
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+# --- Casos ----------------------------------------------------------------
+
+def micro_cases(dh: DataHandler, rng: random.Random) -> Dict[str, Callable]:
+    aliases = [user.alias for user in dh.users]
+    rideids = [ride.id for ride in dh.rides]
+    by_history = sorted(dh.users, key=lambda user: len(user.rides))
+    heavy, typical = by_history[-1], by_history[len(by_history) // 2]
+    busy = max(dh.rides, key=lambda ride: len(ride.participants))
+    picks = [rng.choice(aliases) for _ in range(1024)]
+    ids = [rng.choice(rideids) for _ in range(1024)]
+    counter = iter(range(1 << 62))
+    day = timedelta(days=1)
+
+    def pick(items):
+        return items[next(counter) & 1023]
+
+    def lifecycle():
+        # un ride nuevo con 3 solicitudes: 2 aceptadas, 1 rechazada, salida, bajadas y fin
+        ride = Ride(id=0, ride_date_and_time=NOW, final_address="UTEC", allowed_spaces=3, ride_driver="user0")
+        for alias in ("user1", "user2", "user3"):
+            ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+        ride.accept("user1")
+        ride.accept("user2")
+        ride.reject("user3")
+        ride.start()
+        ride.get_participation("user1").mark_unloaded()
+        ride.get_participation("user2").mark_unloaded()
+        ride.end()
+
+    def add_ride():
+        dh.add_ride(Ride(id=dh.allocate_ride_id(), ride_date_and_time=NOW + timedelta(days=30),
+                         final_address="UTEC", allowed_spaces=3, ride_driver=pick(picks)))
+
+    return {
+        "data_handler.get_user": lambda: dh.get_user(pick(picks)),
+        "data_handler.get_ride": lambda: dh.get_ride(pick(ids)),
+        "data_handler.rides_page": lambda: dh.rides_page(pick(ids), 20),
+        "data_handler.rides_page_ready": lambda: dh.rides_page(pick(ids), 20, RideStatus.ready),
+        "data_handler.rides_of_user_page": lambda: dh.rides_of_user_page(pick(picks), None, 20),
+        "data_handler.rides_between": lambda: dh.rides_between(NOW - day, NOW + day, None, 20),
+        "ride.lifecycle": lifecycle,
+        "ride.free_spaces": lambda: busy.free_spaces,
+        "ride.verify_counters": busy.verify_counters,
+        "user.get_ride_stats_typical": typical.get_ride_stats,
+        "user.get_ride_stats_heavy": heavy.get_ride_stats,
+        "user.rebuild_ride_stats_heavy": heavy.rebuild_ride_stats,
+        # escribe: va al final de los micro
+        "data_handler.add_ride": add_ride,
+    }
+
+
+def e2e_cases(client: InProcessClient, dh: DataHandler, rng: random.Random) -> Dict[str, Callable]:
+    aliases = [user.alias for user in dh.users]
+    drivers = sorted({ride.ride_driver for ride in dh.rides})
+    rideids = [ride.id for ride in dh.rides]
+    departure = (NOW + timedelta(days=14)).isoformat()
+
+    def new_ride() -> int:
+        body = client.expect("POST", "/rides", {"rideDateAndTime": departure, "finalAddress": "UTEC",
+                                                "allowedSpaces": 3, "rideDriver": rng.choice(drivers)})
+        return json.loads(body)["id"]
+
+    def flow():
+        rideid = new_ride()
+        driver = dh.get_ride(rideid).ride_driver
+        base = f"/usuarios/{driver}/rides/{rideid}"
+        riders = [alias for alias in rng.sample(aliases, 4) if alias != driver][:3]
+        for alias in riders:
+            client.expect("POST", f"{base}/requestToJoin/{alias}", {"destination": "UTEC"})
+        client.expect("POST", f"{base}/accept/{riders[0]}")
+        client.expect("POST", f"{base}/accept/{riders[1]}")
+        client.expect("POST", f"{base}/reject/{riders[2]}")
+        client.expect("POST", f"{base}/start")
+        client.expect("POST", f"{base}/unloadParticipant/{riders[0]}")
+        client.expect("POST", f"{base}/unloadParticipant/{riders[1]}")
+        client.expect("POST", f"{base}/end")
+
+    day = timedelta(days=1)
+    return {
+        "e2e.get_user": lambda: client.expect("GET", f"/usuarios/{rng.choice(aliases)}"),
+        "e2e.ride_detail": lambda: client.expect("GET", f"/usuarios/{rng.choice(aliases)}/rides/"
+                                                        f"{rng.choice(rideids)}"),
+        "e2e.list_rides": lambda: client.expect("GET", "/rides", {"limit": 20, "status": "ready"}),
+        "e2e.rides_window": lambda: client.expect("GET", "/rides", {"from": (NOW - day).isoformat(),
+                                                                   "to": (NOW + day).isoformat(), "limit": 20}),
+        "e2e.user_rides": lambda: client.expect("GET", f"/usuarios/{rng.choice(aliases)}/rides"),
+        "e2e.create_ride": new_ride,
+        # 11 requests: alta, 3 solicitudes, 2 aceptadas, 1 rechazada, salida, 2 bajadas y fin
+        "e2e.ride_flow": flow,
+    }
+
+
+def selected(name: str, only: Optional[List[str]]) -> bool:
+    return not only or any(part in name for part in only)
+
+
+def run(params: dict, only: Optional[List[str]] = None, log=print) -> dict:
+    """Generate the data set of ``params`` and run the selected cases."""
+    t0 = time.perf_counter()
+    dh = generate(params["users"], params["rides"], seed=params["seed"])
+    log(f"data: {params['users']:,} users, {params['rides']:,} rides in {time.perf_counter() - t0:.1f} s")
+    rng = random.Random(params["seed"])
+    results = {}
+    for name, fn in micro_cases(dh, rng).items():
+        if selected(name, only):
+            results[name] = summarize(measure(fn, params["repeat"], params["min_time"]), "micro")
+            log(row(name, results[name]))
+
+    previous = controller.data_handler
+    controller.data_handler = dh
+    client = InProcessClient(controller.app)
+    try:
+        for name, fn in e2e_cases(client, dh, rng).items():
+            if selected(name, only):
+                results[name] = summarize(latencies(fn, params["flows"]), "e2e")
+                log(row(name, results[name]))
+    finally:
+        client.close()
+        controller.data_handler = previous
+    return {"format": FORMAT, "meta": environment(params), "results": results}
+
+
+def environment(params: dict) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {"params": params, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "commit": commit or None,
+            "date": datetime.now().isoformat(timespec="seconds")}
+
+
+# --- Comparación ----------------------------------------------------------
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """One row per case: baseline and current medians, their ratio and a
+    verdict (regression / faster / same / new / missing).
+
+    A case regresses when its median grew more than ``threshold`` and even
+    its fastest sample is slower than the baseline median."""
+    rows = []
+    now, before = current["results"], baseline["results"]
+    for name in list(now) + [name for name in before if name not in now]:
+        if name not in before:
+            rows.append({"case": name, "baseline": None, "current": now[name]["median"], "ratio": None,
+                         "verdict": "new"})
+            continue
+        if name not in now:
+            rows.append({"case": name, "baseline": before[name]["median"], "current": None, "ratio": None,
+                         "verdict": "missing"})
+            continue
+        ratio = now[name]["median"] / before[name]["median"]
+        # además de la mediana, hasta la mejor muestra tiene que ser más lenta
+        # que la mediana guardada: una tanda ruidosa no alcanza para fallar
+        if ratio > 1 + threshold and now[name]["min"] > before[name]["median"]:
+            verdict = "regression"
+        elif ratio < 1 / (1 + threshold) and now[name]["median"] < before[name]["min"]:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append({"case": name, "baseline": before[name]["median"], "current": now[name]["median"],
+                     "ratio": round(ratio, 3), "verdict": verdict})
+    return rows
+
+
+def row(name: str, result: dict) -> str:
+    tail = f"  p95 {result['p95']:>10,.1f}" if "p95" in result else ""
+    return f"{name:<34} {result['median']:>10,.2f} µs  min {result['min']:>10,.2f}{tail}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="small data set and short batches (CI)")
+    for key, value in DEFAULTS.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=type(value), default=None)
+    parser.add_argument("--only", default=None, help="comma separated substrings of case names")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--save-baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+    params = dict(QUICK if args.quick else DEFAULTS)
+    params.update({key: getattr(args, key) for key in DEFAULTS if getattr(args, key) is not None})
+    only = args.only.split(",") if args.only else None
+
+    report = run(params, only)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
+    if not args.baseline:
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"]["params"] != params:
+        print(f"warning: baseline was run with {baseline['meta']['params']}, this run with {params}")
+    rows = compare(report, baseline, args.threshold)
+    print(f"\n{'case':<34} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for r in rows:
+        fmt = lambda value: f"{value:>10,.2f}" if value is not None else f"{'-':>10}"
+        ratio = f"{r['ratio']:>7.2f}" if r["ratio"] is not None else f"{'-':>7}"
+        print(f"{r['case']:<34} {fmt(r['baseline'])} {fmt(r['current'])} {ratio}  {r['verdict']}")
+    regressions = [r["case"] for r in rows if r["verdict"] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# src/async_controller.py
+# Variante async del controller: mismas rutas, parámetros y esquemas (se
+# generan a partir de src.controller), pero cada handler es una corutina.
+# Con el backend en memoria (sin RIDES_DATA_DIR) las operaciones O(1) sobre un
+# usuario o un ride se atienden en el event loop sin pasar por el pool de
+# hilos; el resto, y todo con RIDES_DATA_DIR o RIDES_DB, se delega a un hilo.
+#   uvicorn src.async_controller:app
+import inspect
+from functools import partial, wraps
+from typing import Callable
+
+import anyio.to_thread
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from src import controller, metrics
+from src.idempotency import IdempotencyMiddleware
+from src.models import profiling
+from src.models.async_storage import AsyncStorage
+
+
+def storage() -> AsyncStorage:
+    # se resuelve en cada request: controller.data_handler puede reemplazarse (tests)
+    return AsyncStorage(controller.data_handler)
+
+
+# Lo que puede correr en el event loop: lecturas y altas de una sola entidad,
+# que no esperan ningún ride_lock. Listados, /stats/*, búsquedas y lotes
+# recorren muchos objetos, y las transiciones esperan el lock del ride (que un
+# lote o el scheduler retienen desde otro hilo): en el loop frenarían a todos
+# los clientes, feeds SSE incluidos.
+INLINE = frozenset({controller.create_user, controller.get_user, controller.create_ride,
+                    controller.ride_detail, controller.ride_events, controller.user_events})
+
+
+def _async_endpoint(endpoint: Callable) -> Callable:
+    if endpoint in INLINE:
+        @wraps(endpoint)    # FastAPI lee la firma (parámetros y tipos) del endpoint original
+        async def handler(**kwargs):
+            return await storage().run(endpoint, **kwargs)
+    else:
+        @wraps(endpoint)
+        async def handler(**kwargs):
+            return await anyio.to_thread.run_sync(partial(endpoint, **kwargs))
+    return handler
+
+
+app = FastAPI(lifespan=controller.lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(IdempotencyMiddleware, cache=controller.idempotency_cache,
+                   owner=lambda: controller.data_handler)
+
+for route in controller.app.routes:
+    if isinstance(route, APIRoute):
+        # los que ya son corutinas no tocan el storage fuera del event loop
+        endpoint = route.endpoint if inspect.iscoroutinefunction(route.endpoint) else _async_endpoint(route.endpoint)
+        app.add_api_route(route.path, endpoint, methods=list(route.methods), response_model=route.response_model,
+                          name=route.name, include_in_schema=route.include_in_schema)
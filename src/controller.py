@@ -1,37 +1,165 @@
-from fastapi import FastAPI, HTTPException, Query
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Iterator, List, Optional
 from datetime import datetime
+import base64
+import json
+import os
+import sys
+import threading
 
 from src.models.data_handler import DataHandler
-from src.models.ride_participation import RideParticipation
+from src.models.persistence import Persistence
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.ride_participation import RideParticipation, as_datetime
 from src.models.user import User
 from src.models.ride import Ride
-from src.schemas import UserSchema, RideSchema, RideParticipationSchema
+from src.models.matching import DestinationIndex
+from src.models.scheduler import RideScheduler
+from src.models.archive import RideArchive
+from src.models.feed import ChangeFeed, Subscription
+from src.models.sharding import ShardDataHandler
+from src.schemas import (UserSchema, RideSchema, RideParticipationSchema, BulkRidesSchema,
+                         BatchAliasesSchema, BatchItemSchema, BatchResultSchema, DriverStatsSchema,
+                         UserStatsSchema, HourStatsSchema, DestinationStatsSchema, RideMatchSchema,
+                         SchedulerStatsSchema, ArchiveStatsSchema, ProfileSchema)
+from src import metrics
+from src.idempotency import IdempotencyCache, IdempotencyMiddleware
+from src.models import profiling
+from src.models.profiling import profiled
+from src.serialization import RideJSONCache, ride_schema, encode_user_summary, json_array
 
-app = FastAPI()
-data_handler = DataHandler()
+# backend: RIDES_DB=/ruta/rides.sqlite usa SQLite (varios workers sobre la misma base);
+# si no, memoria, opcionalmente persistida con RIDES_DATA_DIR=/ruta/datos
+persistence = None
+if os.environ.get("RIDES_DB"):
+    data_handler = SQLiteDataHandler(os.environ["RIDES_DB"])
+elif os.environ.get("RIDES_DATA_DIR"):
+    # RIDES_FAST_START=1: los rides terminados del snapshot van directo al
+    # archivo, sin construirse (ver RideArchive.preload)
+    persistence = Persistence.open(os.environ["RIDES_DATA_DIR"], lazy=os.environ.get("RIDES_FAST_START") == "1")
+    data_handler = persistence.data_handler
+else:
+    data_handler = DataHandler()
+
+# rides ya codificados para los listados; RIDES_CACHE_BYTES=0 la desactiva
+ride_cache = RideJSONCache(max_bytes=int(os.environ.get("RIDES_CACHE_BYTES", 64 * 1024 * 1024)))
+
+# respuestas de los POST con Idempotency-Key, RIDES_IDEMPOTENCY_TTL segundos
+# (un día); RIDES_IDEMPOTENCY_BYTES=0 lo desactiva
+idempotency_cache = IdempotencyCache(max_bytes=int(os.environ.get("RIDES_IDEMPOTENCY_BYTES", 16 * 1024 * 1024)),
+                                     ttl=float(os.environ.get("RIDES_IDEMPOTENCY_TTL", 24 * 3600)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _attached_to_handler("domain_counters", metrics.DomainCounters)
+    if os.environ.get("RIDES_SCHEDULER") == "1":
+        _scheduler().start()
+    if _archive_enabled():
+        _archive().start()
+    yield
+    _close_attached()
+    if persistence:
+        persistence.close()
+    if isinstance(data_handler, SQLiteDataHandler):
+        data_handler.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+# afuera de todo: un reintento se contesta sin llegar a la app
+app.add_middleware(IdempotencyMiddleware, cache=idempotency_cache, owner=lambda: data_handler)
+
+# --- Paginación ----------------------------------------
+# Keyset: el cursor es la clave del último elemento entregado (id del ride o
+# alias del usuario), así que las páginas no se corren si entran datos nuevos.
+# Con ?limit=N la respuesta trae X-Next-Cursor mientras queden elementos;
+# con ?stream=true se envía NDJSON generado por tandas (memoria constante).
+MAX_PAGE = 1000
+STREAM_CHUNK = 500
+
+def _encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: Optional[str], kind: type):
+    if cursor is None:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        key = None
+    if type(key) is not kind:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+def _stream_pages(fetch: Callable, key: Callable, encode: Callable,
+                  after, limit: Optional[int]) -> Iterator[bytes]:
+    sent = 0
+    while limit is None or sent < limit:
+        size = STREAM_CHUNK if limit is None else min(STREAM_CHUNK, limit - sent)
+        items = fetch(after, size)
+        for data in encode(items):
+            yield data + b"\n"
+        if len(items) < size:
+            return
+        after, sent = key(items[-1]), sent + len(items)
+
+def _listing(fetch: Callable, key: Callable, encode: Callable,
+             after, limit: Optional[int], stream: bool) -> Response:
+    """``fetch(after, limit)`` returns the items following ``after`` in key
+    order; ``encode(items)`` their JSON bytes."""
+    if stream:
+        return StreamingResponse(_stream_pages(fetch, key, encode, after, limit),
+                                 media_type="application/x-ndjson")
+    items = fetch(after, None if limit is None else limit + 1)
+    headers = {}
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(key(items[-1]))
+    # bytes ya codificados: se saltea la validación/serialización del response_model
+    return Response(json_array(encode(items)), media_type="application/json", headers=headers)
+
+def _ride_key(ride: Ride) -> int:
+    return ride.id
+
+def _user_key(user: User) -> str:
+    return user.alias
+
+def _departure_key(ride: Ride) -> list:
+    # orden del índice temporal: (salida, id)
+    return [ride.ride_date_and_time.isoformat(), ride.id]
+
+def _decode_departure_cursor(cursor: Optional[str]):
+    key = _decode_cursor(cursor, list)
+    if key is None:
+        return None
+    try:
+        return as_datetime(key[0]), int(key[1])
+    except (ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # --- User Endpoints ---
 @app.get("/usuarios", response_model=List[UserSchema])
-def list_users():
-    return [UserSchema(
-        alias=u.alias,
-        name=u.name,
-        carPlate=u.carPlate,
-        rides=[i for i in range(len(u.rides))]  # Just index for demo
-    ) for u in data_handler.users]
+def list_users(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE), after: Optional[str] = None,
+               stream: bool = False):
+    # rides: solo índices (demo)
+    return _listing(data_handler.users_page, _user_key, lambda users: map(encode_user_summary, users),
+                    _decode_cursor(after, str), limit, stream)
 
 @app.post("/usuarios", response_model=UserSchema)
 def create_user(user: UserSchema):
-    if data_handler.get_user(user.alias):
-        raise HTTPException(status_code=422, detail="User already exists")  # Badi was here >:p
     new_user = User(
         alias=user.alias,
         name=user.name,
         carPlate=user.carPlate,
         rides=[]
     )
-    data_handler.add_user(new_user)
+    try:
+        # add_user es quien decide: dos requests (o dos workers) con el mismo alias
+        data_handler.add_user(new_user)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="User already exists")  # Badi was here >:p
     return user
 
 @app.get("/usuarios/{alias}", response_model=UserSchema)
@@ -54,65 +182,65 @@ def create_ride(
     rideDateAndTime: datetime,
     finalAddress: str,
     allowedSpaces: int,
-    rideDriver: str
+    rideDriver: str,
+    finalLat: Optional[float] = None,
+    finalLon: Optional[float] = None
 ):
     driver = data_handler.get_user(rideDriver)
     if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")  # Badi was here >:p
-    ride = Ride(
-        id=data_handler.next_ride_id,
-        ride_date_and_time=rideDateAndTime,
-        final_address=finalAddress,
-        allowed_spaces=allowedSpaces,
-        ride_driver=rideDriver,
-        status="ready",
-        participants=[]
-    )
-    data_handler.add_ride(ride)
-    driver.rides.append(ride)  # Add ride to driver's rides
-    return RideSchema(
-        id=ride.id,
-        rideDateAndTime=ride.ride_date_and_time,
-        finalAddress=ride.final_address,
-        allowedSpaces=ride.allowed_spaces,
-        rideDriver=ride.ride_driver,
-        status=ride.status,
-        participants=[]
-    )
+    if (finalLat is None) != (finalLon is None):
+        raise HTTPException(status_code=422, detail="finalLat and finalLon go together")
+    if finalLat is not None and not (-90 <= finalLat <= 90 and -180 <= finalLon <= 180):
+        raise HTTPException(status_code=422, detail="Invalid coordinates")
+    try:
+        # con zona horaria se guarda como UTC sin zona (ver as_datetime)
+        ride = Ride(
+            id=data_handler.allocate_ride_id(),
+            ride_date_and_time=rideDateAndTime,
+            final_address=finalAddress,
+            allowed_spaces=allowedSpaces,
+            ride_driver=rideDriver,
+            status="ready",
+            participants=[],
+            final_lat=finalLat,
+            final_lon=finalLon
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))  # Badi was here >:p
+    data_handler.add_ride(ride)  # also adds it to the driver's rides
+    return ride_schema(ride)
 
 @app.get("/rides", response_model=List[RideSchema])
-def list_active_rides(status: Optional[str] = Query(None)):
-    rides = data_handler.rides
-    if status:
-        rides = [r for r in rides if r.status == status]
-    return [RideSchema(
-        id=r.id,
-        rideDateAndTime=r.ride_date_and_time,
-        finalAddress=r.final_address,
-        allowedSpaces=r.allowed_spaces,
-        rideDriver=r.ride_driver,
-        status=r.status,
-        participants=[RideParticipationSchema(
-            confirmation=p.confirmation,
-            destination=p.destination,
-            occupiedSpaces=p.occupiedSpaces,
-            status=p.status,
-            participant_alias=p.participant_alias
-        ) for p in r.participants]
-    ) for r in rides]
+def list_active_rides(status: Optional[str] = Query(None),
+                      limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE), after: Optional[str] = None,
+                      stream: bool = False,
+                      from_: Optional[datetime] = Query(None, alias="from"), to: Optional[datetime] = None):
+    dh = data_handler
+    encode = lambda rides: ride_cache.get_many(rides, "listing", dh)
+    if from_ is not None or to is not None:
+        # ventana de salida (índice temporal), ordenada por salida
+        from_, to = as_datetime(from_), as_datetime(to)
+        return _listing(lambda key, n: dh.rides_between(from_, to, key, n, status or None), _departure_key,
+                        encode, _decode_departure_cursor(after), limit, stream)
+    return _listing(lambda key, n: dh.rides_page(key, n, status or None), _ride_key,
+                    encode, _decode_cursor(after, int), limit, stream)
 
 # --- Ride Participation Endpoints ---
 @app.post("/usuarios/{alias}/rides/{rideid}/unloadParticipant")
 def unload_participant(alias: str, rideid: int):
-    ride = data_handler.get_ride(rideid)
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")  # Badi was here >:p
-    part = next((p for p in ride.participants if p.participant_alias == alias), None)
-    if not part:
-        raise HTTPException(status_code=404, detail="Participation not found")  # Badi was here >:p
-    if part.status != "inprogress":
-        raise HTTPException(status_code=422, detail="Can only unload inprogress participants")  # Badi was here >:p
-    part.status = "done"
+    with data_handler.ride_lock(rideid):
+        ride = data_handler.get_ride(rideid)
+        if not ride:
+            raise HTTPException(status_code=404, detail="Ride not found")  # Badi was here >:p
+        part = ride.get_participation(alias)
+        if not part:
+            raise HTTPException(status_code=404, detail="Participation not found")  # Badi was here >:p
+        try:
+            part.mark_unloaded()
+        except ValueError as e:
+            metrics.TRANSITION_ERRORS.inc("unload")
+            raise HTTPException(status_code=422, detail=str(e))  # Badi was here >:p
     return {"message": "Participant unloaded"}
 
 # --- Ayudas internas ----------------------------------
@@ -130,45 +258,44 @@ def _user_or_404(alias: str) -> User:
 
 # --- Rides por usuario ---------------------------------
 @app.get("/usuarios/{alias}/rides", response_model=List[RideSchema])
-def rides_by_user(alias: str):
+def rides_by_user(alias: str, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE),
+                  after: Optional[str] = None, stream: bool = False):
     user = _user_or_404(alias)
-    return [
-        RideSchema(
-            id=r.id,
-            rideDateAndTime=r.ride_date_and_time,
-            finalAddress=r.final_address,
-            allowedSpaces=r.allowed_spaces,
-            rideDriver=r.ride_driver,
-            status=r.status.value,
-            participants=[],
-        )
-        for r in user.rides                    # aquí r son objetos Ride
-        if isinstance(r, Ride)                 # (driver.rides.append(ride))
-    ]
+    dh = data_handler
+    # conduce o pidió unirse
+    return _listing(lambda key, n: dh.rides_of_user_page(user.alias, key, n), _ride_key,
+                    lambda rides: ride_cache.get_many(rides, "summary", dh),
+                    _decode_cursor(after, int), limit, stream)
 
 @app.get("/usuarios/{alias}/rides/{rideid}", response_model=RideSchema)
 def ride_detail(alias: str, rideid: int):
     _user_or_404(alias)
     ride = _ride_or_404(rideid)
-    # construir respuesta enriquecida
-    def _build_part_schema(p: RideParticipation):
-        u = data_handler.get_user(p.participant_alias)
-        return RideParticipationSchema(
-            confirmation=p.confirmation,
-            destination=p.destination,
-            occupiedSpaces=p.occupied_spaces,
-            status=p.status.value,
-            participant=UserSchema(
-                alias=u.alias,
-                name=u.name,
-                carPlate=u.carPlate,
-                rides=[],
-                **u.get_ride_stats(),
-            )
-            if u
-            else None,
+    # construir respuesta enriquecida (sin caché: incluye estadísticas de
+    # otros usuarios, que cambian sin que cambie la versión del ride)
+    return _ride_detail_schema(ride)
+
+@profiled("ride_detail.participant")
+def _participation_schema(p: RideParticipation) -> RideParticipationSchema:
+    u = data_handler.get_user(p.participant_alias)
+    return RideParticipationSchema(
+        confirmation=p.confirmation,
+        destination=p.destination,
+        occupiedSpaces=p.occupied_spaces,
+        status=p.status.value,
+        participant=UserSchema(
+            alias=u.alias,
+            name=u.name,
+            carPlate=u.carPlate,
+            rides=[],
+            **u.get_ride_stats(),
         )
+        if u
+        else None,
+    )
 
+@profiled("ride_detail.schema")
+def _ride_detail_schema(ride: Ride) -> RideSchema:
     return RideSchema(
         id=ride.id,
         rideDateAndTime=ride.ride_date_and_time,
@@ -176,77 +303,402 @@ def ride_detail(alias: str, rideid: int):
         allowedSpaces=ride.allowed_spaces,
         rideDriver=ride.ride_driver,
         status=ride.status.value,
-        participants=[_build_part_schema(p) for p in ride.participants],
+        participants=[_participation_schema(p) for p in ride.participants],
     )
 
+@contextmanager
+def _transition(action: str):
+    # el modelo rechaza la transición con ValueError: 422, contado en /metrics
+    try:
+        yield
+    except ValueError as e:
+        metrics.TRANSITION_ERRORS.inc(action)
+        raise HTTPException(status_code=422, detail=str(e))
+
 # --- Solicitar unirse ----------------------------------
 @app.post("/usuarios/{driver}/rides/{rideid}/requestToJoin/{alias}")
 def request_to_join(driver: str, rideid: int, alias: str,
                     destination: str, occupiedSpaces: int = 1):
     _user_or_404(alias)
-    ride = _ride_or_404(rideid)
-    try:
-        ride.request_join(
-            RideParticipation(
-                participant_alias=alias,
-                destination=destination,
-                occupied_spaces=occupiedSpaces,
-            )
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    participation = RideParticipation(
+        participant_alias=alias,
+        destination=destination,
+        occupied_spaces=occupiedSpaces,
+    )
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        with _transition("request_join"):
+            ride.request_join(participation)
     return {"message": "Request registered"}
 
 # --- Aceptar / rechazar --------------------------------
 @app.post("/usuarios/{driver}/rides/{rideid}/accept/{alias}")
 def accept_participant(driver: str, rideid: int, alias: str):
-    ride = _ride_or_404(rideid)
-    try:
-        ride.accept(alias)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        with _transition("accept"):
+            ride.accept(alias)
     return {"message": "Accepted"}
 
 @app.post("/usuarios/{driver}/rides/{rideid}/reject/{alias}")
 def reject_participant(driver: str, rideid: int, alias: str):
-    ride = _ride_or_404(rideid)
-    try:
-        ride.reject(alias)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        with _transition("reject"):
+            ride.reject(alias)
     return {"message": "Rejected"}
 
 # --- Iniciar / terminar -------------------------------
 @app.post("/usuarios/{driver}/rides/{rideid}/start")
 def start_ride(driver: str, rideid: int):
-    ride = _ride_or_404(rideid)
-    try:
-        ride.start()
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        with _transition("start"):
+            ride.start()
     return {"message": "Ride started"}
 
 @app.post("/usuarios/{driver}/rides/{rideid}/end")
 def end_ride(driver: str, rideid: int):
-    ride = _ride_or_404(rideid)
-    try:
-        ride.end()
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        with _transition("end"):
+            ride.end()
     return {"message": "Ride finished"}
 
 # --- Bajar participante (ya existía, solo actualiza) ---
 @app.post("/usuarios/{driver}/rides/{rideid}/unloadParticipant/{alias}")
 def unload_participant(driver: str, rideid: int, alias: str):
-    ride = _ride_or_404(rideid)
-    part = ride.get_participation(alias)
-    if not part:
-        raise HTTPException(status_code=404, detail="Participation not found")
-    try:
-        part.mark_unloaded()
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        part = ride.get_participation(alias)
+        if not part:
+            raise HTTPException(status_code=404, detail="Participation not found")
+        with _transition("unload"):
+            part.mark_unloaded()
     return {"message": "Participant unloaded"}
 
 
+# --- Lotes ---------------------------------------------
+# Una sola búsqueda del ride (bajo su lock) por lote; cada ítem informa el
+# código que habría devuelto el endpoint individual. Con atomic=true todo se
+# valida antes de aplicar y, si algo falla, no se aplica nada (422).
+_BATCH_MESSAGES = {"accept": "Accepted", "reject": "Rejected", "unload": "Participant unloaded"}
+
+def _batch_item_code(error: Optional[str]) -> int:
+    if error is None:
+        return 200
+    return 404 if error == "Participation not found" else 422
+
+def _batch_transition(rideid: int, body: BatchAliasesSchema, action: str) -> BatchResultSchema:
+    with data_handler.ride_lock(rideid):
+        ride = _ride_or_404(rideid)
+        checked, seen, reserved = [], set(), 0
+        for alias in body.aliases:
+            error = "Duplicate alias in batch" if alias in seen else ride.transition_error(action, alias, reserved)
+            seen.add(alias)
+            if error is None and action == "accept":
+                reserved += ride.get_participation(alias).occupied_spaces
+            checked.append((alias, error))
+        results = [BatchItemSchema(key=alias, status_code=_batch_item_code(error),
+                                   detail=error or _BATCH_MESSAGES[action])
+                   for alias, error in checked]
+        if body.atomic and any(error for _, error in checked):
+            raise HTTPException(status_code=422, detail=[r.model_dump() for r in results])
+        for alias, error in checked:
+            if error is None:
+                if action == "accept":
+                    ride.accept(alias)
+                elif action == "reject":
+                    ride.reject(alias)
+                else:
+                    ride.get_participation(alias).mark_unloaded()
+    return BatchResultSchema(applied=sum(error is None for _, error in checked), results=results)
+
+@app.post("/usuarios/{driver}/rides/{rideid}/batch/accept", response_model=BatchResultSchema)
+def accept_participants(driver: str, rideid: int, body: BatchAliasesSchema):
+    return _batch_transition(rideid, body, "accept")
+
+@app.post("/usuarios/{driver}/rides/{rideid}/batch/reject", response_model=BatchResultSchema)
+def reject_participants(driver: str, rideid: int, body: BatchAliasesSchema):
+    return _batch_transition(rideid, body, "reject")
+
+@app.post("/usuarios/{driver}/rides/{rideid}/batch/unloadParticipant", response_model=BatchResultSchema)
+def unload_participants(driver: str, rideid: int, body: BatchAliasesSchema):
+    return _batch_transition(rideid, body, "unload")
+
+@app.post("/rides/batch", response_model=BatchResultSchema)
+def create_rides(body: BulkRidesSchema):
+    drivers = {}   # una búsqueda por conductor
+    checked = []
+    for item in body.rides:
+        if item.rideDriver not in drivers:
+            drivers[item.rideDriver] = data_handler.get_user(item.rideDriver)
+        error = None if drivers[item.rideDriver] else "Driver not found"
+        if error is None and item.allowedSpaces <= 0:
+            error = "allowedSpaces must be greater than 0"
+        if error is None and (item.finalLat is None) != (item.finalLon is None):
+            error = "finalLat and finalLon go together"
+        checked.append((item, error))
+    if body.atomic and any(error for _, error in checked):
+        raise HTTPException(status_code=422, detail=[
+            BatchItemSchema(key=str(i), status_code=404 if error == "Driver not found" else 422,
+                            detail=error or "Valid").model_dump()
+            for i, (_, error) in enumerate(checked)])
+    results = []
+    for i, (item, error) in enumerate(checked):
+        if error:
+            results.append(BatchItemSchema(key=str(i), status_code=404 if error == "Driver not found" else 422,
+                                           detail=error))
+            continue
+        ride = Ride(
+            id=data_handler.allocate_ride_id(),
+            ride_date_and_time=item.rideDateAndTime,
+            final_address=item.finalAddress,
+            allowed_spaces=item.allowedSpaces,
+            ride_driver=item.rideDriver,
+            status="ready",
+            participants=[],
+            final_lat=item.finalLat,
+            final_lon=item.finalLon
+        )
+        data_handler.add_ride(ride)
+        results.append(BatchItemSchema(key=str(i), status_code=200, detail="Created", ride=ride_schema(ride)))
+    return BatchResultSchema(applied=sum(error is None for _, error in checked), results=results)
+
+
+
+# --- Subsistemas ligados al data_handler ---------------
+# Índices y cachés que se suscriben a los eventos del data_handler actual;
+# si se reemplaza (tests, recarga) se cierran y se vuelven a construir.
+_attached = {}
+_attached_lock = threading.Lock()
+
+def _attached_to_handler(name: str, build: Callable):
+    with _attached_lock:
+        current = _attached.get(name)
+        if current is None or current.storage is not data_handler:
+            if current:
+                current.close()
+            current = _attached[name] = build(data_handler)
+        return current
+
+def _close_attached():
+    with _attached_lock:
+        for subsystem in _attached.values():
+            subsystem.close()
+        _attached.clear()
+
+
+# --- Ciclo de vida automático -------------------------
+# Arranca los rides RIDES_AUTOSTART_GRACE segundos después de su salida y
+# cierra los que siguen en curso RIDES_EXPIRE_AFTER segundos después.
+# Solo corre con RIDES_SCHEDULER=1 (cambia rides sin que nadie lo pida).
+def _scheduler() -> RideScheduler:
+    return _attached_to_handler("scheduler", lambda dh: RideScheduler(
+        dh, start_grace=float(os.environ.get("RIDES_AUTOSTART_GRACE", 15 * 60)),
+        expire_after=float(os.environ.get("RIDES_EXPIRE_AFTER", 6 * 3600))))
+
+@app.get("/stats/scheduler", response_model=SchedulerStatsSchema)
+def scheduler_stats():
+    return _scheduler().metrics()
+
+
+# --- Archivo de rides terminados ----------------------
+# Con RIDES_ARCHIVE=1 los rides en done salen de memoria RIDES_ARCHIVE_AFTER
+# segundos después de terminar (solo backend en memoria; SQLite ya los tiene
+# en disco). Apagado por defecto: los listados solo recorren memoria, así que
+# los rides archivados dejan de aparecer en GET /rides. RIDES_FAST_START ya
+# deja en el archivo los rides terminados del snapshot y también lo enciende.
+def _archive_enabled() -> bool:
+    return isinstance(data_handler, DataHandler) and (os.environ.get("RIDES_ARCHIVE") == "1"
+                                                      or data_handler.archive is not None)
+
+def _archive() -> RideArchive:
+    return _attached_to_handler("archive", _build_archive)
+
+def _build_archive(dh: DataHandler) -> RideArchive:
+    grace = float(os.environ.get("RIDES_ARCHIVE_AFTER", 3600))
+    if dh.archive is not None:      # creado al cargar el snapshot (RIDES_FAST_START)
+        dh.archive.grace = grace
+        return dh.archive
+    return RideArchive(dh, grace=grace)
+
+@app.get("/stats/archive", response_model=ArchiveStatsSchema)
+def archive_stats():
+    if not _archive_enabled():
+        raise HTTPException(status_code=404, detail="Archive disabled")
+    return _archive().stats()
+
+
+# --- Estadísticas -------------------------------------
+# Columnas NumPy del data_handler actual, reconstruidas a lo sumo cada
+# RIDES_STATS_MAX_AGE segundos cuando hubo cambios. analytics (y NumPy) se
+# importa con la primera consulta: no suma al arranque de cada worker.
+def _stats(report: str) -> list:
+    from src.models import analytics
+    columns = _attached_to_handler("analytics", lambda dh: analytics.Analytics(
+        dh, max_age=float(os.environ.get("RIDES_STATS_MAX_AGE", 5)))).columns()
+    return analytics.rows(getattr(analytics, report)(columns))
+
+@app.get("/stats/drivers", response_model=List[DriverStatsSchema])
+def driver_stats():
+    return _stats("occupancy_by_driver")
+
+@app.get("/stats/users", response_model=List[UserStatsSchema])
+def user_stats():
+    return _stats("missing_by_user")
+
+@app.get("/stats/hours", response_model=List[HourStatsSchema])
+def hour_stats():
+    return _stats("rides_by_hour")
+
+@app.get("/stats/destinations", response_model=List[DestinationStatsSchema])
+def destination_stats():
+    return _stats("utilization_by_destination")
+
+
+
+# --- Búsqueda por destino -----------------------------
+# Índice invertido (y grilla lat/lon) sobre los rides listos; con SQLite se
+# relee cada RIDES_SEARCH_MAX_AGE segundos (rides de otros workers).
+@app.get("/rides/search", response_model=List[RideMatchSchema])
+def search_rides(destination: str = "",
+                 lat: Optional[float] = Query(None, ge=-90, le=90), lon: Optional[float] = Query(None, ge=-180, le=180),
+                 radiusKm: float = Query(2.0, gt=0, le=50), seats: int = Query(1, ge=1),
+                 limit: int = Query(20, ge=1, le=100)):
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=422, detail="lat and lon go together")
+    if not destination.strip() and lat is None:
+        raise HTTPException(status_code=422, detail="destination or lat/lon required")
+    dh = data_handler
+    index = _attached_to_handler("destinations", lambda dh: DestinationIndex(
+        dh, max_age=float(os.environ.get("RIDES_SEARCH_MAX_AGE", 1))))
+    matches = index.search(destination, None if lat is None else (lat, lon), radiusKm, seats, limit)
+    encoded = ride_cache.get_many([ride for _, ride in matches], "listing", dh)
+    return Response(json_array(b'{"score":%s,"ride":%s}' % (json.dumps(round(score, 4)).encode(), ride)
+                               for (score, _), ride in zip(matches, encoded)),
+                    media_type="application/json")
+
+
+
+# --- Feed de cambios ---------------------------------
+# Server-Sent Events con un delta por cambio (joined, accepted, rejected,
+# started, ended, unloaded) en vez de volver a pedir el ride: uno por ride y
+# uno por usuario (sus rides como conductor o pasajero). Un evento "resync"
+# indica que el cliente se atrasó y debe volver a leer el estado.
+FEED_QUEUE = int(os.environ.get("RIDES_FEED_QUEUE", 256))
+FEED_KEEPALIVE = 15.0
+
+def _feed() -> ChangeFeed:
+    return _attached_to_handler("feed", lambda dh: ChangeFeed(dh, queue_size=FEED_QUEUE))
+
+def _event_stream(feed: ChangeFeed, subscription: Subscription) -> StreamingResponse:
+    async def frames():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                batch = await subscription.get(FEED_KEEPALIVE)
+                if batch is None:
+                    break
+                # comentario SSE si no hubo cambios: mantiene viva la conexión en los proxies
+                yield b"".join(batch) if batch else b": keepalive\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+    return StreamingResponse(frames(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/rides/{rideid}/events")
+def ride_events(rideid: int):
+    _ride_or_404(rideid)
+    feed = _feed()
+    return _event_stream(feed, feed.subscribe_ride(rideid))
+
+@app.get("/usuarios/{alias}/events")
+def user_events(alias: str):
+    _user_or_404(alias)
+    feed = _feed()
+    return _event_stream(feed, feed.subscribe_user(alias))
+
+
+
+# --- Shards -------------------------------------------
+# Solo en un proceso de src.sharding: lo que este shard sabe de varios
+# usuarios (perfil, si vive acá, tamaño del historial en sus rides), para que
+# el front arme los totales con un request por shard. Corre en el event loop
+# (solo lee memoria): los get_user de otros shards que esperan esta respuesta
+# ocupan hilos del pool, y si la respuesta también necesitara uno, dos shards
+# con el pool lleno se esperarían entre sí.
+@app.get("/_shard/users", include_in_schema=False)
+async def shard_users(alias: List[str] = Query([])):
+    if not isinstance(data_handler, ShardDataHandler):
+        raise HTTPException(status_code=404, detail="Not a shard")
+    return data_handler.local_users(alias)
+
+
+
+# --- Métricas ------------------------------------------
+# Texto de Prometheus: latencia por ruta, respuestas por código, requests en
+# curso, eventos de dominio y transiciones rechazadas, más la caché de rides,
+# el feed y las respuestas guardadas por Idempotency-Key.
+RIDE_CACHE = metrics.REGISTRY.gauge("ride_cache", "Ride JSON cache counters and size.", ("stat",))
+
+def _collect_cache():
+    for stat, value in ride_cache.stats().items():
+        RIDE_CACHE.set(stat, value=value)
+
+metrics.REGISTRY.on_collect(_collect_cache)
+
+FEED = metrics.REGISTRY.gauge("ride_feed", "Change feed subscribers, published events and lagged clients.",
+                              ("stat",))
+
+def _collect_feed():
+    feed = _attached.get("feed")
+    for stat, value in (feed.stats() if feed else {}).items():
+        FEED.set(stat, value=value)
+
+metrics.REGISTRY.on_collect(_collect_feed)
+
+IDEMPOTENCY = metrics.REGISTRY.gauge("idempotency_cache",
+                                     "Idempotency-Key replays, expirations, conflicts and cache size.", ("stat",))
+
+def _collect_idempotency():
+    for stat, value in idempotency_cache.stats().items():
+        IDEMPOTENCY.set(stat, value=value)
+
+metrics.REGISTRY.on_collect(_collect_idempotency)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    _attached_to_handler("domain_counters", metrics.DomainCounters)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# --- Perfilado ----------------------------------------
+# Spans de los caminos calientes (@profiled) en una fracción de los requests;
+# RIDES_PROFILE_SAMPLE=0.01 lo activa al arrancar. Sin activar las funciones
+# no están envueltas, así que no cuesta nada.
+def _profiled_owners():
+    return (DataHandler, Ride, User, RideJSONCache, sys.modules[__name__])
+
+@app.get("/admin/profile", response_model=ProfileSchema)
+def profile_dump(format: str = Query("json", pattern="^(json|folded)$")):
+    if format == "folded":
+        return PlainTextResponse(profiling.PROFILER.folded())
+    return profiling.PROFILER.stats()
+
+@app.put("/admin/profile", response_model=ProfileSchema)
+def profile_enable(sample: float = Query(..., ge=0, le=1)):
+    if sample == 0:
+        profiling.PROFILER.disable()
+    else:
+        profiling.PROFILER.enable(sample, _profiled_owners())
+    return profiling.PROFILER.stats()
+
+@app.delete("/admin/profile", response_model=ProfileSchema)
+def profile_reset():
+    profiling.PROFILER.reset()
+    return profiling.PROFILER.stats()
+
+if float(os.environ.get("RIDES_PROFILE_SAMPLE", 0)) > 0:
+    profiling.PROFILER.enable(float(os.environ["RIDES_PROFILE_SAMPLE"]), _profiled_owners())
+
 # --- SOMEONE COOKED HERE AND IT WAS ME, DIO!!! ---
\ No newline at end of file
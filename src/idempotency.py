@@ -0,0 +1,244 @@
+# src/idempotency.py
+# Idempotency-Key en los POST: la primera respuesta completa con una clave
+# se guarda y los reintentos con la misma clave la reciben tal cual, sin
+# volver a pasar por el handler (ni por el DataHandler). Así un POST /rides
+# reintentado no crea un ride duplicado y un requestToJoin reintentado no
+# termina en "Duplicate request".
+# Las entradas viven ttl segundos y la caché está acotada en bytes; como el
+# ttl es el mismo para todas, el orden de inserción es también el de
+# vencimiento y las vencidas se descartan desde el principio.
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+MAX_KEY_LENGTH = 255
+REPLAYED = (b"idempotent-replayed", b"true")
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body", "expires")
+
+    def __init__(self, fingerprint: bytes, status: int, headers: Headers, body: bytes, expires: float):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+
+
+# marca de una clave cuya primera request todavía se está atendiendo
+_PENDING = object()
+
+
+class IdempotencyCache:
+    """Completed responses by Idempotency-Key, for ``ttl`` seconds, bounded
+    to ``max_bytes`` of bodies (the oldest go first). ``max_bytes=0``
+    disables it: every request runs.
+
+    ``begin`` reserves a key for the request about to run; ``finish`` stores
+    its response (or ``abandon`` releases the key if it should not be kept)."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 24 * 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.conflicts = 0
+        self.mismatches = 0
+        self.size = 0
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._pending: Dict[str, bytes] = {}
+        self._owner = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def begin(self, key: str, fingerprint: bytes, owner: Hashable = None):
+        """None if the request should run (the key is now reserved), a
+        StoredResponse to replay, or ``"conflict"`` / ``"mismatch"`` when
+        the key is in use by a running request / a different request.
+
+        ``owner`` is the storage the responses came from: a new owner
+        empties the cache (they describe unrelated data)."""
+        with self._lock:
+            if owner is not self._owner:
+                self._clear()
+                self._owner = owner
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    if pending != fingerprint:
+                        self.mismatches += 1
+                        return "mismatch"
+                    self.conflicts += 1
+                    return "conflict"
+                self._pending[key] = fingerprint
+                self.misses += 1
+                return None
+            if entry.fingerprint != fingerprint:
+                self.mismatches += 1
+                return "mismatch"
+            self.hits += 1
+            return entry
+
+    def finish(self, key: str, status: int, headers: Headers, body: bytes):
+        with self._lock:
+            fingerprint = self._pending.pop(key, None)
+            if fingerprint is None or len(body) > self.max_bytes:
+                return
+            self._entries[key] = StoredResponse(fingerprint, status, headers, body, self.clock() + self.ttl)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+                self.evictions += 1
+
+    def abandon(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _expire(self):
+        now = self.clock()
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry.expires > now:
+                return
+            del entries[key]
+            self.size -= len(entry.body)
+            self.expired += 1
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired,
+                "evictions": self.evictions, "conflicts": self.conflicts, "mismatches": self.mismatches,
+                "inflight": len(self._pending), "entries": len(self._entries), "bytes": self.size,
+                "max_bytes": self.max_bytes}
+
+
+def fingerprint(scope, body: bytes) -> bytes:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware: POST requests with an ``Idempotency-Key`` header run
+    once; retries get the stored response with ``Idempotent-Replayed: true``.
+
+    The key must come with the same method, path, query and body: a
+    different request with a used key gets 422, and a retry while the first
+    one is still running gets 409. Responses with status 5xx are not kept,
+    so those can be retried. ``owner()`` returns the current storage."""
+
+    def __init__(self, app, cache: IdempotencyCache, owner: Optional[Callable[[], Hashable]] = None):
+        self.app = app
+        self.cache = cache
+        self.owner = owner or (lambda: None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope, b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            await _error(send, 400, "Invalid Idempotency-Key")
+            return
+
+        # el cuerpo entero, para la huella y para volver a entregárselo a la app
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return          # el cliente cortó antes de mandar el cuerpo
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        found = self.cache.begin(key, fingerprint(scope, body), self.owner())
+        if found == "conflict":
+            await _error(send, 409, "A request with this Idempotency-Key is in progress")
+            return
+        if found == "mismatch":
+            await _error(send, 422, "Idempotency-Key reused with a different request")
+            return
+        if found is not None:
+            await send({"type": "http.response.start", "status": found.status,
+                        "headers": found.headers + [REPLAYED]})
+            await send({"type": "http.response.body", "body": found.body})
+            return
+
+        delivered = False
+
+        async def replay_receive():
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status, headers, parts, size = 500, [], [], 0
+
+        async def capture(message):
+            nonlocal status, headers, size
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and size <= self.cache.max_bytes:
+                part = message.get("body", b"")
+                parts.append(part)
+                size += len(part)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture)
+        except BaseException:
+            self.cache.abandon(key)
+            raise
+        if status >= 500 or size > self.cache.max_bytes:
+            self.cache.abandon(key)
+        else:
+            self.cache.finish(key, status, headers, b"".join(parts))
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header, value in scope.get("headers", ()):
+        if header == name:
+            return value.decode("latin-1").strip()
+    return None
+
+
+async def _error(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,205 @@
+# src/metrics.py
+# Métricas del servicio en formato de texto de Prometheus: un registro
+# mínimo (contadores, gauges e histogramas con buckets fijos) y un
+# middleware ASGI que mide cada request por ruta. Todo es en memoria y por
+# proceso; cada operación es un lock sin contención y un par de sumas.
+from __future__ import annotations
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+Labels = Tuple[str, ...]
+
+# segundos; cubre desde lecturas cacheadas hasta los listados completos
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # por etiquetas: [cuenta por bucket (+Inf al final), suma]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, *labels: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {repr(total)}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), **options) -> Histogram:
+        return self.register(Histogram(name, help, labels, **options))
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Run ``collector()`` before each render (gauges read from other subsystems)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "Request latency by route.",
+                                     ("method", "route"))
+RESPONSES = REGISTRY.counter("http_responses_total", "Responses by route and status code.",
+                             ("method", "route", "status"))
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests being served.")
+RIDE_EVENTS = REGISTRY.counter("ride_events_total", "Domain events (joined, accepted, started, ...).",
+                               ("event",))
+TRANSITION_ERRORS = REGISTRY.counter("ride_transition_errors_total",
+                                     "Transitions refused by the model (ValueError), by action.", ("action",))
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latency histogram, status counter and in-flight gauge.
+
+    Requests are labeled with the route template (``/usuarios/{alias}``),
+    not the raw path, so the number of series stays bounded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - began
+            IN_FLIGHT.dec()
+            route = scope.get("route")      # lo deja el router de Starlette
+            path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.observe(scope["method"], path, value=elapsed)
+            RESPONSES.inc(scope["method"], path, str(status))
+
+
+class DomainCounters:
+    """Counts the domain events of a storage into ``ride_events_total``."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        storage.subscribe(self._on_event)
+
+    def _on_event(self, event: str, subject, participation):
+        RIDE_EVENTS.inc(event)
+
+    def close(self):
+        self.storage.unsubscribe(self._on_event)
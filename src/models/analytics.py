@@ -0,0 +1,188 @@
+# src/models/analytics.py
+# Estadísticas de flota sobre columnas NumPy: el estado de rides y
+# participaciones se exporta a arrays (un valor por fila, textos
+# codificados como enteros) y cada estadística es un group-by vectorizado
+# con np.bincount, sin recorrer objetos en Python.
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from .ride import Ride, RideStatus, OCCUPYING
+from .ride_participation import STATUS_CODES, STATUSES, RPStatus, as_datetime
+from .storage import Storage
+
+RIDE_STATUSES = tuple(RideStatus)
+_RIDE_STATUS_CODES = {status: code for code, status in enumerate(RIDE_STATUSES)}
+# tabla código de estado -> ocupa asiento
+_OCCUPIES = np.array([status in OCCUPYING for status in STATUSES])
+_MISSING = STATUS_CODES[RPStatus.missing]
+_READY = _RIDE_STATUS_CODES[RideStatus.ready]
+
+
+@dataclass
+class RideColumns:
+    """Columnar export of rides (``ride_*``) and participations (``part_*``).
+
+    ``ride_driver``, ``ride_destination`` and ``part_user`` are codes into
+    ``drivers``, ``destinations`` and ``users``; ``part_ride`` is the row of
+    the participation's ride."""
+
+    drivers: List[str]
+    destinations: List[str]
+    users: List[str]
+    ride_id: np.ndarray           # int64
+    ride_driver: np.ndarray       # int32
+    ride_destination: np.ndarray  # int32
+    ride_hour: np.ndarray         # int8, hora del día de salida
+    ride_seats: np.ndarray        # int32, asientos ofrecidos
+    ride_status: np.ndarray       # int8, índice en RIDE_STATUSES
+    part_ride: np.ndarray         # int32
+    part_user: np.ndarray         # int32
+    part_status: np.ndarray       # int8, índice en STATUSES
+    part_seats: np.ndarray        # int32
+
+    @classmethod
+    def from_rides(cls, rides: Iterable[Ride], records: Iterable[dict] = ()) -> "RideColumns":
+        """``records`` are archived rides as dicts (``RideArchive.records``),
+        read without building Ride objects; ids already in ``rides`` are
+        skipped (a ride is archived before it leaves memory)."""
+        drivers: Dict[str, int] = {}
+        destinations: Dict[str, int] = {}
+        users: Dict[str, int] = {}
+        ride_id, ride_driver, ride_destination, ride_hour, ride_seats, ride_status = [], [], [], [], [], []
+        part_ride, part_user, part_status, part_seats = [], [], [], []
+        for row, ride in enumerate(rides):
+            ride_id.append(ride.id)
+            ride_driver.append(drivers.setdefault(ride.ride_driver, len(drivers)))
+            ride_destination.append(destinations.setdefault(ride.final_address, len(destinations)))
+            ride_hour.append(ride.ride_date_and_time.hour)
+            ride_seats.append(ride.allowed_spaces)
+            ride_status.append(_RIDE_STATUS_CODES[ride.status])
+            for p in ride.participants:
+                part_ride.append(row)
+                part_user.append(users.setdefault(p.participant_alias, len(users)))
+                part_status.append(p.status_id)
+                part_seats.append(p.occupied_spaces)
+        hot = set(ride_id)
+        for record in records:
+            if record["id"] in hot:
+                continue
+            row = len(ride_id)
+            ride_id.append(record["id"])
+            ride_driver.append(drivers.setdefault(record["ride_driver"], len(drivers)))
+            ride_destination.append(destinations.setdefault(record["final_address"], len(destinations)))
+            ride_hour.append(as_datetime(record["ride_date_and_time"]).hour)
+            ride_seats.append(record["allowed_spaces"])
+            ride_status.append(_RIDE_STATUS_CODES[record["status"]])
+            for p in record["participants"]:
+                part_ride.append(row)
+                part_user.append(users.setdefault(p["participant_alias"], len(users)))
+                part_status.append(STATUS_CODES[p["status"]])
+                part_seats.append(p["occupied_spaces"])
+        return cls(
+            drivers=list(drivers), destinations=list(destinations), users=list(users),
+            ride_id=np.array(ride_id, dtype=np.int64),
+            ride_driver=np.array(ride_driver, dtype=np.int32),
+            ride_destination=np.array(ride_destination, dtype=np.int32),
+            ride_hour=np.array(ride_hour, dtype=np.int8),
+            ride_seats=np.array(ride_seats, dtype=np.int32),
+            ride_status=np.array(ride_status, dtype=np.int8),
+            part_ride=np.array(part_ride, dtype=np.int32),
+            part_user=np.array(part_user, dtype=np.int32),
+            part_status=np.array(part_status, dtype=np.int8),
+            part_seats=np.array(part_seats, dtype=np.int32),
+        )
+
+    def occupied_per_ride(self) -> np.ndarray:
+        seats = np.where(_OCCUPIES[self.part_status], self.part_seats, 0)
+        return np.bincount(self.part_ride, weights=seats, minlength=len(self.ride_id))
+
+
+# ---------- agregaciones (cada una devuelve columnas con los nombres de su esquema) ----------
+def _rate(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+def _seat_usage(cols: RideColumns, groups: np.ndarray, size: int) -> Dict[str, np.ndarray]:
+    offered = np.bincount(groups, weights=cols.ride_seats, minlength=size)
+    occupied = np.bincount(groups, weights=cols.occupied_per_ride(), minlength=size)
+    return {"rides": np.bincount(groups, minlength=size), "seatsOffered": offered.astype(np.int64),
+            "seatsOccupied": occupied.astype(np.int64), "rate": _rate(occupied, offered)}
+
+
+def occupancy_by_driver(cols: RideColumns) -> Dict[str, object]:
+    """Seats occupied over seats offered, per driver."""
+    usage = _seat_usage(cols, cols.ride_driver, len(cols.drivers))
+    return {"driver": cols.drivers, "rides": usage["rides"], "seatsOffered": usage["seatsOffered"],
+            "seatsOccupied": usage["seatsOccupied"], "occupancyRate": usage["rate"]}
+
+
+def utilization_by_destination(cols: RideColumns) -> Dict[str, object]:
+    """Seats occupied over seats offered, per ride destination."""
+    usage = _seat_usage(cols, cols.ride_destination, len(cols.destinations))
+    return {"destination": cols.destinations, "rides": usage["rides"], "seatsOffered": usage["seatsOffered"],
+            "seatsOccupied": usage["seatsOccupied"], "utilization": usage["rate"]}
+
+
+def missing_by_user(cols: RideColumns) -> Dict[str, object]:
+    """No-show rate per user, over their participations in rides that already started."""
+    started = cols.ride_status[cols.part_ride] != _READY
+    size = len(cols.users)
+    total = np.bincount(cols.part_user, weights=started, minlength=size)
+    missing = np.bincount(cols.part_user, weights=started & (cols.part_status == _MISSING), minlength=size)
+    return {"alias": cols.users, "participations": total.astype(np.int64), "missing": missing.astype(np.int64),
+            "missingRate": _rate(missing, total)}
+
+
+def rides_by_hour(cols: RideColumns) -> Dict[str, object]:
+    """Rides departing at each hour of the day."""
+    return {"hour": np.arange(24), "rides": np.bincount(cols.ride_hour, minlength=24)}
+
+
+def rows(table: Dict[str, object]) -> List[dict]:
+    """Columns -> list of records with plain Python values."""
+    columns = {name: values.tolist() if isinstance(values, np.ndarray) else values
+               for name, values in table.items()}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+# ---------- columnas cacheadas ----------
+class Analytics:
+    """Keeps the columns of a storage, rebuilt on demand.
+
+    Domain events mark them stale; a stale export is rebuilt at most once
+    every ``max_age`` seconds. Backends shared with other processes
+    (``storage.shared``) are also re-read after ``max_age``. Rides moved
+    to the storage's archive keep counting."""
+
+    def __init__(self, storage: Storage, max_age: float = 5.0):
+        self.storage = storage
+        self.max_age = max_age
+        self.rebuilds = 0
+        self._columns: RideColumns | None = None
+        self._built_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        storage.subscribe(self._on_event)
+
+    def _on_event(self, event: str, subject, participation):
+        self._stale = True
+
+    def columns(self) -> RideColumns:
+        with self._lock:    # una sola reconstrucción a la vez
+            expired = time.monotonic() - self._built_at >= self.max_age
+            if self._columns is None or (expired and (self._stale or self.storage.shared)):
+                self._stale = False
+                rides = list(self.storage.rides)    # antes que el archivo: ver from_rides
+                archive = getattr(self.storage, "archive", None)
+                self._columns = RideColumns.from_rides(rides, archive.records() if archive is not None else ())
+                self._built_at = time.monotonic()
+                self.rebuilds += 1
+            return self._columns
+
+    def close(self):
+        self.storage.unsubscribe(self._on_event)
@@ -0,0 +1,243 @@
+# src/models/archive.py
+# Archivo de rides terminados: después de un período de gracia los rides en
+# done salen de los índices del DataHandler (que quedan solo con lo activo) y
+# pasan a bloques JSON comprimidos con zlib. get_ride y rides_of_user los
+# siguen encontrando: se descomprime solo el bloque que hace falta.
+from __future__ import annotations
+import json
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .data_handler import DataHandler
+from .records import ride_from_dict, ride_to_dict
+from .ride import Ride, RideStatus
+from .ride_participation import RPStatus
+
+# ids recientes que se juntan antes de fundirlos en el índice ordenado
+_MERGE_EVERY = 65_536
+
+
+class ArchivedEntry:
+    """Stand-in for an archived ride (or participation) in ``User.rides``.
+
+    Finished rides never change again, so it only keeps what the user stats
+    and snapshots need."""
+
+    __slots__ = ("ride_id", "alias", "status")
+
+    def __init__(self, ride_id: int, alias: Optional[str], status: RideStatus | RPStatus):
+        self.ride_id = ride_id
+        self.alias = alias          # None si es el ride que conduce el usuario
+        self.status = status
+
+    def subscribe(self, listener: Callable):
+        pass
+
+    def unsubscribe(self, listener: Callable):
+        pass
+
+
+class RideArchive:
+    """Cold storage for the ``done`` rides of a :class:`DataHandler`.
+
+    Rides that end are archived ``grace`` seconds later (rides already done
+    when the archive is attached go at the first sweep), ``batch_size`` at a
+    time, by a background thread (``start``) or by calling ``sweep``.
+    Archived rides come back from ``get_ride`` as detached copies.
+
+    ``preload`` takes finished rides straight from a snapshot as records;
+    they are encoded into blocks later by ``warm``, one group of ids at a time."""
+
+    def __init__(self, data_handler: DataHandler, grace: float = 3600.0, block_size: int = 64,
+                 batch_size: int = 10_000, interval: float = 5.0, cached_blocks: int = 16,
+                 clock: Callable[[], float] = time.monotonic):
+        self.storage = data_handler
+        self.grace = grace
+        self.block_size = block_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.clock = clock
+        self.archived = 0
+        self.compressed_bytes = 0
+        self._blocks: List[bytes] = []
+        self._open: List[bytes] = []            # líneas JSON del bloque que se está llenando
+        # id -> bloque * block_size + posición: arrays ordenados más un dict de recientes
+        self._ids = array("q")
+        self._locations = array("q")
+        self._recent: Dict[int, int] = {}
+        self._decoded: "OrderedDict[int, List[bytes]]" = OrderedDict()
+        self._cached_blocks = cached_blocks
+        # rides de un snapshot que todavía no se codificaron: id -> dict, por grupos
+        self._unencoded: Dict[int, dict] = {}
+        self._warm_queue: deque = deque()
+        self._queue: deque = deque((0.0, ride.id) for ride in data_handler.rides_with_status(RideStatus.done))
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        data_handler.archive = self
+        data_handler.subscribe(self._on_event)
+
+    def __len__(self) -> int:
+        return self.archived
+
+    def _on_event(self, event: str, subject, participation):
+        if event == "ended":
+            self._queue.append((self.clock() + self.grace, subject.id))
+
+    # ---------- escritura ----------
+    def sweep(self) -> int:
+        """Archive up to ``batch_size`` rides whose grace period is over."""
+        now = self.clock()
+        due = []
+        while self._queue and self._queue[0][0] <= now and len(due) < self.batch_size:
+            due.append(self._queue.popleft()[1])
+        rides = [ride for ride in map(self.storage.loaded_ride, due)
+                 if ride is not None and ride.status is RideStatus.done]
+        if not rides:
+            return 0
+        with self._lock:
+            for ride in rides:
+                self._append(ride)
+        # primero al archivo y después fuera de memoria: get_ride nunca se queda sin respuesta
+        evicted = self.storage.evict_rides([ride.id for ride in rides])
+        self._archive_histories(evicted)
+        return len(evicted)
+
+    def _append(self, ride: Ride):
+        self.archived += 1
+        self._store(ride.id, ride_to_dict(ride))
+
+    def _store(self, rideid: int, record: dict):
+        location = len(self._blocks) * self.block_size + len(self._open)
+        self._open.append(json.dumps(record, separators=(",", ":")).encode())
+        self._recent[rideid] = location
+        if len(self._open) == self.block_size:
+            block = zlib.compress(b"\n".join(self._open))
+            self._blocks.append(block)
+            self.compressed_bytes += len(block)
+            self._open = []
+        if len(self._recent) >= _MERGE_EVERY:
+            self._merge_recent()
+
+    def _merge_recent(self):
+        merged = sorted([*zip(self._ids, self._locations), *self._recent.items()])
+        self._ids = array("q", (rideid for rideid, _ in merged))
+        self._locations = array("q", (location for _, location in merged))
+        self._recent = {}
+
+    def _archive_histories(self, rides: List[Ride]):
+        # User.rides guardaba los objetos: se cambian por ArchivedEntry para liberarlos
+        stand_ins: Dict[str, Dict[int, ArchivedEntry]] = {}
+        for ride in rides:
+            stand_ins.setdefault(ride.ride_driver, {})[id(ride)] = ArchivedEntry(ride.id, None, ride.status)
+            for p in ride.participants:
+                stand_ins.setdefault(p.participant_alias, {})[id(p)] = ArchivedEntry(
+                    ride.id, p.participant_alias, p.status)
+        for alias, replacements in stand_ins.items():
+            user = self.storage.get_user(alias)
+            if user is not None:
+                user.replace_history(replacements)
+
+    # ---------- carga de un snapshot ----------
+    def preload(self, records: Iterable[dict], groups: int = 64):
+        """Archive finished rides given as their dicts, without building them.
+
+        Until ``warm`` encodes them (``groups`` batches by ``id % groups``)
+        they are served from the dicts; user histories are up to the caller
+        (ArchivedEntry stand-ins, see persistence.load_state)."""
+        batches: Dict[int, List[int]] = {}
+        with self._lock:
+            for record in records:
+                rideid = record["id"]
+                self._unencoded[rideid] = record
+                self.storage.index_archived(rideid, {record["ride_driver"],
+                                                     *(p["participant_alias"] for p in record["participants"])})
+                batches.setdefault(rideid % groups, []).append(rideid)
+                self.archived += 1
+            self._warm_queue.extend(batches.values())
+
+    def warm(self) -> int:
+        """Encode the next batch of preloaded rides into blocks; returns how many."""
+        with self._lock:
+            if not self._warm_queue:
+                return 0
+            batch = self._warm_queue.popleft()
+            for rideid in batch:
+                self._store(rideid, self._unencoded.pop(rideid))
+        return len(batch)
+
+    # ---------- lectura ----------
+    def _location(self, rideid: int) -> Optional[int]:
+        location = self._recent.get(rideid)
+        if location is None:
+            i = bisect_left(self._ids, rideid)
+            if i < len(self._ids) and self._ids[i] == rideid:
+                location = self._locations[i]
+        return location
+
+    def _line(self, location: int) -> bytes:
+        block, position = divmod(location, self.block_size)
+        if block == len(self._blocks):
+            return self._open[position]
+        lines = self._decoded.get(block)
+        if lines is None:
+            lines = self._decoded[block] = zlib.decompress(self._blocks[block]).split(b"\n")
+            if len(self._decoded) > self._cached_blocks:
+                self._decoded.popitem(last=False)
+        else:
+            self._decoded.move_to_end(block)
+        return lines[position]
+
+    def get(self, rideid: int) -> Optional[Ride]:
+        with self._lock:
+            record = self._unencoded.get(rideid)
+            if record is not None:
+                return ride_from_dict(record)
+            location = self._location(rideid)
+            if location is None:
+                return None
+            line = self._line(location)
+        return ride_from_dict(json.loads(line))
+
+    def records(self) -> Iterator[dict]:
+        """Every archived ride as its dict (for snapshots)."""
+        with self._lock:
+            blocks, current, unencoded = list(self._blocks), list(self._open), list(self._unencoded.values())
+        for block in blocks:
+            for line in zlib.decompress(block).split(b"\n"):
+                yield json.loads(line)
+        for line in current:
+            yield json.loads(line)
+        yield from unencoded
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"archived": self.archived, "pending": len(self._queue), "blocks": len(self._blocks),
+                    "compressedBytes": self.compressed_bytes, "hotRides": len(self.storage.rides),
+                    "unencoded": len(self._unencoded)}
+
+    # ---------- hilo ----------
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ride-archive", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # primero lo que quedó del snapshot, de a un grupo por vuelta
+            warmed = self.warm()
+            if self.sweep() < self.batch_size and not warmed:
+                self._stop.wait(self.interval)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.storage.unsubscribe(self._on_event)
@@ -0,0 +1,31 @@
+# src/models/async_storage.py
+# Interfaz async sobre cualquier Storage. Los backends que no bloquean (el
+# DataHandler en memoria sin persistencia) se llaman directamente desde el
+# event loop; los que hacen I/O (SQLite, o un DataHandler con Persistence,
+# que escribe snapshots) se delegan a un hilo para no frenar el loop.
+from __future__ import annotations
+from functools import partial
+from typing import Callable, TypeVar
+
+import anyio.to_thread
+
+from .storage import Storage
+
+T = TypeVar("T")
+
+
+class AsyncStorage:
+    """Awaitable view of a :class:`Storage`.
+
+    ``run(fn, ...)`` executes a whole synchronous operation (lookups plus a
+    mutation of one entity) in one step: inline for non-blocking backends, in
+    a worker thread otherwise."""
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self.inline = not storage.blocking
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        if self.inline:
+            return fn(*args, **kwargs)
+        return await anyio.to_thread.run_sync(partial(fn, *args, **kwargs))
@@ -0,0 +1,115 @@
+# src/models/concurrency.py
+# Primitivas de concurrencia: los handlers síncronos de FastAPI corren en un
+# pool de hilos, así que las mutaciones de un mismo ride se serializan con un
+# lock propio de ese ride (sin lock global) y los ids se reservan atómicamente.
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable
+
+
+class KeyedLocks:
+    """One re-entrant lock per key, created on first use."""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, threading.RLock] = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, key: Hashable) -> threading.RLock:
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(key, threading.RLock())
+        return lock
+
+    def discard(self, key: Hashable):
+        """Forget the lock of a key that will not be mutated again."""
+        with self._guard:
+            self._locks.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class MutationGate:
+    """Shared / exclusive gate: mutations pass it shared, a snapshot takes
+    it exclusive and waits until no mutation is halfway (state changed but
+    its event not logged yet).
+
+    Re-entrant per thread, and the exclusive holder may itself be inside a
+    shared section (a snapshot triggered by an event). Take it after the
+    ride lock: whoever waits for a ride lock must not hold the gate."""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._cond = threading.Condition(self._mutex)
+        self._active = 0
+        self._exclusive: int | None = None
+        self._local = threading.local()
+
+    def enter(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            with self._mutex:
+                while self._exclusive is not None:
+                    self._cond.wait()
+                self._active += 1
+        local.depth = depth + 1
+
+    def leave(self):
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0:
+            with self._mutex:
+                self._active -= 1
+                if self._exclusive is not None:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def shared(self):
+        self.enter()
+        try:
+            yield
+        finally:
+            self.leave()
+
+    @contextmanager
+    def exclusive(self):
+        own = 1 if getattr(self._local, "depth", 0) else 0
+        with self._cond:
+            while self._exclusive is not None:
+                self._cond.wait()
+            self._exclusive = threading.get_ident()
+            while self._active > own:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = None
+                self._cond.notify_all()
+
+
+class GatedLock:
+    """A ride lock followed by the shared side of a MutationGate, in that order."""
+    __slots__ = ("_lock", "_gate")
+
+    def __init__(self, lock: threading.RLock, gate: MutationGate):
+        self._lock = lock
+        self._gate = gate
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._gate.enter()
+        except BaseException:
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._gate.leave()
+        finally:
+            self._lock.release()
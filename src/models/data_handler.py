@@ -1,29 +1,313 @@
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass, field
-from typing import List, Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, ClassVar, ContextManager, Dict, Iterable, List, Optional, Tuple
 from .user import User
-from .ride import Ride
+from .ride import Ride, RideStatus
+from .ride_participation import RideParticipation
+from .storage import Storage, departure_key
+from .concurrency import GatedLock, KeyedLocks, MutationGate
+from .profiling import profiled
+
+if TYPE_CHECKING:
+    from .archive import RideArchive
 
 @dataclass
-class DataHandler:
+class DataHandler(Storage):
     users: List[User] = field(default_factory=list)
     rides: List[Ride] = field(default_factory=list)
     next_ride_id: int = 1
+    # todo en memoria: se puede llamar desde el event loop
+    blocking: ClassVar[bool] = False
+    # ---------- índices (alias -> User, id -> Ride) ----------
+    _users_by_alias: Dict[str, User] = field(default_factory=dict, init=False, repr=False)
+    _rides_by_id: Dict[int, Ride] = field(default_factory=dict, init=False, repr=False)
+    # alias -> posición en self.users (cursor de las páginas de usuarios)
+    _user_positions: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    # ---------- ids ordenados (páginas por id con bisect) ----------
+    _ride_ids: List[int] = field(default_factory=list, init=False, repr=False)
+    _ride_ids_by_status: Dict[RideStatus, List[int]] = field(default_factory=dict, init=False, repr=False)
+    # alias -> ids de los rides que conduce o integra, archivados incluidos
+    _ride_ids_by_user: Dict[str, List[int]] = field(default_factory=dict, init=False, repr=False)
+    # índice temporal: (salida, id) ordenados, consultas por ventana en O(log n + k)
+    _departures: List[Tuple[datetime, int]] = field(default_factory=list, init=False, repr=False)
+    # ---------- índices secundarios (clave -> {id: Ride}) ----------
+    # los dict internos hacen de "set ordenado": conservan el orden de inserción
+    _rides_by_driver: Dict[str, Dict[int, Ride]] = field(default_factory=dict, init=False, repr=False)
+    _rides_by_participant: Dict[str, Dict[int, Ride]] = field(default_factory=dict, init=False, repr=False)
+    _indexed_status: Dict[int, RideStatus] = field(default_factory=dict, init=False, repr=False)
+    # suscriptores a los eventos de dominio (p.ej. el log de persistencia)
+    _listeners: List[Callable] = field(default_factory=list, init=False, repr=False)
+    # ---------- concurrencia ----------
+    _ride_locks: KeyedLocks = field(default_factory=KeyedLocks, init=False, repr=False)
+    _id_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    # altas, cambios de estado y desalojos de los índices ordenados
+    _index_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    # mutaciones (ride_lock, altas) contra snapshots consistentes (ver quiesced)
+    _gate: MutationGate = field(default_factory=MutationGate, init=False, repr=False)
+    # rides terminados que salieron de memoria (ver archive.RideArchive)
+    archive: Optional["RideArchive"] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        # las listas recibidas en el constructor también quedan indexadas
+        for position, user in enumerate(self.users):
+            self._users_by_alias[user.alias] = user
+            self._user_positions[user.alias] = position
+        self._index_rides(self.rides)
 
+    @profiled("data_handler.get_user")
     def get_user(self, alias: str) -> Optional[User]:
-        for user in self.users:
-            if user.alias == alias:
-                return user
-        return None
+        return self._users_by_alias.get(alias)
 
+    @profiled("data_handler.get_ride")
     def get_ride(self, rideid: int) -> Optional[Ride]:
-        for ride in self.rides:
-            if ride.id == rideid:
-                return ride
-        return None
+        ride = self._rides_by_id.get(rideid)
+        if ride is None and self.archive is not None:
+            return self.archive.get(rideid)
+        return ride
+
+    def loaded_ride(self, rideid: int) -> Optional[Ride]:
+        """The ride if it is in memory (``get_ride`` also looks in the archive)."""
+        return self._rides_by_id.get(rideid)
 
     def add_user(self, user: User):
-        self.users.append(user)
+        with self._gate.shared():
+            if user.alias in self._users_by_alias:
+                raise ValueError("User already exists")
+            self._user_positions[user.alias] = len(self.users)
+            self.users.append(user)
+            self._users_by_alias[user.alias] = user
+            self._emit("user_created", user)
 
     def add_ride(self, ride: Ride):
-        self.rides.append(ride)
-        self.next_ride_id += 1 
\ No newline at end of file
+        with self._gate.shared():
+            if ride.id in self._rides_by_id:
+                raise ValueError("Ride already exists")
+            with self._index_lock:
+                self.rides.append(ride)
+                self._index_ride(ride)
+            with self._id_lock:
+                self.next_ride_id = max(self.next_ride_id, ride.id + 1)
+            driver = self.get_user(ride.ride_driver)
+            if driver:
+                driver.add_ride(ride)  # historial del conductor
+            self._emit("ride_created", ride)
+
+    def allocate_ride_id(self) -> int:
+        with self._id_lock:
+            rideid = self.next_ride_id
+            self.next_ride_id += 1
+        return rideid
+
+    def ride_lock(self, rideid: int) -> GatedLock:
+        # primero el lock del ride: quien espera uno no retiene el gate
+        return GatedLock(self._ride_locks(rideid), self._gate)
+
+    def quiesced(self) -> ContextManager[None]:
+        """Hold off mutations made under ``ride_lock`` or through
+        ``add_user`` / ``add_ride``, waiting for the ones in progress to
+        finish (their events included): what a consistent snapshot needs."""
+        return self._gate.exclusive()
+
+    # ---------- eventos ----------
+    def subscribe(self, listener: Callable[[str, object, Optional[RideParticipation]], None]):
+        """Register ``listener(event, subject, participation)``.
+
+        ``subject`` is the User for ``user_created`` and the Ride for
+        ``ride_created`` and every Ride event (joined, accepted, ...)."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable):
+        self._listeners.remove(listener)
+
+    def _emit(self, event: str, subject, participation: Optional[RideParticipation] = None):
+        for listener in self._listeners:
+            listener(event, subject, participation)
+
+    # ---------- consultas por índice secundario ----------
+    @profiled("data_handler.rides_with_status")
+    def rides_with_status(self, status: RideStatus | str) -> List[Ride]:
+        try:
+            status = RideStatus(status)
+        except ValueError:
+            return []
+        by_id = self._rides_by_id
+        return [by_id[rideid] for rideid in self._ride_ids_by_status.get(status, ())]
+
+    def rides_driven_by(self, alias: str) -> List[Ride]:
+        return list(self._rides_by_driver.get(alias, {}).values())
+
+    def rides_joined_by(self, alias: str) -> List[Ride]:
+        return list(self._rides_by_participant.get(alias, {}).values())
+
+    def rides_of_user(self, alias: str) -> List[Ride]:
+        return self.rides_of_user_page(alias)
+
+    # ---------- páginas ----------
+    @profiled("data_handler.users_page")
+    def users_page(self, after: Optional[str] = None, limit: Optional[int] = None) -> List[User]:
+        start = 0
+        if after is not None:
+            if after not in self._user_positions:
+                return []
+            start = self._user_positions[after] + 1
+        return self.users[start:] if limit is None else self.users[start:start + limit]
+
+    @profiled("data_handler.rides_page")
+    def rides_page(self, after: Optional[int] = None, limit: Optional[int] = None,
+                   status: RideStatus | str | None = None) -> List[Ride]:
+        if status is None:
+            ids = self._ride_ids
+        else:
+            try:
+                ids = self._ride_ids_by_status.get(RideStatus(status), [])
+            except ValueError:
+                return []
+        start = 0 if after is None else bisect_right(ids, after)
+        by_id = self._rides_by_id
+        return [by_id[rideid] for rideid in (ids[start:] if limit is None else ids[start:start + limit])]
+
+    @profiled("data_handler.rides_of_user_page")
+    def rides_of_user_page(self, alias: str, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Ride]:
+        # ids en memoria y archivados; solo se cargan los de la página
+        ids = self._ride_ids_by_user.get(alias, [])
+        start = 0 if after is None else bisect_right(ids, after)
+        rides = (self.get_ride(rideid) for rideid in (ids[start:] if limit is None else ids[start:start + limit]))
+        return [ride for ride in rides if ride is not None]
+
+    @profiled("data_handler.rides_between")
+    def rides_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      after: Optional[Tuple[datetime, int]] = None, limit: Optional[int] = None,
+                      status: RideStatus | str | None = None) -> List[Ride]:
+        if status is not None:
+            try:
+                status = RideStatus(status)
+            except ValueError:
+                return []
+        index = self._departures
+        lo = 0 if start is None else bisect_left(index, (start,))
+        if after is not None:
+            lo = max(lo, bisect_right(index, after))
+        hi = len(index) if end is None else bisect_right(index, (end, math.inf))
+        by_id = self._rides_by_id
+        if status is None:
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [by_id[rideid] for _, rideid in index[lo:hi]]
+        rides = []
+        for i in range(lo, hi):
+            ride = by_id[index[i][1]]
+            if ride.status is status:
+                rides.append(ride)
+                if len(rides) == limit:
+                    break
+        return rides
+
+    # ---------- mantenimiento de índices ----------
+    def _index_rides(self, rides: List[Ride]):
+        # carga inicial (snapshots): los índices ordenados se arman con un
+        # solo sort en vez de un insort por ride
+        ride_ids, departures = [], []
+        for ride in rides:
+            self._rides_by_id[ride.id] = ride
+            ride_ids.append(ride.id)
+            departures.append(departure_key(ride))
+            self._ride_ids_by_status.setdefault(ride.status, []).append(ride.id)
+            self._indexed_status[ride.id] = ride.status
+            self._rides_by_driver.setdefault(ride.ride_driver, {})[ride.id] = ride
+            self._index_user_ride(ride.ride_driver, ride.id)
+            for p in ride.participants:
+                self._index_participant(ride, p)
+            ride.subscribe(self._on_ride_event)
+        self._ride_ids = sorted(self._ride_ids + ride_ids)
+        self._departures = sorted(self._departures + departures)
+        for ids in self._ride_ids_by_status.values():
+            ids.sort()
+
+    def _index_ride(self, ride: Ride):
+        self._rides_by_id[ride.id] = ride
+        _insert_sorted(self._ride_ids, ride.id)
+        _insert_sorted(self._departures, departure_key(ride))
+        _insert_sorted(self._ride_ids_by_status.setdefault(ride.status, []), ride.id)
+        self._indexed_status[ride.id] = ride.status
+        self._rides_by_driver.setdefault(ride.ride_driver, {})[ride.id] = ride
+        self._index_user_ride(ride.ride_driver, ride.id)
+        for p in ride.participants:
+            self._index_participant(ride, p)
+        ride.subscribe(self._on_ride_event)
+
+    def _index_participant(self, ride: Ride, participation: RideParticipation):
+        self._rides_by_participant.setdefault(participation.participant_alias, {})[ride.id] = ride
+        self._index_user_ride(participation.participant_alias, ride.id)
+
+    def _index_user_ride(self, alias: str, rideid: int):
+        ids = self._ride_ids_by_user.setdefault(alias, [])
+        i = len(ids) if not ids or ids[-1] < rideid else bisect_left(ids, rideid)
+        if i == len(ids) or ids[i] != rideid:    # conductor y pasajero a la vez: una sola vez
+            ids.insert(i, rideid)
+
+    def index_archived(self, rideid: int, aliases: Iterable[str]):
+        """Add a ride that goes to ``archive`` without being loaded (see
+        ``RideArchive.preload``) to the ride pages of ``aliases``."""
+        with self._index_lock:
+            for alias in aliases:
+                self._index_user_ride(alias, rideid)
+
+    def _on_ride_event(self, ride: Ride, event: str, participation: Optional[RideParticipation]):
+        if event == "joined":
+            with self._index_lock:
+                self._index_participant(ride, participation)
+            user = self.get_user(participation.participant_alias)
+            if user:
+                user.add_ride(participation)  # historial del participante
+        if ride.status is not self._indexed_status[ride.id]:
+            with self._index_lock:
+                ids = self._ride_ids_by_status[self._indexed_status[ride.id]]
+                del ids[bisect_left(ids, ride.id)]
+                _insert_sorted(self._ride_ids_by_status.setdefault(ride.status, []), ride.id)
+                self._indexed_status[ride.id] = ride.status
+        self._emit(event, ride, participation)
+
+    # ---------- desalojo (archivo) ----------
+    def evict_rides(self, rideids: Iterable[int]) -> List[Ride]:
+        """Drop rides from memory and from every index; returns the removed rides.
+
+        Meant for finished rides already copied to ``archive``: one pass
+        over each index per call, so evict in batches. The ride pages of
+        each user keep the ids, since the archive still serves them."""
+        with self._index_lock:
+            evicted = [self._rides_by_id.pop(rideid) for rideid in rideids if rideid in self._rides_by_id]
+            gone = {ride.id for ride in evicted}
+            if not gone:
+                return []
+            # listas nuevas en vez de borrar en el lugar: los lectores en curso siguen con las viejas
+            self.rides = [r for r in self.rides if r.id not in gone]
+            self._ride_ids = [i for i in self._ride_ids if i not in gone]
+            self._departures = [key for key in self._departures if key[1] not in gone]
+            for status in {self._indexed_status.pop(rideid) for rideid in gone}:
+                self._ride_ids_by_status[status] = [i for i in self._ride_ids_by_status[status] if i not in gone]
+            for ride in evicted:
+                _discard(self._rides_by_driver, ride.ride_driver, ride.id)
+                for p in ride.participants:
+                    _discard(self._rides_by_participant, p.participant_alias, ride.id)
+                ride.unsubscribe(self._on_ride_event)
+        return evicted
+
+
+def _discard(index: Dict[str, Dict[int, Ride]], key: str, rideid: int):
+    rides = index.get(key)
+    if rides is not None:
+        rides.pop(rideid, None)
+        if not rides:
+            del index[key]
+
+
+def _insert_sorted(ids: list, key):
+    # las claves nuevas suelen ser las mayores: append sin búsqueda
+    if not ids or ids[-1] < key:
+        ids.append(key)
+    else:
+        insort(ids, key)
@@ -0,0 +1,186 @@
+# src/models/feed.py
+# Feed de cambios en tiempo real: los eventos del storage (joined, accepted,
+# rejected, started, ended, unloaded) se codifican una sola vez como un delta
+# compacto en formato Server-Sent Events y se reparten a los suscriptores del
+# ride y a los de cada usuario involucrado (conductor y pasajeros). Cada
+# suscriptor tiene una cola acotada: publicar nunca bloquea al request que
+# mutó el ride; si un cliente no lee y su cola se llena, se le descarta lo
+# pendiente, recibe un evento "resync" (debe volver a pedir el estado) y se
+# cierra la suscripción.
+from __future__ import annotations
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from .ride import Ride
+from .ride_participation import RideParticipation
+from .storage import Storage
+
+RIDE_EVENTS = frozenset({"joined", "accepted", "rejected", "started", "ended", "unloaded"})
+
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+
+def delta(event: str, ride: Ride, participation: Optional[RideParticipation]) -> dict:
+    """What changed, without rebuilding the ride schema."""
+    change = {"event": event, "ride": ride.id, "version": ride.version,
+              "status": ride.status.value, "freeSpaces": ride.free_spaces}
+    if participation is not None:
+        change["alias"] = participation.participant_alias
+        change["participation"] = participation.status.value
+    else:
+        # start/end cambian a todos los pasajeros a la vez (waiting -> missing, ...)
+        change["participants"] = {p.participant_alias: p.status.value for p in ride.participants}
+    return change
+
+
+class Subscription:
+    """Bounded queue of encoded events for one client.
+
+    ``push`` is thread-safe and never blocks; the consumer reads with
+    ``await get()`` on its event loop (``drain()`` without one)."""
+
+    def __init__(self, feed: "ChangeFeed", key: tuple, maxsize: int):
+        self.feed = feed
+        self.key = key
+        self.maxsize = maxsize
+        self.closed = False
+        self.lagged = False
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    def push(self, frame: bytes) -> bool:
+        """Queue ``frame``; False once the subscription is closed."""
+        with self._lock:
+            if self.closed:
+                return False
+            if len(self._queue) >= self.maxsize:
+                # backpressure: el cliente no da abasto, que se resincronice
+                self._queue.clear()
+                self._queue.append(RESYNC)
+                self.closed = self.lagged = True
+            else:
+                self._queue.append(frame)
+        self._wake()
+        return not self.closed
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+        self._wake()
+
+    def _wake(self):
+        loop, ready = self._loop, self._ready
+        if loop is not None and not ready.is_set():
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:     # el loop ya terminó
+                pass
+
+    def drain(self) -> List[bytes]:
+        with self._lock:
+            frames = list(self._queue)
+            self._queue.clear()
+        return frames
+
+    async def get(self, timeout: float) -> Optional[List[bytes]]:
+        """Pending frames, waiting up to ``timeout`` seconds ([] if none came);
+        None once the subscription is closed and drained."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._ready = asyncio.Event()
+        while True:
+            self._ready.clear()       # antes de mirar la cola: un push posterior despierta
+            frames = self.drain()
+            if frames:
+                return frames
+            if self.closed:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+
+class ChangeFeed:
+    """Publishes ride deltas to per-ride and per-user subscriptions."""
+
+    def __init__(self, storage: Storage, queue_size: int = 256):
+        self.storage = storage
+        self.queue_size = queue_size
+        self.published = 0
+        self.lagged = 0
+        self._by_key: Dict[tuple, Set[Subscription]] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        storage.subscribe(self._on_event)
+
+    # ---------- suscripciones ----------
+    def subscribe_ride(self, rideid: int) -> Subscription:
+        return self._subscribe(("ride", rideid))
+
+    def subscribe_user(self, alias: str) -> Subscription:
+        return self._subscribe(("user", alias))
+
+    def _subscribe(self, key: tuple) -> Subscription:
+        subscription = Subscription(self, key, self.queue_size)
+        with self._lock:
+            self._by_key.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._discard(subscription)
+
+    def _discard(self, subscription: Subscription):
+        subscribers = self._by_key.get(subscription.key)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_key[subscription.key]
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._by_key.values())
+
+    # ---------- publicación ----------
+    def _on_event(self, event: str, subject, participation: Optional[RideParticipation]):
+        if event not in RIDE_EVENTS or not self._by_key:
+            return
+        ride: Ride = subject
+        aliases = {ride.ride_driver}
+        if participation is not None:
+            aliases.add(participation.participant_alias)
+        else:
+            aliases.update(p.participant_alias for p in ride.participants)
+        with self._lock:
+            targets = set(self._by_key.get(("ride", ride.id), ()))
+            for alias in aliases:
+                targets.update(self._by_key.get(("user", alias), ()))
+            if not targets:
+                return
+            self._seq += 1
+            # en orden por ride: el evento se emite bajo el lock del ride
+            frame = b"id: %d\nevent: %s\ndata: %s\n\n" % (
+                self._seq, event.encode(), json.dumps(delta(event, ride, participation)).encode())
+            self.published += 1
+            for subscription in targets:
+                if not subscription.push(frame):
+                    self.lagged += subscription.lagged
+                    self._discard(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"subscribers": len(self), "published": self.published, "lagged": self.lagged}
+
+    def close(self):
+        self.storage.unsubscribe(self._on_event)
+        with self._lock:
+            subscriptions = [s for subscribers in self._by_key.values() for s in subscribers]
+            self._by_key.clear()
+        for subscription in subscriptions:
+            subscription.close()
@@ -0,0 +1,257 @@
+# src/models/matching.py
+# Búsqueda de rides por destino: los textos (final_address del ride y
+# destination del pasajero) se normalizan y parten en tokens; un índice
+# invertido token -> rides listos responde sin recorrer todos los rides.
+# Si el ride trae coordenadas, una grilla lat/lon permite buscar por cercanía.
+from __future__ import annotations
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from .ride import Ride, RideStatus
+from .storage import Storage
+
+# palabras que no ayudan a distinguir destinos (incluye los tipos de vía)
+STOPWORDS = frozenset({"de", "del", "la", "las", "el", "los", "y", "en", "a", "al", "con",
+                       "av", "avenida", "jr", "jiron", "calle", "ca", "psje", "pasaje"})
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# peso de un token del índice que solo empieza con el de la consulta ("barr" -> "barranco")
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX = 3
+# tokens de la consulta que se usan (3**n grupos de puntaje)
+MAX_QUERY_TOKENS = 6
+# celdas de la grilla: ~1.1 km de lado en latitud
+CELL_DEG = 0.01
+EARTH_KM = 6371.0
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII without accents, punctuation collapsed to spaces."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct normalized tokens of ``text``, in order, without stopwords."""
+    return list(dict.fromkeys(t for t in normalize(text).split() if t not in STOPWORDS))
+
+
+def distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * math.asin(math.sqrt(h))
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG)
+
+
+class DestinationIndex:
+    """Inverted index (and lat/lon grid) over the rides that are ``ready``.
+
+    Follows the storage events: rides enter when created ready, are
+    re-indexed when relocated and leave when they start. Storage shared
+    with other processes (``storage.shared``) is also re-read by the
+    first search after ``max_age`` seconds. Free seats change too often to
+    index; ``search`` checks them on the candidates."""
+
+    def __init__(self, storage: Storage, max_age: float = 1.0):
+        self.storage = storage
+        self.max_age = max_age
+        self.rebuilds = 0
+        self._built_at = time.monotonic()
+        self._rebuild_lock = threading.Lock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []        # tokens ordenados, para prefijos
+        self._tokens: Dict[int, List[str]] = {}
+        self._departures: Dict[int, datetime] = {}     # desempate sin cargar el ride
+        self._grid: Dict[Tuple[int, int], Set[int]] = {}
+        self._locations: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        for ride in storage.rides_with_status(RideStatus.ready):
+            self.add(ride)
+        storage.subscribe(self._on_event)
+
+    def _clear(self):
+        self._postings, self._vocabulary, self._tokens = {}, [], {}
+        self._departures, self._grid, self._locations = {}, {}, {}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    # ---------- mantenimiento ----------
+    def add(self, ride: Ride):
+        tokens = tokenize(ride.final_address)
+        with self._lock:
+            self._add(ride, tokens)
+
+    def _add(self, ride: Ride, tokens: List[str]):
+        if ride.id in self._tokens:
+            self._discard(ride.id)
+        self._tokens[ride.id] = tokens
+        self._departures[ride.id] = ride.ride_date_and_time
+        for token in tokens:
+            if token not in self._postings:
+                self._postings[token] = set()
+                self._vocabulary.insert(bisect_left(self._vocabulary, token), token)
+            self._postings[token].add(ride.id)
+        if ride.final_lat is not None and ride.final_lon is not None:
+            location = (ride.final_lat, ride.final_lon)
+            self._locations[ride.id] = location
+            self._grid.setdefault(_cell(*location), set()).add(ride.id)
+
+    def discard(self, rideid: int):
+        with self._lock:
+            self._discard(rideid)
+
+    def _discard(self, rideid: int):
+        self._departures.pop(rideid, None)
+        for token in self._tokens.pop(rideid, ()):
+            postings = self._postings[token]
+            postings.discard(rideid)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+        location = self._locations.pop(rideid, None)
+        if location is not None:
+            cell = self._grid[_cell(*location)]
+            cell.discard(rideid)
+            if not cell:
+                del self._grid[_cell(*location)]
+
+    def _on_event(self, event: str, subject, participation):
+        if event == "ride_created" and subject.status is RideStatus.ready:
+            self.add(subject)
+        elif event == "relocated" and subject.status is RideStatus.ready:
+            self.add(subject)       # reemplaza los tokens y la celda anteriores
+        elif event == "started":
+            self.discard(subject.id)
+
+    def refresh(self):
+        """Rebuild from ``storage`` (rides written by other processes)."""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # tokens fuera del lock: las búsquedas siguen con el índice anterior
+        rides = [(ride, tokenize(ride.final_address))
+                 for ride in self.storage.rides_with_status(RideStatus.ready)]
+        with self._lock:
+            self._clear()
+            for ride, tokens in rides:
+                self._add(ride, tokens)
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+
+    def _maybe_refresh(self):
+        # una sola reconstrucción a la vez; las demás búsquedas no la esperan
+        if (self.storage.shared and time.monotonic() - self._built_at >= self.max_age
+                and self._rebuild_lock.acquire(blocking=False)):
+            try:
+                if time.monotonic() - self._built_at >= self.max_age:
+                    self._rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+    def close(self):
+        self.storage.unsubscribe(self._on_event)
+
+    # ---------- búsqueda ----------
+    def _text_groups(self, destination: str) -> List[Tuple[float, Set[int]]]:
+        """Rides matching ``destination`` grouped by text score in [0, 1], best first.
+
+        Each query token matches a ride exactly (1.0), as a prefix of one of
+        its tokens (``PREFIX_WEIGHT``) or not at all, weighted by the token's
+        idf. Every combination of those outcomes is one group, built with set
+        operations instead of scoring ride by ride."""
+        total = len(self._tokens) or 1
+        tokens = []     # (idf, exactos, solo prefijo, todos)
+        for token in tokenize(destination)[:MAX_QUERY_TOKENS]:
+            exact = self._postings.get(token, set())
+            prefixed: Set[int] = set()
+            if len(token) >= MIN_PREFIX:
+                i = bisect_left(self._vocabulary, token)
+                while i < len(self._vocabulary) and self._vocabulary[i].startswith(token):
+                    if self._vocabulary[i] != token:
+                        prefixed |= self._postings[self._vocabulary[i]]
+                    i += 1
+            prefixed -= exact
+            matched = exact | prefixed
+            tokens.append((math.log(1 + total / (1 + len(matched))), exact, prefixed, matched))
+        weight_sum = sum(idf for idf, *_ in tokens)
+        combos = []
+        for choice in itertools.product((1.0, PREFIX_WEIGHT, 0.0), repeat=len(tokens)):
+            score = sum(idf * factor for (idf, *_), factor in zip(tokens, choice))
+            if score > 0:
+                combos.append((score / weight_sum, choice))
+        combos.sort(key=lambda combo: -combo[0])
+        groups: List[Tuple[float, Set[int]]] = []
+        for score, choice in combos:
+            required = sorted((exact if factor == 1.0 else prefixed
+                               for (_, exact, prefixed, _), factor in zip(tokens, choice) if factor), key=len)
+            rides = required[0].intersection(*required[1:])
+            for (*_, matched), factor in zip(tokens, choice):
+                if not factor and rides:
+                    rides -= matched
+            if not rides:
+                continue
+            if groups and math.isclose(groups[-1][0], score):
+                groups[-1][1].update(rides)
+            else:
+                groups.append((score, rides))
+        return groups
+
+    def _geo_scores(self, origin: Tuple[float, float], radius_km: float) -> Dict[int, float]:
+        lat, lon = origin
+        span_lat = math.ceil(radius_km / (EARTH_KM * math.radians(CELL_DEG)))
+        span_lon = math.ceil(span_lat / max(math.cos(math.radians(lat)), 0.01))
+        row, col = _cell(lat, lon)
+        scores = {}
+        for r in range(row - span_lat, row + span_lat + 1):
+            for c in range(col - span_lon, col + span_lon + 1):
+                for rideid in self._grid.get((r, c), ()):
+                    distance = distance_km(origin, self._locations[rideid])
+                    if distance <= radius_km:
+                        scores[rideid] = 1.0 - distance / radius_km
+        return scores
+
+    def search(self, destination: str = "", origin: Optional[Tuple[float, float]] = None,
+               radius_km: float = 2.0, seats: int = 1, limit: int = 20) -> List[Tuple[float, Ride]]:
+        """Ready rides with at least ``seats`` free, best match first.
+
+        The score is the text match in [0, 1] (plus the proximity in [0, 1]
+        when ``origin`` is given); ties go to the earliest departure."""
+        self._maybe_refresh()
+        with self._lock:
+            groups = self._text_groups(destination) if destination else []
+            if origin is not None:
+                scores = {rideid: score for score, rides in groups for rideid in rides}
+                for rideid, score in self._geo_scores(origin, radius_km).items():
+                    scores[rideid] = scores.get(rideid, 0.0) + score
+                by_score: Dict[float, Set[int]] = {}
+                for rideid, score in scores.items():
+                    by_score.setdefault(score, set()).add(rideid)
+                groups = sorted(by_score.items(), reverse=True)
+        found = []
+        for score, rides in groups:
+            with self._lock:
+                departures = self._departures
+                heap = [(departures[rideid], rideid) for rideid in rides if rideid in departures]
+            # heap en O(n); solo se cargan y revisan (asientos libres) los que se van sacando
+            heapq.heapify(heap)
+            while heap and len(found) < limit:
+                _, rideid = heapq.heappop(heap)
+                ride = self.storage.get_ride(rideid)
+                if ride is not None and ride.status is RideStatus.ready and ride.free_spaces >= seats:
+                    found.append((score, ride))
+            if len(found) == limit:
+                break
+        return found
@@ -0,0 +1,376 @@
+# src/models/persistence.py
+# Persistencia del DataHandler: log de eventos append-only (fsync por lotes)
+# más snapshots compactos que acotan el tiempo de replay.
+#
+#   <dir>/events-<seq inicial>.log   una línea JSON por evento de dominio
+#   <dir>/snapshot-<seq>.json        estado completo tras el evento <seq>
+from __future__ import annotations
+import gc
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from .archive import ArchivedEntry, RideArchive
+from .data_handler import DataHandler
+from .records import ride_from_dict, ride_to_dict
+from .ride import DESTINATION_FIELDS, Ride, RideStatus
+from .ride_participation import RideParticipation, RPStatus
+from .user import User
+
+_LOG_PREFIX = "events-"
+_SNAPSHOT_PREFIX = "snapshot-"
+
+
+def _seq_of(filename: str) -> int:
+    return int(filename.split("-", 1)[1].split(".", 1)[0])
+
+
+def _listing(directory: str, prefix: str, suffix: str) -> List[str]:
+    names = [n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith(suffix)]
+    return sorted(names, key=_seq_of)
+
+
+def _drop_torn_tail(path: str):
+    # deja el archivo terminado en "\n" para no pegar eventos nuevos a una línea cortada
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+# ---------- log de eventos ----------
+class EventLog:
+    """Append-only JSON-lines log split in segments.
+
+    Every event reaches the OS as soon as it is written (line buffered),
+    so a process crash loses nothing. fsync runs in a background thread
+    every ``sync_interval`` seconds, or as soon as ``batch_size`` events
+    are pending, so at most that much can be lost on a power failure and
+    ``append`` never waits for the disk (it can run on an event loop)."""
+
+    def __init__(self, directory: str, next_seq: int = 1,
+                 batch_size: int = 256, sync_interval: float = 0.05):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.next_seq = next_seq
+        self._pending = 0
+        self._file = None
+        self._lock = threading.Lock()
+        # fsync fuera de _lock (los append siguen); rotate/close lo toman antes de cerrar el archivo
+        self._sync_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._open_segment(next_seq)
+        self._stop = threading.Event()
+        self._full = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, name="event-log-sync", daemon=True)
+        self._syncer.start()
+
+    def _open_segment(self, start_seq: int):
+        path = os.path.join(self.directory, f"{_LOG_PREFIX}{start_seq:012d}.log")
+        if os.path.exists(path):
+            _drop_torn_tail(path)
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def append(self, event: dict) -> int:
+        with self._lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self._file.write(json.dumps({"seq": seq, **event}, separators=(",", ":")) + "\n")
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._full.set()
+        return seq
+
+    def _sync_loop(self):
+        while not self._stop.is_set():
+            self._full.wait(self.sync_interval)
+            self._full.clear()
+            self.sync()
+
+    def sync(self):
+        with self._sync_lock:
+            with self._lock:
+                if not self._pending or self._file.closed:
+                    return
+                self._pending = 0
+                fd = self._file.fileno()
+            os.fsync(fd)
+
+    def rotate(self) -> int:
+        """Close the current segment and start a new one at ``next_seq``.
+        Returns the last seq of the closed segment."""
+        with self._sync_lock, self._lock:
+            self._close_segment()
+            self._open_segment(self.next_seq)
+            return self.next_seq - 1
+
+    def _close_segment(self):
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._file.close()
+
+    def close(self):
+        self._stop.set()
+        self._full.set()
+        with self._sync_lock, self._lock:
+            if self._file and not self._file.closed:
+                self._close_segment()
+
+    @staticmethod
+    def read(directory: str, after_seq: int = 0) -> Iterator[dict]:
+        """Yield the logged events with ``seq > after_seq`` in order.
+
+        An unterminated last line in a segment (crash in the middle of a
+        write) is skipped; a bad line anywhere else raises ValueError."""
+        segments = _listing(directory, _LOG_PREFIX, ".log") if os.path.isdir(directory) else []
+        for name in segments:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    if not line.endswith("\n"):
+                        break  # escritura cortada
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        raise ValueError(f"Corrupt event log {name} line {number}")
+                    if event["seq"] > after_seq:
+                        yield event
+
+
+# ---------- eventos de dominio <-> JSON ----------
+def encode_event(event: str, subject, participation: Optional[RideParticipation]) -> dict:
+    if event == "user_created":
+        return {"type": event, "alias": subject.alias, "name": subject.name, "carPlate": subject.carPlate}
+    if event == "ride_created":
+        return {"type": event, "ride": ride_to_dict(subject)}
+    record = {"type": event, "ride": subject.id}
+    if event == "joined":
+        record.update(alias=participation.participant_alias, destination=participation.destination,
+                      occupied_spaces=participation.occupied_spaces)
+    elif event == "accepted":
+        record.update(alias=participation.participant_alias,
+                      confirmation=participation.confirmation.isoformat())
+    elif event == "relocated":
+        record.update({field: getattr(subject, field) for field in DESTINATION_FIELDS})
+    elif participation is not None:
+        record["alias"] = participation.participant_alias
+    return record
+
+
+def apply_event(dh: DataHandler, record: dict):
+    """Re-apply a logged event to ``dh`` through the normal model methods."""
+    kind = record["type"]
+    if kind == "user_created":
+        dh.add_user(User(alias=record["alias"], name=record["name"], carPlate=record["carPlate"]))
+        return
+    if kind == "ride_created":
+        dh.add_ride(ride_from_dict(record["ride"]))
+        return
+    ride = dh.get_ride(record["ride"])
+    if ride is None:
+        raise ValueError(f"Unknown ride {record['ride']}")
+    if kind == "joined":
+        ride.request_join(RideParticipation(participant_alias=record["alias"],
+                                            destination=record["destination"],
+                                            occupied_spaces=record["occupied_spaces"]))
+    elif kind == "accepted":
+        ride.accept(record["alias"])
+        ride.get_participation(record["alias"]).confirmation = datetime.fromisoformat(record["confirmation"])
+    elif kind == "rejected":
+        ride.reject(record["alias"])
+    elif kind == "started":
+        ride.start()
+    elif kind == "ended":
+        ride.end()
+    elif kind == "unloaded":
+        ride.get_participation(record["alias"]).mark_unloaded()
+    elif kind == "relocated":
+        for field in DESTINATION_FIELDS:
+            if getattr(ride, field) != record[field]:
+                setattr(ride, field, record[field])
+    else:
+        raise ValueError(f"Unknown event type {kind!r}")
+
+
+# ---------- snapshots ----------
+def dump_state(dh: DataHandler) -> dict:
+    # participación -> id del ride que la contiene
+    owner = {id(p): r.id for r in dh.rides for p in r.participants}
+    users = []
+    for u in dh.users:
+        history = []
+        for item in u.rides:
+            if isinstance(item, Ride):
+                history.append({"ride": item.id})
+            elif isinstance(item, ArchivedEntry):
+                history.append({"ride": item.ride_id} if item.alias is None
+                               else {"ride": item.ride_id, "alias": item.alias})
+            elif id(item) in owner:
+                history.append({"ride": owner[id(item)], "alias": item.participant_alias})
+        users.append({"alias": u.alias, "name": u.name, "carPlate": u.carPlate, "rides": history})
+    # primero los de memoria: un ride que se archiva mientras tanto ya está en el archivo
+    rides = [ride_to_dict(r) for r in dh.rides]
+    if dh.archive is not None:
+        hot = {r["id"] for r in rides}
+        rides.extend(r for r in dh.archive.records() if r["id"] not in hot)
+    return {
+        "next_ride_id": dh.next_ride_id,
+        "users": users,
+        "rides": rides,
+    }
+
+
+def load_state(state: dict, lazy: bool = False) -> DataHandler:
+    """Build a DataHandler from ``dump_state`` output.
+
+    With ``lazy`` the rides already done are not built: they go to a
+    RideArchive as records (see ``RideArchive.preload``) and user
+    histories get ArchivedEntry stand-ins, so only active rides cost
+    objects at startup."""
+    done = {}
+    if lazy:
+        done = {r["id"]: r for r in state["rides"] if r["status"] == RideStatus.done.value}
+    rides = [ride_from_dict(r) for r in state["rides"] if r["id"] not in done]
+    by_id = {r.id: r for r in rides}
+    users = []
+    for u in state["users"]:
+        user = User(alias=u["alias"], name=u["name"], carPlate=u["carPlate"])
+        for ref in u["rides"]:
+            record = done.get(ref["ride"])
+            if record is not None:
+                user.add_ride(_archived_entry(record, ref.get("alias")))
+                continue
+            ride = by_id[ref["ride"]]
+            user.add_ride(ride.get_participation(ref["alias"]) if "alias" in ref else ride)
+        users.append(user)
+    dh = DataHandler(users=users, rides=rides, next_ride_id=state["next_ride_id"])
+    if done:
+        RideArchive(dh).preload(done.values())
+    return dh
+
+
+def _archived_entry(record: dict, alias: Optional[str]) -> ArchivedEntry:
+    if alias is None:       # el ride que conduce
+        return ArchivedEntry(record["id"], None, RideStatus(record["status"]))
+    status = next(p["status"] for p in record["participants"] if p["participant_alias"] == alias)
+    return ArchivedEntry(record["id"], alias, RPStatus(status))
+
+
+def _write_atomic(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _gc_paused():
+    # la carga crea cientos de miles de objetos que viven todo el proceso y
+    # cada pasada del GC cíclico volvía a recorrer todo lo ya cargado
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def recover(directory: str, lazy: bool = False) -> Tuple[DataHandler, int]:
+    """Latest snapshot plus the log tail. Returns the handler and the last seq.
+
+    ``lazy`` loads the snapshot with ``load_state(..., lazy=True)``."""
+    with _gc_paused():
+        return _recover(directory, lazy)
+
+
+def _recover(directory: str, lazy: bool) -> Tuple[DataHandler, int]:
+    last_seq = 0
+    dh = DataHandler()
+    snapshots = _listing(directory, _SNAPSHOT_PREFIX, ".json") if os.path.isdir(directory) else []
+    if snapshots:
+        with open(os.path.join(directory, snapshots[-1]), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        dh = load_state(snapshot["state"], lazy)
+        last_seq = snapshot["seq"]
+    for record in EventLog.read(directory, after_seq=last_seq):
+        # el snapshot refleja exactamente los eventos hasta su seq: cualquier
+        # error al repetir la cola es un log dañado
+        try:
+            apply_event(dh, record)
+        except ValueError as e:
+            raise ValueError(f"Cannot replay event {record['seq']}: {e}") from e
+        last_seq = record["seq"]
+    return dh, last_seq
+
+
+# ---------- motor de persistencia ----------
+class Persistence:
+    """Logs every domain event of a DataHandler and snapshots it periodically.
+
+    ``Persistence.open(directory)`` recovers the stored state and returns
+    an engine whose ``data_handler`` is already being logged. The handler
+    is marked ``blocking`` while attached: the event that reaches
+    ``snapshot_every`` writes the snapshot before returning, so the async
+    app must not call it from the event loop."""
+
+    def __init__(self, data_handler: DataHandler, directory: str, last_seq: int = 0,
+                 snapshot_every: int = 100_000, **log_options):
+        self.data_handler = data_handler
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.log = EventLog(directory, next_seq=last_seq + 1, **log_options)
+        self._since_snapshot = 0
+        self._snapshot_lock = threading.Lock()
+        data_handler.blocking = True        # ver AsyncStorage
+        data_handler.subscribe(self._on_event)
+
+    @classmethod
+    def open(cls, directory: str, lazy: bool = False, **options) -> "Persistence":
+        dh, last_seq = recover(directory, lazy)
+        return cls(dh, directory, last_seq=last_seq, **options)
+
+    def _on_event(self, event: str, subject, participation):
+        self.log.append(encode_event(event, subject, participation))
+        self._since_snapshot += 1
+        # sin esperar: si otro hilo ya está tomando el snapshot, este evento
+        # (en medio de su mutación) es justo lo que ese snapshot espera
+        if (self.snapshot_every and self._since_snapshot >= self.snapshot_every
+                and self._snapshot_lock.acquire(blocking=False)):
+            try:
+                if self._since_snapshot >= self.snapshot_every:  # otro hilo pudo adelantarse
+                    self._snapshot()
+            finally:
+                self._snapshot_lock.release()
+
+    def snapshot(self) -> int:
+        """Write a snapshot at the current seq and drop the files it makes obsolete."""
+        with self._snapshot_lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> int:
+        self._since_snapshot = 0
+        # sin mutaciones a medias: el estado es exactamente el de los eventos hasta seq
+        with self.data_handler.quiesced():
+            seq = self.log.rotate()
+            state = dump_state(self.data_handler)
+        _write_atomic(os.path.join(self.directory, f"{_SNAPSHOT_PREFIX}{seq:012d}.json"),
+                      {"seq": seq, "state": state})
+        for name in _listing(self.directory, _SNAPSHOT_PREFIX, ".json"):
+            if _seq_of(name) < seq:
+                os.remove(os.path.join(self.directory, name))
+        for name in _listing(self.directory, _LOG_PREFIX, ".log"):
+            if _seq_of(name) <= seq:
+                os.remove(os.path.join(self.directory, name))
+        return seq
+
+    def close(self):
+        self.data_handler.unsubscribe(self._on_event)
+        vars(self.data_handler).pop("blocking", None)     # vuelve al de su clase
+        self.log.close()
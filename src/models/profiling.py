@@ -0,0 +1,212 @@
+# src/models/profiling.py
+# Perfilado opcional de los caminos calientes. @profiled solo marca la
+# función (no la envuelve), así que desactivado no cuesta nada; enable()
+# reemplaza las funciones marcadas por versiones cronometradas y disable()
+# las devuelve. Solo se miden los requests muestreados: cada uno lleva una
+# traza (contextvar) donde los spans anidados acumulan su tiempo, y al
+# terminar se suma al agregado por pila (formato "folded" de flame graphs).
+from __future__ import annotations
+import contextvars
+import functools
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Stack = Tuple[str, ...]
+
+_TRACE: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("profiling_trace", default=None)
+
+
+def profiled(name: str) -> Callable:
+    """Mark a function or method as a span named ``name``.
+
+    The function is returned unchanged; ``Profiler.enable`` swaps in a timed
+    wrapper on the owners it is given."""
+    def mark(fn: Callable) -> Callable:
+        fn.__profiled__ = name
+        return fn
+    return mark
+
+
+class Trace:
+    """Span timings of one sampled request, keyed by stack (relative to the request)."""
+    __slots__ = ("_stack", "_child", "spans")
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._child: List[int] = [0]         # ns en spans hijos, por nivel (0 = el request)
+        self.spans: Dict[Stack, List[int]] = {}     # pila -> [llamadas, total ns, propio ns]
+
+    def enter(self, name: str):
+        self._stack.append(name)
+        self._child.append(0)
+
+    def exit(self, elapsed: int):
+        stack = tuple(self._stack)
+        self._stack.pop()
+        child = self._child.pop()
+        self._child[-1] += elapsed
+        entry = self.spans.get(stack)
+        if entry is None:
+            entry = self.spans[stack] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - child
+
+    @property
+    def child_time(self) -> int:
+        return self._child[0]
+
+
+class span:
+    """``with span("name"):`` times a block inside a sampled request.
+
+    Unlike ``@profiled`` it always checks for a trace, so keep it out of
+    the tightest loops."""
+    __slots__ = ("name", "_trace", "_began")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._trace = _TRACE.get()
+        if self._trace is not None:
+            self._trace.enter(self.name)
+            self._began = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if self._trace is not None:
+            self._trace.exit(time.perf_counter_ns() - self._began)
+        return False
+
+
+def _timed(fn: Callable, name: str) -> Callable:
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        trace = _TRACE.get()
+        if trace is None:
+            return fn(*args, **kwargs)
+        trace.enter(name)
+        began = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            trace.exit(time.perf_counter_ns() - began)
+    timed.__profiled_original__ = fn
+    return timed
+
+
+class Profiler:
+    """Samples requests and aggregates their span timings by stack."""
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.sampled = 0
+        self._stacks: Dict[Stack, List[int]] = {}
+        self._patched: List[Tuple[object, str, object]] = []     # (dueño, atributo, original)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    # ---------- instrumentación ----------
+    def enable(self, sample_rate: float, owners: Iterable[object] = ()):
+        """Time the ``@profiled`` functions of ``owners`` (classes or modules)
+        in a ``sample_rate`` fraction of the requests."""
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        with self._lock:
+            patched = {(id(owner), attr) for owner, attr, _ in self._patched}
+            for owner in owners:
+                for attr, value in list(vars(owner).items()):
+                    name = getattr(value, "__profiled__", None)
+                    if name is None or (id(owner), attr) in patched or hasattr(value, "__profiled_original__"):
+                        continue
+                    self._patched.append((owner, attr, value))
+                    setattr(owner, attr, _timed(value, name))
+            self.sample_rate = sample_rate
+
+    def disable(self):
+        with self._lock:
+            self.sample_rate = 0.0
+            for owner, attr, original in reversed(self._patched):
+                setattr(owner, attr, original)
+            self._patched.clear()
+
+    # ---------- muestreo ----------
+    def sample(self) -> Optional[Trace]:
+        """A new trace for this request, or None if it is not sampled."""
+        rate = self.sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        return Trace()
+
+    def record(self, root: str, trace: Trace, elapsed: int):
+        """Add a finished request (``elapsed`` ns in total) under ``root``."""
+        with self._lock:
+            self.sampled += 1
+            self._add((root,), 1, elapsed, elapsed - trace.child_time)
+            for stack, (calls, total, own) in trace.spans.items():
+                self._add((root, *stack), calls, total, own)
+
+    def _add(self, stack: Stack, calls: int, total: int, own: int):
+        entry = self._stacks.get(stack)
+        if entry is None:
+            entry = self._stacks[stack] = [0, 0, 0]
+        entry[0] += calls
+        entry[1] += total
+        entry[2] += own
+
+    def reset(self):
+        with self._lock:
+            self.sampled = 0
+            self._stacks.clear()
+
+    # ---------- salida ----------
+    def stacks(self) -> List[dict]:
+        with self._lock:
+            items = sorted((stack, list(entry)) for stack, entry in self._stacks.items())
+        return [{"stack": ";".join(stack), "count": calls, "totalMs": total / 1e6, "selfMs": own / 1e6}
+                for stack, (calls, total, own) in items]
+
+    def folded(self) -> str:
+        """``frame;frame;frame <self microseconds>`` lines, as flamegraph.pl reads them."""
+        return "".join(f"{item['stack']} {round(item['selfMs'] * 1000)}\n" for item in self.stacks())
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "sampleRate": self.sample_rate, "sampledRequests": self.sampled,
+                "spans": self.stacks()}
+
+
+PROFILER = Profiler()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: opens a trace for the sampled requests and records it
+    under ``"<METHOD> <route template>"``."""
+
+    def __init__(self, app, profiler: Profiler = PROFILER):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.profiler.sample_rate <= 0:
+            await self.app(scope, receive, send)
+            return
+        trace = self.profiler.sample()
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+        token = _TRACE.set(trace)
+        began = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter_ns() - began
+            _TRACE.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            self.profiler.record(f"{scope['method']} {path}", trace, elapsed)
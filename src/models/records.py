@@ -0,0 +1,37 @@
+# src/models/records.py
+# Rides <-> dicts JSON: formato común del log de eventos, los snapshots y el archivo.
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+from .ride import Ride
+from .ride_participation import RideParticipation
+
+
+# mismas claves que el antiguo model_dump(mode="json"): logs y snapshots viejos siguen cargando
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def ride_to_dict(ride: Ride) -> dict:
+    return {
+        "id": ride.id,
+        "ride_date_and_time": _iso(ride.ride_date_and_time),
+        "final_address": ride.final_address,
+        "allowed_spaces": ride.allowed_spaces,
+        "ride_driver": ride.ride_driver,
+        "status": ride.status.value,
+        "final_lat": ride.final_lat,
+        "final_lon": ride.final_lon,
+        "participants": [{
+            "participant_alias": p.participant_alias,
+            "destination": p.destination,
+            "occupied_spaces": p.occupied_spaces,
+            "confirmation": _iso(p.confirmation),
+            "status": p.status.value,
+        } for p in ride.participants],
+    }
+
+
+def ride_from_dict(data: dict) -> Ride:
+    return Ride(**{**data, "participants": [RideParticipation(**p) for p in data["participants"]]})
@@ -1,12 +1,11 @@
 # src/models/ride.py
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import List
+from typing import Callable, ClassVar, Dict, List, Optional
 
-from pydantic import BaseModel, Field, validator
-
-from .ride_participation import RideParticipation, RPStatus
+from .ride_participation import RideParticipation, RPStatus, as_datetime
+from .profiling import profiled
 
 
 class RideStatus(str, Enum):
@@ -15,59 +14,196 @@ class RideStatus(str, Enum):
     done        = "done"
 
 
-class Ride(BaseModel):
-    id: int
-    ride_date_and_time: datetime
-    final_address: str
-    allowed_spaces: int = Field(..., gt=0)
-    ride_driver: str                      # alias del conductor
-    status: RideStatus = RideStatus.ready
-    participants: List[RideParticipation] = []
+# estados de participación que ocupan asiento
+OCCUPYING = frozenset({RPStatus.confirmed, RPStatus.inprogress, RPStatus.done})
+# campos del destino: asignarlos emite "relocated" (índices de búsqueda, log, SQLite)
+DESTINATION_FIELDS = frozenset({"final_address", "final_lat", "final_lon"})
+
+
+class Ride:
+    """A ride offered by a driver, with its participations.
+
+    Plain ``__slots__`` class; the Pydantic ``RideSchema`` is only used at
+    the API boundary."""
+
+    __slots__ = ("id", "ride_date_and_time", "final_address", "allowed_spaces", "ride_driver", "status",
+                 "participants", "final_lat", "final_lon",
+                 "_listeners", "_occupied", "_status_counts", "_by_alias", "_version")
+
+    # recalcula y compara los contadores tras cada transición (para tests)
+    check_counters: ClassVar[bool] = False
+
+    def __init__(self, id: int, ride_date_and_time: datetime | str, final_address: str, allowed_spaces: int,
+                 ride_driver: str, status: RideStatus | str = RideStatus.ready,
+                 participants: Optional[List[RideParticipation]] = None,
+                 final_lat: Optional[float] = None, final_lon: Optional[float] = None):
+        if allowed_spaces <= 0:
+            raise ValueError("allowed_spaces must be greater than 0")
+        if (final_lat is None) != (final_lon is None):
+            raise ValueError("final_lat and final_lon go together")
+        if final_lat is not None and not (-90 <= final_lat <= 90 and -180 <= final_lon <= 180):
+            raise ValueError("Invalid coordinates")
+        participants = list(participants or ())
+        if len({p.participant_alias for p in participants}) != len(participants):
+            raise ValueError("Duplicate participant alias")
+        # sube con cada mutación (clave de las cachés de serialización)
+        self._version = 0
+        # suscriptores a los cambios del ride (p.ej. índices del DataHandler)
+        self._listeners: List[Callable] = []
+        self.id = id
+        self.ride_date_and_time = as_datetime(ride_date_and_time)
+        self.final_address = final_address
+        self.allowed_spaces = allowed_spaces
+        self.ride_driver = ride_driver                  # alias del conductor
+        self.status = RideStatus(status)
+        self.participants = participants
+        # coordenadas opcionales del destino (búsqueda por cercanía)
+        self.final_lat = final_lat
+        self.final_lon = final_lon
+        # contadores incrementales: asientos ocupados y participaciones por estado
+        self._occupied = 0
+        self._status_counts: Dict[RPStatus, int] = {}
+        # índice alias -> participación (la lista sigue siendo la que se serializa)
+        self._by_alias: Dict[str, RideParticipation] = {}
+        for p in participants:
+            self._track(p)
+        self._version = 0       # las asignaciones de arriba no cuentan como mutaciones
+
+    def __repr__(self) -> str:
+        return (f"Ride(id={self.id!r}, ride_date_and_time={self.ride_date_and_time!r}, "
+                f"final_address={self.final_address!r}, allowed_spaces={self.allowed_spaces!r}, "
+                f"ride_driver={self.ride_driver!r}, status={self.status.value!r}, "
+                f"participants={self.participants!r})")
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            # asignación directa de un campo (ride.final_address = ...)
+            object.__setattr__(self, "_version", self._version + 1)
+            if name in DESTINATION_FIELDS and self._listeners:
+                self._emit("relocated")
+
+    # ---------- eventos ------------
+    def subscribe(self, listener: Callable[["Ride", str, Optional[RideParticipation]], None]):
+        """Register ``listener(ride, event, participation)``; events are
+        joined/accepted/rejected/started/ended/unloaded, and relocated when
+        a destination field is assigned."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable):
+        self._listeners.remove(listener)
+
+    def _emit(self, event: str, participation: RideParticipation | None = None):
+        self._version += 1
+        for listener in self._listeners:
+            listener(self, event, participation)
 
     # ---------- métricas ------------
+    @property
+    def version(self) -> int:
+        """Bumped on every mutation of the ride or its participations."""
+        return self._version
+
     @property
     def occupied(self) -> int:
-        return sum(p.occupied_spaces
-                   for p in self.participants
-                   if p.status in {RPStatus.confirmed,
-                                   RPStatus.inprogress,
-                                   RPStatus.done})
+        return self._occupied
 
     @property
     def free_spaces(self) -> int:
-        return self.allowed_spaces - self.occupied
+        return self.allowed_spaces - self._occupied
+
+    def status_count(self, status: RPStatus | str) -> int:
+        """Number of participations currently in ``status``."""
+        return self._status_counts.get(RPStatus(status), 0)
+
+    @profiled("ride.verify_counters")
+    def verify_counters(self):
+        """Recompute the counters and the alias index from ``participants``;
+        AssertionError if they drifted."""
+        occupied = sum(p.occupied_spaces for p in self.participants if p.status in OCCUPYING)
+        counts: Dict[RPStatus, int] = {}
+        for p in self.participants:
+            counts[p.status] = counts.get(p.status, 0) + 1
+        current = {s: n for s, n in self._status_counts.items() if n}
+        assert occupied == self._occupied, f"occupied {self._occupied} != {occupied}"
+        assert counts == current, f"status counts {current} != {counts}"
+        assert len(self._by_alias) == len(self.participants), "alias index size differs"
+        assert all(self._by_alias.get(p.participant_alias) is p for p in self.participants), \
+            "alias index out of sync"
+
+    # ---------- contadores ------------
+    def _track(self, p: RideParticipation):
+        self._by_alias[p.participant_alias] = p
+        status = RPStatus(p.status)
+        self._status_counts[status] = self._status_counts.get(status, 0) + 1
+        if status in OCCUPYING:
+            self._occupied += p.occupied_spaces
+        p.subscribe(self._on_participation_status)
+
+    def _on_participation_status(self, p: RideParticipation, old: RPStatus, new: RPStatus):
+        self._version += 1
+        self._status_counts[old] -= 1
+        self._status_counts[new] = self._status_counts.get(new, 0) + 1
+        if old in OCCUPYING:
+            self._occupied -= p.occupied_spaces
+        if new in OCCUPYING:
+            self._occupied += p.occupied_spaces
+        if self.check_counters:
+            self.verify_counters()
+        if old is RPStatus.inprogress and new is RPStatus.done:
+            self._emit("unloaded", p)
 
     # ---------- utilidades ----------
     def get_participation(self, alias: str) -> RideParticipation | None:
-        for p in self.participants:
-            if p.participant_alias == alias:
-                return p
-        return None
+        return self._by_alias.get(alias)
 
     # ---------- validaciones ----------
     def request_join(self, participant: RideParticipation):
         if self.status is not RideStatus.ready:
             raise ValueError("Ride already started")
-        if self.get_participation(participant.participant_alias):
+        if participant.participant_alias in self._by_alias:
             raise ValueError("Duplicate request")
         if participant.occupied_spaces > self.free_spaces:
             raise ValueError("Not enough free spaces")
         self.participants.append(participant)
+        self._track(participant)
+        if self.check_counters:
+            self.verify_counters()
+        self._emit("joined", participant)
 
-    def accept(self, alias: str):
+    def transition_error(self, action: str, alias: str, reserved: int = 0) -> str | None:
+        """Error ``action`` (accept/reject/unload) would raise for ``alias``, or None.
+
+        ``reserved`` counts seats promised to earlier accepts of the same batch."""
         p = self.get_participation(alias)
+        if action == "unload":
+            if not p:
+                return "Participation not found"
+            if not p.can_be_unloaded():
+                return "Can only unload inprogress participants"
+            return None
         if not p or p.status is not RPStatus.waiting:
-            raise ValueError("No waiting request to accept")
-        if p.occupied_spaces > self.free_spaces:
-            raise ValueError("No free seats")
+            return f"No waiting request to {action}"
+        if action == "accept" and p.occupied_spaces + reserved > self.free_spaces:
+            return "No free seats"
+        return None
+
+    def accept(self, alias: str):
+        error = self.transition_error("accept", alias)
+        if error:
+            raise ValueError(error)
+        p = self._by_alias[alias]
         p.status = RPStatus.confirmed
-        p.confirmation = datetime.now()
+        p.confirmation = datetime.now(timezone.utc).replace(tzinfo=None)     # UTC sin zona, ver as_datetime
+        self._emit("accepted", p)
 
     def reject(self, alias: str):
-        p = self.get_participation(alias)
-        if not p or p.status is not RPStatus.waiting:
-            raise ValueError("No waiting request to reject")
+        error = self.transition_error("reject", alias)
+        if error:
+            raise ValueError(error)
+        p = self._by_alias[alias]
         p.status = RPStatus.rejected
+        self._emit("rejected", p)
 
     def start(self):
         if self.status is not RideStatus.ready:
@@ -79,6 +215,7 @@ class Ride(BaseModel):
             elif p.status is RPStatus.waiting:
                 p.status = RPStatus.missing
         self.status = RideStatus.inprogress
+        self._emit("started")
 
     def end(self):
         if self.status is not RideStatus.inprogress:
@@ -87,3 +224,4 @@ class Ride(BaseModel):
             if p.status is RPStatus.inprogress:
                 p.status = RPStatus.notmarked
         self.status = RideStatus.done
+        self._emit("ended")
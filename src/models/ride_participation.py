@@ -1,10 +1,8 @@
 # src/models/ride_participation.py
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Optional
-
-from pydantic import BaseModel, Field
+from typing import Callable, List, Optional
 
 
 class RPStatus(str, Enum):
@@ -17,18 +15,94 @@ class RPStatus(str, Enum):
     done        = "done"
 
 
-class RideParticipation(BaseModel):
-    participant_alias: str                     # solo guardamos el alias
-    destination: str
-    occupied_spaces: int = Field(..., gt=-1)
-    confirmation: Optional[datetime] = None
-    status: RPStatus = RPStatus.waiting
+# cada participación guarda su estado como entero chico (índice en STATUSES);
+# STATUS_CODES acepta tanto RPStatus como el str equivalente
+STATUSES = tuple(RPStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def status_code(status: RPStatus | str) -> int:
+    code = STATUS_CODES.get(status)
+    if code is None:
+        raise ValueError(f"Invalid status {status!r}")
+    return code
+
+
+def as_datetime(value: datetime | str | None) -> Optional[datetime]:
+    """Parse ISO strings; times with an offset become naive UTC, the
+    convention of every stored time (naive and aware times don't compare)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class RideParticipation:
+    """A user's request to join a ride.
+
+    Stored compactly (``__slots__``, status as a small int); the Pydantic
+    models in ``src/schemas.py`` are only used at the API boundary."""
+
+    __slots__ = ("participant_alias", "destination", "occupied_spaces", "confirmation",
+                 "_status", "_listeners")
+
+    def __init__(self, participant_alias: str, destination: str, occupied_spaces: int,
+                 confirmation: datetime | str | None = None, status: RPStatus | str = RPStatus.waiting):
+        if occupied_spaces < 0:
+            raise ValueError("occupied_spaces must be greater than -1")
+        self.participant_alias = participant_alias     # solo guardamos el alias
+        self.destination = destination
+        self.occupied_spaces = occupied_spaces
+        self.confirmation = as_datetime(confirmation)
+        self._status = status_code(status)
+        # suscriptores a los cambios de estado; la lista se crea con el primero
+        self._listeners: Optional[List[Callable]] = None
+
+    def __repr__(self) -> str:
+        return (f"RideParticipation(participant_alias={self.participant_alias!r}, "
+                f"destination={self.destination!r}, occupied_spaces={self.occupied_spaces!r}, "
+                f"confirmation={self.confirmation!r}, status={self.status.value!r})")
+
+    # ------------ estado ------------
+    @property
+    def status(self) -> RPStatus:
+        return STATUSES[self._status]
+
+    @status.setter
+    def status(self, value: RPStatus | str):
+        # toda asignación de status (también p.status = "done") avisa a los suscriptores
+        old, new = self._status, status_code(value)
+        self._status = new
+        if new != old and self._listeners:
+            for listener in self._listeners:
+                listener(self, STATUSES[old], STATUSES[new])
+
+    @property
+    def status_id(self) -> int:
+        """The status as its small-int code (index in ``STATUSES``)."""
+        return self._status
+
+    # ------------ eventos ------------
+    def subscribe(self, listener: Callable[["RideParticipation", RPStatus, RPStatus], None]):
+        """Register ``listener(participation, old_status, new_status)``."""
+        if self._listeners is None:
+            self._listeners = []
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable):
+        if self._listeners is None:
+            raise ValueError("listener not subscribed")
+        self._listeners.remove(listener)
 
     # ------------ helpers ------------
     def can_be_unloaded(self) -> bool:
-        return self.status is RPStatus.inprogress
+        return self._status == _INPROGRESS
 
     def mark_unloaded(self):
         if not self.can_be_unloaded():
             raise ValueError("Can only unload inprogress participants")
         self.status = RPStatus.done
+
+
+_INPROGRESS = STATUS_CODES[RPStatus.inprogress]
@@ -0,0 +1,150 @@
+# src/models/scheduler.py
+# Transiciones automáticas del ciclo de vida: un heap de timers ordenado por
+# hora de salida arranca los rides listos que ya pasaron su salida (los
+# pasajeros en waiting quedan missing, como en start()) y cierra los que
+# llevan demasiado tiempo en curso. Un hilo de fondo procesa lo vencido por
+# tandas, tomando solo el lock de cada ride, así que los requests no esperan.
+from __future__ import annotations
+import heapq
+import threading
+import time
+from datetime import timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .ride import Ride, RideStatus
+from .storage import Storage
+
+START = "start"
+END = "end"
+
+
+class RideScheduler:
+    """Starts overdue ``ready`` rides and ends stale ``inprogress`` ones.
+
+    A ride is started ``start_grace`` seconds after its departure and ended
+    ``expire_after`` seconds after it. Timers follow the storage events
+    (``ride_created``, ``started``); entries are checked against the ride
+    when they come due, so manual transitions just leave stale timers
+    behind. ``clock`` returns epoch seconds (``time.time`` by default);
+    departures are naive UTC (see ``as_datetime``), whatever the local
+    time zone of the process."""
+
+    def __init__(self, storage: Storage, start_grace: float = 15 * 60, expire_after: float = 6 * 3600,
+                 batch_size: int = 500, interval: float = 1.0, refresh_every: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.storage = storage
+        self.start_grace = start_grace
+        self.expire_after = expire_after
+        self.batch_size = batch_size
+        self.interval = interval
+        self.refresh_every = refresh_every
+        self.clock = clock
+        # métricas
+        self.sweeps = 0
+        self.started = 0
+        self.expired = 0
+        self.last_sweep = 0.0
+        self.max_sweep = 0.0
+        self._heap: List[Tuple[float, int, str]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refresh()
+        storage.subscribe(self._on_event)
+
+    # ---------- timers ----------
+    def _due(self, ride: Ride, action: str) -> float:
+        delay = self.start_grace if action == START else self.expire_after
+        # .timestamp() de un datetime sin zona lo leería como hora local
+        return ride.ride_date_and_time.replace(tzinfo=timezone.utc).timestamp() + delay
+
+    def _push(self, ride: Ride, action: str):
+        with self._lock:
+            heapq.heappush(self._heap, (self._due(ride, action), ride.id, action))
+
+    def refresh(self):
+        """Rebuild the timers from the storage (rides written by other processes)."""
+        heap = [(self._due(ride, START), ride.id, START) for ride in self.storage.rides_with_status(RideStatus.ready)]
+        heap += [(self._due(ride, END), ride.id, END)
+                 for ride in self.storage.rides_with_status(RideStatus.inprogress)]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+
+    def _on_event(self, event: str, subject, participation):
+        if event == "ride_created" and subject.status is RideStatus.ready:
+            self._push(subject, START)
+        elif event == "started":
+            self._push(subject, END)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    # ---------- barrido ----------
+    def sweep(self) -> int:
+        """Apply up to ``batch_size`` due timers; returns how many were due."""
+        began = time.perf_counter()
+        now = self.clock()
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._heap))
+        # fuera del lock del heap: las transiciones emiten eventos que vuelven a _push
+        for _, rideid, action in due:
+            with self.storage.ride_lock(rideid):
+                self._apply(self.storage.get_ride(rideid), action, now)
+        elapsed = time.perf_counter() - began
+        self.sweeps += 1
+        self.last_sweep = elapsed
+        self.max_sweep = max(self.max_sweep, elapsed)
+        return len(due)
+
+    def _apply(self, ride: Optional[Ride], action: str, now: float):
+        wanted = RideStatus.ready if action == START else RideStatus.inprogress
+        if ride is None or ride.status is not wanted:
+            return      # timer viejo: ya lo movió el conductor
+        if self._due(ride, action) > now:
+            self._push(ride, action)    # cambió la hora de salida
+            return
+        try:
+            if action == START:
+                ride.start()
+                self.started += 1
+            else:
+                ride.end()
+                self.expired += 1
+        except ValueError:
+            pass        # otro proceso (SQLite) llegó antes
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue depth, how far behind the oldest due timer is, and sweep stats."""
+        with self._lock:
+            depth = len(self._heap)
+            lag = max(0.0, self.clock() - self._heap[0][0]) if self._heap else 0.0
+        return {"queueDepth": depth, "lagSeconds": lag, "sweeps": self.sweeps, "started": self.started,
+                "expired": self.expired, "lastSweepMs": self.last_sweep * 1e3, "maxSweepMs": self.max_sweep * 1e3}
+
+    # ---------- hilo ----------
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ride-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        refreshed = time.monotonic()
+        while not self._stop.is_set():
+            if self.storage.shared and time.monotonic() - refreshed >= self.refresh_every:
+                self.refresh()
+                refreshed = time.monotonic()
+            if self.sweep() < self.batch_size:
+                self._stop.wait(self.interval)
+            else:
+                time.sleep(0)   # tanda llena: seguir, pero soltar el GIL entre tandas
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.storage.unsubscribe(self._on_event)
@@ -0,0 +1,82 @@
+# src/models/sharding.py
+# Partición de los datos entre procesos: los rides van al shard id % N y los
+# usuarios al crc32(alias) % N. Cada shard es un DataHandler en memoria con
+# su parte; los ids de ride que reparte quedan en su clase de resto, así que
+# el id alcanza para saber dónde vive un ride. Los usuarios de otro shard que
+# conducen o se suman a rides de este se piden a su shard ("directory") y se
+# guardan como sombra: nombre y placa más el historial de sus participaciones
+# en rides de este shard (el total se arma sumando los shards).
+from __future__ import annotations
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar, Dict, Iterable, Optional
+
+from .data_handler import DataHandler
+from .profiling import profiled
+from .user import User
+
+
+def shard_of_user(alias: str, shards: int) -> int:
+    return zlib.crc32(alias.encode()) % shards
+
+
+def shard_of_ride(rideid: int, shards: int) -> int:
+    return rideid % shards
+
+
+@dataclass
+class ShardDataHandler(DataHandler):
+    """In-memory storage for shard ``shard`` of ``shards``.
+
+    ``directory(alias)`` returns ``{"name", "carPlate"}`` for a user that
+    lives in another shard, or None if it does not exist."""
+    shard: int = 0
+    shards: int = 1
+    directory: Optional[Callable[[str], Optional[dict]]] = field(default=None, repr=False)
+    # get_user puede preguntarle a otro shard
+    blocking: ClassVar[bool] = True
+    _shadows: Dict[str, User] = field(default_factory=dict, init=False, repr=False)
+    _shadow_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def owns_user(self, alias: str) -> bool:
+        return shard_of_user(alias, self.shards) == self.shard
+
+    def owns_ride(self, rideid: int) -> bool:
+        return shard_of_ride(rideid, self.shards) == self.shard
+
+    @profiled("data_handler.get_user")
+    def get_user(self, alias: str) -> Optional[User]:
+        user = self.local_user(alias)
+        if user is not None or self.directory is None or self.owns_user(alias):
+            return user
+        found = self.directory(alias)
+        if found is None:
+            return None
+        with self._shadow_lock:
+            user = self._shadows.get(alias)
+            if user is None:
+                user = self._shadows[alias] = User(alias=alias, name=found["name"], carPlate=found.get("carPlate"))
+        return user
+
+    def local_user(self, alias: str) -> Optional[User]:
+        """Users of this shard and shadows already known, without asking other shards."""
+        return self._users_by_alias.get(alias) or self._shadows.get(alias)
+
+    def local_users(self, aliases: Iterable[str]) -> Dict[str, dict]:
+        """What this shard knows of ``aliases``: profile, whether this is
+        their home shard and how many of its rides are in their history."""
+        known = {}
+        for alias in aliases:
+            user = self.local_user(alias)
+            if user is not None:
+                known[alias] = {"name": user.name, "carPlate": user.carPlate,
+                                "home": self.owns_user(alias), "rides": len(user.rides)}
+        return known
+
+    def allocate_ride_id(self) -> int:
+        with self._id_lock:
+            # el siguiente id de la clase de resto de este shard
+            rideid = self.next_ride_id + (self.shard - self.next_ride_id) % self.shards
+            self.next_ride_id = rideid + 1
+        return rideid
@@ -0,0 +1,413 @@
+# src/models/sqlite_handler.py
+# Backend SQLite del DataHandler: permite datos más grandes que la RAM y
+# varios workers de uvicorn sobre la misma base.
+#
+# Cada consulta materializa objetos nuevos (no hay caché entre requests, así
+# dos procesos no ven datos viejos) y los cambios hechos con los métodos de
+# Ride / RideParticipation se escriben de vuelta a través de sus eventos.
+from __future__ import annotations
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, ClassVar, List, Optional, Sequence, Tuple
+
+from .ride import Ride, RideStatus
+from .ride_participation import RideParticipation
+from .storage import Storage
+from .concurrency import KeyedLocks
+from .user import User, ride_stats
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    alias       TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    car_plate   TEXT
+);
+CREATE TABLE IF NOT EXISTS rides (
+    id                  INTEGER PRIMARY KEY,
+    ride_date_and_time  TEXT NOT NULL,
+    final_address       TEXT NOT NULL,
+    allowed_spaces      INTEGER NOT NULL,
+    ride_driver         TEXT NOT NULL,
+    status              TEXT NOT NULL,
+    version             INTEGER NOT NULL DEFAULT 0,
+    final_lat           REAL,
+    final_lon           REAL
+);
+CREATE INDEX IF NOT EXISTS rides_by_status ON rides (status, id);
+CREATE INDEX IF NOT EXISTS rides_by_driver ON rides (ride_driver, id);
+CREATE INDEX IF NOT EXISTS rides_by_departure ON rides (ride_date_and_time, id);
+CREATE TABLE IF NOT EXISTS participations (
+    ride_id             INTEGER NOT NULL REFERENCES rides (id),
+    position            INTEGER NOT NULL,
+    participant_alias   TEXT NOT NULL,
+    destination         TEXT NOT NULL,
+    occupied_spaces     INTEGER NOT NULL,
+    confirmation        TEXT,
+    status              TEXT NOT NULL,
+    PRIMARY KEY (ride_id, participant_alias)
+);
+CREATE INDEX IF NOT EXISTS participations_by_alias ON participations (participant_alias, ride_id);
+CREATE TABLE IF NOT EXISTS ride_ids (
+    id  INTEGER PRIMARY KEY
+);
+"""
+
+# columnas agregadas después de la primera versión del esquema (bases viejas)
+ADDED_COLUMNS = {"rides": [("version", "INTEGER NOT NULL DEFAULT 0"), ("final_lat", "REAL"), ("final_lon", "REAL")]}
+
+# ---------- consultas calientes ----------
+# sqlite3 guarda en caché el statement preparado de cada texto SQL por
+# conexión, así que son constantes y se reutilizan tal cual.
+_RIDE_COLUMNS = ("id, ride_date_and_time, final_address, allowed_spaces, ride_driver, status, version, "
+                 "final_lat, final_lon")
+_PART_COLUMNS = "ride_id, participant_alias, destination, occupied_spaces, confirmation, status"
+
+SQL_GET_USER = "SELECT alias, name, car_plate FROM users WHERE alias = ?"
+SQL_ALL_USERS = "SELECT alias, name, car_plate FROM users ORDER BY rowid"
+SQL_INSERT_USER = "INSERT INTO users (alias, name, car_plate) VALUES (?, ?, ?)"
+# páginas: LIMIT -1 es "sin límite"
+SQL_USERS_PAGE = "SELECT alias, name, car_plate FROM users ORDER BY rowid LIMIT ?"
+SQL_USERS_PAGE_AFTER = ("SELECT alias, name, car_plate FROM users "
+                        "WHERE rowid > (SELECT rowid FROM users WHERE alias = ?) ORDER BY rowid LIMIT ?")
+
+SQL_GET_RIDE = f"SELECT {_RIDE_COLUMNS} FROM rides WHERE id = ?"
+SQL_ALL_RIDES = f"SELECT {_RIDE_COLUMNS} FROM rides ORDER BY id"
+SQL_RIDES_BY_STATUS = f"SELECT {_RIDE_COLUMNS} FROM rides WHERE status = ? ORDER BY id"
+SQL_RIDES_BY_DRIVER = f"SELECT {_RIDE_COLUMNS} FROM rides WHERE ride_driver = ? ORDER BY id"
+SQL_RIDES_BY_PARTICIPANT = (f"SELECT {_RIDE_COLUMNS} FROM rides WHERE id IN "
+                            "(SELECT ride_id FROM participations WHERE participant_alias = ?) ORDER BY id")
+SQL_RIDES_PAGE = f"SELECT {_RIDE_COLUMNS} FROM rides WHERE id > ? ORDER BY id LIMIT ?"
+SQL_RIDES_PAGE_BY_STATUS = f"SELECT {_RIDE_COLUMNS} FROM rides WHERE status = ? AND id > ? ORDER BY id LIMIT ?"
+SQL_RIDES_OF_USER_PAGE = (f"SELECT {_RIDE_COLUMNS} FROM rides WHERE id > ? AND (ride_driver = ? OR id IN "
+                          "(SELECT ride_id FROM participations WHERE participant_alias = ?)) ORDER BY id LIMIT ?")
+# ventana temporal: los textos ISO ordenan igual que las fechas; NULL = sin cota
+SQL_RIDES_BETWEEN = (f"SELECT {_RIDE_COLUMNS} FROM rides "
+                     "WHERE ride_date_and_time >= COALESCE(?1, '') AND ride_date_and_time <= COALESCE(?2, '~') "
+                     "AND (ride_date_and_time, id) > (COALESCE(?3, ''), COALESCE(?4, -9223372036854775808)) "
+                     "AND (?5 IS NULL OR status = ?5) ORDER BY ride_date_and_time, id LIMIT ?6")
+SQL_NEXT_RIDE_ID = ("SELECT MAX(COALESCE((SELECT MAX(id) FROM rides), 0), "
+                    "COALESCE((SELECT MAX(id) FROM ride_ids), 0)) + 1")
+# un único INSERT es atómico también entre procesos
+SQL_ALLOCATE_RIDE_ID = ("INSERT INTO ride_ids (id) SELECT MAX(COALESCE((SELECT MAX(id) FROM rides), 0), "
+                        "COALESCE((SELECT MAX(id) FROM ride_ids), 0)) + 1")
+SQL_INSERT_RIDE = f"INSERT INTO rides ({_RIDE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# la versión la sube la base: cada escritura confirmada da un número nuevo
+# aunque otro worker haya partido del mismo (clave de la caché de JSON)
+SQL_UPDATE_RIDE_STATUS = "UPDATE rides SET status = ?, version = version + 1 WHERE id = ? RETURNING version"
+SQL_BUMP_RIDE_VERSION = "UPDATE rides SET version = version + 1 WHERE id = ? RETURNING version"
+SQL_UPDATE_RIDE_DESTINATION = ("UPDATE rides SET final_address = ?, final_lat = ?, final_lon = ?, "
+                               "version = version + 1 WHERE id = ? RETURNING version")
+
+SQL_PARTS_OF_RIDE = f"SELECT {_PART_COLUMNS} FROM participations WHERE ride_id = ? ORDER BY position"
+SQL_PARTS_OF_ALIAS = f"SELECT {_PART_COLUMNS} FROM participations WHERE participant_alias = ? ORDER BY ride_id"
+# contadores del historial: usan los índices por conductor y por alias
+SQL_USER_STATS = ("SELECT status, COUNT(*) FROM rides WHERE ride_driver = ?1 GROUP BY status UNION ALL "
+                  "SELECT status, COUNT(*) FROM participations WHERE participant_alias = ?1 GROUP BY status")
+SQL_INSERT_PART = ("INSERT INTO participations (ride_id, position, participant_alias, destination, "
+                   "occupied_spaces, confirmation, status) VALUES (?, ?, ?, ?, ?, ?, ?)")
+SQL_UPDATE_PART = ("UPDATE participations SET status = ?, confirmation = ? "
+                   "WHERE ride_id = ? AND participant_alias = ?")
+
+
+_MIN_ID = -(1 << 63)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _participation(row) -> RideParticipation:
+    return RideParticipation(participant_alias=row[1], destination=row[2], occupied_spaces=row[3],
+                             confirmation=row[4], status=row[5])
+
+
+class _History(Sequence):
+    """``rides`` of a :class:`_StoredUser`: its length comes from the stats
+    query; the rides and participations are only loaded if someone reads them."""
+
+    __slots__ = ("_handler", "_alias", "_total", "_items")
+
+    def __init__(self, handler: "SQLiteDataHandler", alias: str, total: int):
+        self._handler, self._alias, self._total, self._items = handler, alias, total, None
+
+    def _load(self) -> list:
+        if self._items is None:
+            # rides que conduce + participaciones (sin orden cronológico)
+            driven = self._handler._load_rides(SQL_RIDES_BY_DRIVER, (self._alias,))
+            joined = [_participation(p) for p in self._handler._conn().execute(SQL_PARTS_OF_ALIAS, (self._alias,))]
+            self._items = driven + joined
+        return self._items
+
+    def __len__(self) -> int:
+        return self._total if self._items is None else len(self._items)
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+
+class _StoredUser(User):
+    """User read from SQLite. Its stats are counted by the database when it is
+    loaded (a snapshot, like every object of this backend) instead of by
+    subscribing to each ride of the history."""
+
+    __slots__ = ()
+
+    def __post_init__(self):
+        pass
+
+    def get_ride_stats(self) -> dict:
+        return ride_stats(len(self.rides), self._stats)
+
+    def rebuild_ride_stats(self):
+        pass
+
+
+class SQLiteDataHandler(Storage):
+    """SQLite implementation of :class:`Storage` (one connection per thread, WAL)."""
+
+    # varios workers sobre el mismo archivo
+    shared: ClassVar[bool] = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._listeners: List[Callable] = []
+        self._ride_locks = KeyedLocks()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, declaration in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+    # ---------- pool de conexiones (una por hilo) ----------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # cada conexión la usa solo su hilo; close() las cierra desde otro
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=256, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # ---------- lectura ----------
+    def _load_rides(self, sql: str, params: tuple) -> List[Ride]:
+        conn = self._conn()
+        rows = conn.execute(sql, params).fetchall()
+        rides = []
+        for row in rows:
+            ride = Ride(id=row[0], ride_date_and_time=row[1], final_address=row[2], allowed_spaces=row[3],
+                        ride_driver=row[4], status=row[5], final_lat=row[7], final_lon=row[8],
+                        participants=[_participation(p) for p in conn.execute(SQL_PARTS_OF_RIDE, (row[0],))])
+            ride._version = row[6]
+            ride.subscribe(self._on_ride_event)
+            rides.append(ride)
+        return rides
+
+    def _load_user(self, row) -> User:
+        # una sola consulta agregada; el historial se carga solo si se lee
+        counts = {}
+        for status, count in self._conn().execute(SQL_USER_STATS, (row[0],)):
+            counts[status] = counts.get(status, 0) + count
+        user = _StoredUser(alias=row[0], name=row[1], carPlate=row[2],
+                           rides=_History(self, row[0], sum(counts.values())))
+        user._stats = counts
+        return user
+
+    def get_user(self, alias: str) -> Optional[User]:
+        row = self._conn().execute(SQL_GET_USER, (alias,)).fetchone()
+        return self._load_user(row) if row else None
+
+    def get_ride(self, rideid: int) -> Optional[Ride]:
+        rides = self._load_rides(SQL_GET_RIDE, (rideid,))
+        return rides[0] if rides else None
+
+    @property
+    def users(self) -> List[User]:
+        return [self._load_user(row) for row in self._conn().execute(SQL_ALL_USERS).fetchall()]
+
+    @property
+    def rides(self) -> List[Ride]:
+        return self._load_rides(SQL_ALL_RIDES, ())
+
+    @property
+    def next_ride_id(self) -> int:
+        return self._conn().execute(SQL_NEXT_RIDE_ID).fetchone()[0]
+
+    def rides_with_status(self, status: RideStatus | str) -> List[Ride]:
+        try:
+            status = RideStatus(status)
+        except ValueError:
+            return []
+        return self._load_rides(SQL_RIDES_BY_STATUS, (status.value,))
+
+    def rides_driven_by(self, alias: str) -> List[Ride]:
+        return self._load_rides(SQL_RIDES_BY_DRIVER, (alias,))
+
+    def rides_joined_by(self, alias: str) -> List[Ride]:
+        return self._load_rides(SQL_RIDES_BY_PARTICIPANT, (alias,))
+
+    # ---------- páginas ----------
+    def users_page(self, after: Optional[str] = None, limit: Optional[int] = None) -> List[User]:
+        limit = -1 if limit is None else limit
+        if after is None:
+            rows = self._conn().execute(SQL_USERS_PAGE, (limit,)).fetchall()
+        else:
+            rows = self._conn().execute(SQL_USERS_PAGE_AFTER, (after, limit)).fetchall()
+        return [self._load_user(row) for row in rows]
+
+    def rides_page(self, after: Optional[int] = None, limit: Optional[int] = None,
+                   status: RideStatus | str | None = None) -> List[Ride]:
+        after = _MIN_ID if after is None else after
+        limit = -1 if limit is None else limit
+        if status is None:
+            return self._load_rides(SQL_RIDES_PAGE, (after, limit))
+        try:
+            status = RideStatus(status)
+        except ValueError:
+            return []
+        return self._load_rides(SQL_RIDES_PAGE_BY_STATUS, (status.value, after, limit))
+
+    def rides_of_user_page(self, alias: str, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Ride]:
+        after = _MIN_ID if after is None else after
+        return self._load_rides(SQL_RIDES_OF_USER_PAGE, (after, alias, alias, -1 if limit is None else limit))
+
+    def rides_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      after: Optional[Tuple[datetime, int]] = None, limit: Optional[int] = None,
+                      status: RideStatus | str | None = None) -> List[Ride]:
+        if status is not None:
+            try:
+                status = RideStatus(status).value
+            except ValueError:
+                return []
+        after_time, after_id = (_iso(after[0]), after[1]) if after else (None, None)
+        return self._load_rides(SQL_RIDES_BETWEEN, (_iso(start), _iso(end), after_time, after_id, status,
+                                                    -1 if limit is None else limit))
+
+    # ---------- escritura ----------
+    def allocate_ride_id(self) -> int:
+        with self._writing() as conn:
+            return conn.execute(SQL_ALLOCATE_RIDE_ID).lastrowid
+
+    def ride_lock(self, rideid: int) -> "_RideLock":
+        # el lock del proceso más una transacción de escritura: otro worker
+        # sobre el mismo archivo espera también; cada request relee el ride bajo el lock
+        return _RideLock(self, self._ride_locks(rideid))
+
+    @contextmanager
+    def _writing(self):
+        conn = self._conn()
+        if getattr(self._local, "ride_locks", 0):
+            yield conn      # dentro de ride_lock: se confirma al soltarlo
+        else:
+            with conn:
+                yield conn
+
+    def add_user(self, user: User):
+        try:
+            with self._writing() as conn:
+                conn.execute(SQL_INSERT_USER, (user.alias, user.name, user.carPlate))
+        except sqlite3.IntegrityError:
+            raise ValueError("User already exists")
+        self._emit("user_created", user)
+
+    def add_ride(self, ride: Ride):
+        try:
+            with self._writing() as conn:
+                conn.execute(SQL_INSERT_RIDE, (ride.id, _iso(ride.ride_date_and_time), ride.final_address,
+                                               ride.allowed_spaces, ride.ride_driver, ride.status.value,
+                                               ride.version, ride.final_lat, ride.final_lon))
+                conn.executemany(SQL_INSERT_PART, [
+                    (ride.id, pos, p.participant_alias, p.destination, p.occupied_spaces,
+                     _iso(p.confirmation), p.status.value)
+                    for pos, p in enumerate(ride.participants)])
+        except sqlite3.IntegrityError:
+            raise ValueError("Ride already exists")
+        ride.subscribe(self._on_ride_event)
+        self._emit("ride_created", ride)
+
+    def _on_ride_event(self, ride: Ride, event: str, participation: Optional[RideParticipation]):
+        with self._writing() as conn:
+            if event == "joined":
+                p = participation
+                conn.execute(SQL_INSERT_PART, (ride.id, len(ride.participants) - 1, p.participant_alias,
+                                               p.destination, p.occupied_spaces, _iso(p.confirmation),
+                                               p.status.value))
+            elif event in ("started", "ended"):
+                ride._version = conn.execute(SQL_UPDATE_RIDE_STATUS, (ride.status.value, ride.id)).fetchone()[0]
+                conn.executemany(SQL_UPDATE_PART, [
+                    (p.status.value, _iso(p.confirmation), ride.id, p.participant_alias)
+                    for p in ride.participants])
+            elif event == "relocated":
+                ride._version = conn.execute(SQL_UPDATE_RIDE_DESTINATION, (
+                    ride.final_address, ride.final_lat, ride.final_lon, ride.id)).fetchone()[0]
+            else:  # accepted / rejected / unloaded
+                p = participation
+                conn.execute(SQL_UPDATE_PART, (p.status.value, _iso(p.confirmation), ride.id,
+                                               p.participant_alias))
+            if event in ("joined", "accepted", "rejected", "unloaded"):
+                ride._version = conn.execute(SQL_BUMP_RIDE_VERSION, (ride.id,)).fetchone()[0]
+        self._emit(event, ride, participation)
+
+    # ---------- eventos ----------
+    def subscribe(self, listener: Callable):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable):
+        self._listeners.remove(listener)
+
+    def _emit(self, event: str, subject, participation: Optional[RideParticipation] = None):
+        for listener in self._listeners:
+            listener(event, subject, participation)
+
+
+class _RideLock:
+    """``ride_lock`` of the SQLite backend: the in-process lock of the ride
+    plus, for the outermost holder in a thread, a ``BEGIN IMMEDIATE``
+    transaction. SQLite admits one writer per file, so a worker in another
+    process blocks until this one commits and then reads the fresh row:
+    two workers cannot both accept against the last seat."""
+
+    def __init__(self, handler: SQLiteDataHandler, lock: threading.RLock):
+        self._handler = handler
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        local = self._handler._local
+        depth = getattr(local, "ride_locks", 0)
+        if depth == 0:
+            try:
+                self._handler._conn().execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self._lock.release()
+                raise
+        local.ride_locks = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        local = self._handler._local
+        local.ride_locks -= 1
+        try:
+            if local.ride_locks == 0:
+                conn = self._handler._conn()
+                # el modelo valida antes de cambiar nada: un error deja la base como estaba
+                conn.rollback() if exc_type else conn.commit()
+        finally:
+            self._lock.release()
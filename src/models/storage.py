@@ -0,0 +1,112 @@
+# src/models/storage.py
+# Interfaz común de almacenamiento: la implementan el DataHandler en memoria
+# (por defecto) y SQLiteDataHandler.
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import datetime
+from operator import attrgetter
+from typing import Callable, ClassVar, ContextManager, List, Optional, Tuple
+
+from .ride import Ride, RideStatus
+from .user import User
+
+
+class Storage(ABC):
+    """What the controller needs from a data handler."""
+
+    users: List[User]
+    rides: List[Ride]
+    next_ride_id: int
+    # las llamadas hacen I/O (AsyncStorage las delega a un hilo)
+    blocking: ClassVar[bool] = True
+    # otros procesos escriben el mismo almacenamiento: lo que se arma con los
+    # eventos de este proceso (índices, columnas) tiene que releerlo
+    shared: ClassVar[bool] = False
+
+    @abstractmethod
+    def get_user(self, alias: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_ride(self, rideid: int) -> Optional[Ride]: ...
+
+    @abstractmethod
+    def add_user(self, user: User): ...
+
+    @abstractmethod
+    def add_ride(self, ride: Ride): ...
+
+    @abstractmethod
+    def rides_with_status(self, status: RideStatus | str) -> List[Ride]: ...
+
+    @abstractmethod
+    def rides_driven_by(self, alias: str) -> List[Ride]: ...
+
+    @abstractmethod
+    def rides_joined_by(self, alias: str) -> List[Ride]: ...
+
+    @abstractmethod
+    def allocate_ride_id(self) -> int:
+        """Reserve a ride id atomically; concurrent callers never get the same one."""
+
+    @abstractmethod
+    def ride_lock(self, rideid: int) -> ContextManager:
+        """Lock (context manager) to hold while reading-and-mutating ride ``rideid``."""
+
+    @abstractmethod
+    def subscribe(self, listener: Callable): ...
+
+    @abstractmethod
+    def unsubscribe(self, listener: Callable): ...
+
+    def rides_of_user(self, alias: str) -> List[Ride]:
+        """Rides the user drives or has requested to join, ordered by id."""
+        rides = {r.id: r for r in self.rides_driven_by(alias)}
+        rides.update((r.id, r) for r in self.rides_joined_by(alias))
+        return [rides[rideid] for rideid in sorted(rides)]
+
+    # ---------- páginas (keyset: lo que sigue a la última clave vista) ----------
+    # implementaciones genéricas; los backends las reemplazan por versiones indexadas
+    def users_page(self, after: Optional[str] = None, limit: Optional[int] = None) -> List[User]:
+        """Users in creation order following the one aliased ``after``
+        (nothing if that alias does not exist)."""
+        users = self.users
+        start = 0
+        if after is not None:
+            start = next((i + 1 for i, u in enumerate(users) if u.alias == after), len(users))
+        return users[start:] if limit is None else users[start:start + limit]
+
+    def rides_page(self, after: Optional[int] = None, limit: Optional[int] = None,
+                   status: RideStatus | str | None = None) -> List[Ride]:
+        """Rides with ``id > after`` ordered by id, optionally with ``status``."""
+        rides = sorted(self.rides_with_status(status) if status is not None else self.rides,
+                       key=attrgetter("id"))
+        return _slice_after(rides, after, limit)
+
+    def rides_of_user_page(self, alias: str, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Ride]:
+        """Page of :meth:`rides_of_user`."""
+        return _slice_after(self.rides_of_user(alias), after, limit)
+
+    def rides_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      after: Optional[Tuple[datetime, int]] = None, limit: Optional[int] = None,
+                      status: RideStatus | str | None = None) -> List[Ride]:
+        """Rides departing in ``[start, end]`` ordered by (departure, id),
+        following the key ``after``; either bound may be open."""
+        rides = sorted(self.rides_with_status(status) if status is not None else self.rides,
+                       key=departure_key)
+        rides = [r for r in rides if (start is None or r.ride_date_and_time >= start)
+                 and (end is None or r.ride_date_and_time <= end)
+                 and (after is None or departure_key(r) > after)]
+        return rides if limit is None else rides[:limit]
+
+
+def departure_key(ride: Ride) -> Tuple[datetime, int]:
+    """Sort key of the time index."""
+    return ride.ride_date_and_time, ride.id
+
+
+def _slice_after(rides: List[Ride], after: Optional[int], limit: Optional[int]) -> List[Ride]:
+    # rides ordenados por id
+    start = 0 if after is None else bisect_right(rides, after, key=attrgetter("id"))
+    return rides[start:] if limit is None else rides[start:start + limit]
@@ -1,26 +1,108 @@
 from __future__ import annotations
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Union
 from dataclasses import dataclass, field
 from .ride_participation import RideParticipation
+from .ride import Ride
+from .profiling import profiled
 
-@dataclass
+# cambio de estado que implica cada evento de un Ride (para los rides que conduce)
+_RIDE_TRANSITIONS = {"started": ("ready", "inprogress"), "ended": ("inprogress", "done")}
+
+def ride_stats(total: int, counts: Dict[str, int]) -> dict:
+    """Stats payload of a user from its history size and per-status counts."""
+    return {
+        "previousRidesTotal": total,
+        "previousRidesCompleted": counts.get("done", 0),
+        "previousRidesMissing": counts.get("missing", 0),
+        "previousRidesNotMarked": counts.get("notmarked", 0),
+        "previousRidesRejected": counts.get("rejected", 0),
+    }
+
+
+@dataclass(slots=True)
 class User:
     alias: str
     name: str
     carPlate: Optional[str] = None  # Can be None for participants
-    rides: List[RideParticipation] = field(default_factory=list)
+    rides: List[Union[RideParticipation, Ride]] = field(default_factory=list)
+    # contadores por estado y elementos de self.rides a los que estamos suscritos
+    _stats: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _watched: list = field(default_factory=list, init=False, repr=False, compare=False)
+    # posición del primer elemento de self.rides que no fue archivado
+    _live_from: int = field(default=0, init=False, repr=False, compare=False)
+    # rides distintos pueden cambiar a la vez participaciones del mismo usuario
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.rebuild_ride_stats()
+
+    def add_ride(self, ride: Union[RideParticipation, Ride]):
+        """Append to the user's history keeping the stats counters live."""
+        self.rides.append(ride)
+        self._watch(ride)
+
+    def replace_history(self, replacements: Dict[int, object]):
+        """Swap items of ``rides`` (keyed by ``id(item)``) for stand-ins with
+        the same status, e.g. when their ride is archived; stats don't change.
 
+        Rides are archived roughly in the order they were joined, so the scan
+        starts at the first item not archived yet and stops once all are found."""
+        rides, watched = self.rides, self._watched
+        parallel = len(watched) == len(rides)       # _watched sigue el orden de rides
+        remaining = len(replacements)
+        i = self._live_from
+        while remaining and i < len(rides):
+            item = rides[i]
+            new = replacements.get(id(item))
+            if new is not None:
+                rides[i] = new
+                if parallel:
+                    item.unsubscribe(self._on_ride_event if isinstance(item, Ride) else self._on_status)
+                    watched[i] = new
+                remaining -= 1
+            i += 1
+        while self._live_from < len(rides) and not isinstance(rides[self._live_from], (Ride, RideParticipation)):
+            self._live_from += 1
+        if not parallel:
+            self.rebuild_ride_stats()
+
+    @profiled("user.get_ride_stats")
     def get_ride_stats(self) -> dict:
         """Return statistics about the user's ride participations."""
-        total = len(self.rides)
-        completed = sum(rp.status == "done" for rp in self.rides)
-        missing = sum(rp.status == "missing" for rp in self.rides)
-        not_marked = sum(rp.status == "notmarked" for rp in self.rides)
-        rejected = sum(rp.status == "rejected" for rp in self.rides)
-        return {
-            "previousRidesTotal": total,
-            "previousRidesCompleted": completed,
-            "previousRidesMissing": missing,
-            "previousRidesNotMarked": not_marked,
-            "previousRidesRejected": rejected,
-        } 
\ No newline at end of file
+        if len(self._watched) != len(self.rides):
+            # self.rides fue modificada directamente: recontar en una pasada
+            self.rebuild_ride_stats()
+        return ride_stats(len(self.rides), self._stats)
+
+    def rebuild_ride_stats(self):
+        """Recount the stats from ``rides`` in a single pass."""
+        for item in self._watched:
+            item.unsubscribe(self._on_ride_event if isinstance(item, Ride) else self._on_status)
+        self._watched = []
+        self._stats = {}
+        self._live_from = 0
+        for item in self.rides:
+            self._watch(item)
+
+    # ---------- contadores ----------
+    def _watch(self, item: Union[RideParticipation, Ride]):
+        self._count(item.status, 1)
+        item.subscribe(self._on_ride_event if isinstance(item, Ride) else self._on_status)
+        self._watched.append(item)
+
+    def _count(self, status, delta: int):
+        # _value_ y no .value: la propiedad de Enum es lenta y esto corre por cada estado cargado
+        key = getattr(status, "_value_", status)
+        with self._lock:
+            self._stats[key] = self._stats.get(key, 0) + delta
+
+    def _on_status(self, participation: RideParticipation, old, new):
+        self._count(old, -1)
+        self._count(new, 1)
+
+    def _on_ride_event(self, ride: Ride, event: str, participation):
+        if event in _RIDE_TRANSITIONS:
+            old, new = _RIDE_TRANSITIONS[event]
+            self._count(old, -1)
+            self._count(new, 1)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # --- Básicos ---
 class UserSchema(BaseModel):
@@ -27,3 +27,92 @@ class RideSchema(BaseModel):
     rideDriver: str
     status: str
     participants: List[RideParticipationSchema] = []
+    finalLat: Optional[float] = None    # coordenadas opcionales del destino
+    finalLon: Optional[float] = None
+
+# --- Lotes ---
+class RideCreateSchema(BaseModel):
+    rideDateAndTime: datetime
+    finalAddress: str
+    allowedSpaces: int
+    rideDriver: str
+    finalLat: Optional[float] = Field(None, ge=-90, le=90)
+    finalLon: Optional[float] = Field(None, ge=-180, le=180)
+
+class BulkRidesSchema(BaseModel):
+    rides: List[RideCreateSchema]
+    atomic: bool = False        # todo o nada
+
+class BatchAliasesSchema(BaseModel):
+    aliases: List[str]
+    atomic: bool = False        # todo o nada
+
+class BatchItemSchema(BaseModel):
+    key: str                    # alias, o posición en el lote de rides
+    status_code: int            # el que habría devuelto el endpoint individual
+    detail: str
+    ride: RideSchema | None = None
+
+class BatchResultSchema(BaseModel):
+    applied: int
+    results: List[BatchItemSchema]
+
+# --- Estadísticas ---
+class DriverStatsSchema(BaseModel):
+    driver: str
+    rides: int
+    seatsOffered: int
+    seatsOccupied: int
+    occupancyRate: float
+
+class UserStatsSchema(BaseModel):
+    alias: str
+    participations: int         # en rides que ya arrancaron
+    missing: int
+    missingRate: float
+
+class HourStatsSchema(BaseModel):
+    hour: int
+    rides: int
+
+class DestinationStatsSchema(BaseModel):
+    destination: str
+    rides: int
+    seatsOffered: int
+    seatsOccupied: int
+    utilization: float
+
+class SchedulerStatsSchema(BaseModel):
+    queueDepth: int             # timers pendientes (incluye los ya obsoletos)
+    lagSeconds: float           # atraso del timer vencido más viejo
+    sweeps: int
+    started: int                # rides arrancados automáticamente
+    expired: int                # rides cerrados por viejos
+    lastSweepMs: float
+    maxSweepMs: float
+
+class ArchiveStatsSchema(BaseModel):
+    archived: int               # rides fuera de memoria
+    pending: int                # terminados esperando el período de gracia
+    blocks: int
+    compressedBytes: int
+    hotRides: int               # rides que siguen en memoria
+    unencoded: int = 0          # del snapshot, todavía sin pasar a bloques (RIDES_FAST_START)
+
+# --- Búsqueda ---
+class RideMatchSchema(BaseModel):
+    score: float                # coincidencia del destino (+ cercanía si se dio lat/lon)
+    ride: RideSchema
+
+# --- Perfilado ---
+class ProfileSpanSchema(BaseModel):
+    stack: str                  # "GET /ruta;span;span"
+    count: int
+    totalMs: float
+    selfMs: float               # sin contar los spans hijos
+
+class ProfileSchema(BaseModel):
+    enabled: bool
+    sampleRate: float
+    sampledRequests: int
+    spans: List[ProfileSpanSchema]
@@ -0,0 +1,130 @@
+# src/serialization.py
+# Construcción de RideSchema en un solo lugar y caché de los rides ya
+# codificados a JSON: los listados que se consultan una y otra vez devuelven
+# bytes guardados en vez de rehacer los modelos Pydantic en cada request.
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from src.models.profiling import profiled
+from src.models.ride import Ride
+from src.models.user import User
+from src.schemas import RideSchema, RideParticipationSchema, UserSchema
+
+# vistas de un ride: "listing" con participaciones (GET /rides),
+# "summary" sin ellas (GET /usuarios/{alias}/rides)
+
+
+def ride_schema(ride: Ride, participants: bool = True) -> RideSchema:
+    return RideSchema(
+        id=ride.id,
+        rideDateAndTime=ride.ride_date_and_time,
+        finalAddress=ride.final_address,
+        allowedSpaces=ride.allowed_spaces,
+        rideDriver=ride.ride_driver,
+        status=ride.status.value,
+        participants=[RideParticipationSchema(
+            confirmation=p.confirmation,
+            destination=p.destination,
+            occupiedSpaces=p.occupied_spaces,
+            status=p.status.value,
+        ) for p in ride.participants] if participants else [],
+        finalLat=ride.final_lat,
+        finalLon=ride.final_lon,
+    )
+
+
+def encode_ride(ride: Ride, view: str) -> bytes:
+    return ride_schema(ride, participants=view == "listing").model_dump_json().encode()
+
+
+def encode_user_summary(user: User) -> bytes:
+    # como GET /usuarios: rides son solo índices (demo)
+    return UserSchema(alias=user.alias, name=user.name, carPlate=user.carPlate,
+                      rides=list(range(len(user.rides)))).model_dump_json().encode()
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+class RideJSONCache:
+    """LRU of encoded rides keyed by ``(ride id, view)``, bounded in bytes.
+
+    Each entry remembers the ``Ride.version`` it was encoded at, so any
+    mutation of the ride makes the next lookup a miss. ``max_bytes=0``
+    disables storing (every lookup encodes)."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[int, bytes]]" = OrderedDict()
+        self._owner = None
+        self._lock = threading.Lock()
+
+    def get(self, ride: Ride, view: str = "listing", owner: Hashable = None) -> bytes:
+        return self.get_many([ride], view, owner)[0]
+
+    @profiled("ride_cache.get_many")
+    def get_many(self, rides: Iterable[Ride], view: str = "listing", owner: Hashable = None) -> List[bytes]:
+        """Encoded ``rides`` in order. ``owner`` is the storage they came
+        from: a new owner empties the cache (ids of different stores are
+        unrelated)."""
+        out: List[bytes] = []
+        missing = []
+        with self._lock:        # un solo lock para todas las búsquedas
+            if owner is not self._owner:
+                self._clear()
+                self._owner = owner
+            entries = self._entries
+            for ride in rides:
+                key = (ride.id, view)
+                version = ride.version      # antes de codificar: un cambio a mitad da una versión nueva
+                entry = entries.get(key)
+                if entry is not None and entry[0] == version:
+                    entries.move_to_end(key)
+                    out.append(entry[1])
+                else:
+                    missing.append((len(out), ride, key, version))
+                    out.append(b"")
+            self.hits += len(out) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            for index, ride, key, version in missing:
+                out[index] = encode_ride(ride, view)
+            with self._lock:
+                for index, ride, key, version in missing:
+                    self._store(key, version, out[index])
+        return out
+
+    def _store(self, key: Tuple[int, str], version: int, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1])
+        self._entries[key] = (version, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes}
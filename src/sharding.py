@@ -0,0 +1,612 @@
+# src/sharding.py
+# Despliegue en varios procesos. Cada shard es un proceso con la app de
+# src.controller sobre un ShardDataHandler (su parte de los rides y de los
+# usuarios); el front (ShardRouter, una app ASGI) reenvía cada request al
+# shard dueño: los rides por id, los usuarios por alias, crear un ride al
+# shard de su conductor. Los listados se piden a todos los shards y se
+# mezclan por clave (mismos cursores que un solo proceso) y los datos de
+# usuarios que viven en otros shards (p.ej. los participantes del detalle de
+# un ride) se piden en lote, un request por shard.
+# Front y shards hablan por multiprocessing.connection (socket Unix o TCP),
+# que deserializa con pickle lo que recibe: la clave de autenticación es lo
+# único que separa un puerto TCP de ejecutar código en el shard, así que TCP
+# exige RIDES_SHARD_KEY y los shards locales usan una clave aleatoria.
+#   RIDES_SHARDS=4 uvicorn src.sharding:app     (el front arranca 4 shards locales)
+#   python -m src.sharding shard 0/4 /tmp/rides-0.sock --peers /tmp/rides-0.sock,...,/tmp/rides-3.sock
+#   RIDES_SHARDS=/tmp/rides-0.sock,...,/tmp/rides-3.sock uvicorn src.sharding:app --workers 2
+from __future__ import annotations
+import argparse
+import asyncio
+import base64
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlencode
+
+from src.models.sharding import ShardDataHandler, shard_of_ride, shard_of_user
+
+DEFAULT_AUTHKEY = b"rides"       # pública: solo para sockets Unix
+AUTHKEY = os.environ.get("RIDES_SHARD_KEY", DEFAULT_AUTHKEY.decode()).encode()
+CONNECT_TIMEOUT = 30.0
+
+Address = object        # ruta de un socket Unix o (host, puerto)
+Reply = Tuple[int, list, bytes]
+
+_SCOPE_KEYS = ("type", "asgi", "http_version", "method", "scheme", "path", "raw_path",
+               "query_string", "root_path", "headers", "client", "server")
+_JSON = [(b"content-type", b"application/json")]
+
+
+def parse_address(text: str) -> Address:
+    """``host:port`` for TCP, anything else is a Unix socket path."""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return text
+
+
+def _check_channel(address: Address, authkey: bytes):
+    if isinstance(address, tuple) and authkey == DEFAULT_AUTHKEY:
+        raise RuntimeError(f"Set RIDES_SHARD_KEY to use the TCP shard address {address[0]}:{address[1]}")
+
+
+def request_scope(method: str, path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+            "root_path": "", "headers": [], "client": None, "server": None}
+
+
+# --- Lado del shard ------------------------------------
+class ShardServer:
+    """Serves an ASGI app to ``ShardClient``s; each connection carries many
+    concurrent requests, answered as they finish."""
+
+    def __init__(self, app, address: Address, authkey: bytes = AUTHKEY, lifespan: Optional[Callable] = None):
+        _check_channel(address, authkey)
+        self.app = app
+        self.address = address
+        self.authkey = authkey
+        self.lifespan = lifespan
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def serve_forever(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+        forever = asyncio.Event()
+        if self.lifespan is None:
+            await forever.wait()
+        else:
+            async with self.lifespan(self.app):
+                await forever.wait()
+
+    def _accept(self, listener: Listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        lock = threading.Lock()
+        pending: Dict[int, asyncio.Event] = {}      # request -> "el cliente se fue"
+
+        def reply(message: tuple):
+            with lock:
+                conn.send(message)
+
+        try:
+            while True:
+                self._loop.call_soon_threadsafe(self._dispatch, conn.recv(), reply, pending)
+        except (EOFError, OSError):
+            self._loop.call_soon_threadsafe(lambda: [gone.set() for gone in pending.values()])
+
+    def _dispatch(self, message: tuple, reply: Callable, pending: Dict[int, asyncio.Event]):
+        kind, rid = message[0], message[1]
+        if kind == "request":
+            pending[rid] = asyncio.Event()
+            self._loop.create_task(self._handle(rid, message[2], message[3], reply, pending))
+        elif kind == "cancel" and rid in pending:
+            pending[rid].set()
+
+    async def _handle(self, rid: int, scope: dict, body: bytes, reply: Callable,
+                      pending: Dict[int, asyncio.Event]):
+        gone = pending[rid]
+        received = False
+        started = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await gone.wait()        # p.ej. un stream SSE hasta que el cliente corta
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                reply(("start", rid, message["status"], message.get("headers", [])))
+            elif message["type"] == "http.response.body":
+                reply(("body", rid, message.get("body", b""), message.get("more_body", False)))
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            if not started:
+                reply(("start", rid, 500, _JSON))
+            reply(("body", rid, b'{"detail":"Internal Server Error"}', False))
+        finally:
+            pending.pop(rid, None)
+
+
+class PeerDirectory:
+    """``directory`` of a ShardDataHandler: asks the user's home shard."""
+
+    def __init__(self, addresses: Sequence[Address], authkey: bytes = AUTHKEY):
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self._clients: Dict[int, ShardClient] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, alias: str) -> Optional[dict]:
+        shard = shard_of_user(alias, len(self.addresses))
+        with self._lock:
+            client = self._clients.get(shard)
+            if client is None:
+                client = self._clients[shard] = ShardClient(self.addresses[shard], self.authkey)
+        status, _, body = client.fetch_sync("GET", "/_shard/users", urlencode({"alias": alias}).encode())
+        found = json.loads(body).get(alias) if status == 200 else None
+        return found if found and found["home"] else None
+
+
+# variables de src.controller que eligen un backend persistido: el controller
+# lo abriría al importarse y el shard lo reemplazaría sin escribir nunca en él
+PERSISTENCE_ENV = ("RIDES_DB", "RIDES_DATA_DIR")
+
+
+def _check_in_memory():
+    configured = [name for name in PERSISTENCE_ENV if os.environ.get(name)]
+    if configured:
+        raise RuntimeError(f"Shards are in memory only; unset {', '.join(configured)}")
+
+
+def serve_shard(shard: int, shards: int, address: Address, peers: Sequence[Address],
+                authkey: bytes = AUTHKEY):
+    """Run shard ``shard`` of ``shards`` (blocks). ``peers`` are the
+    addresses of every shard, this one included, in order.
+
+    Shards keep their data in memory only: RuntimeError if ``RIDES_DB`` or
+    ``RIDES_DATA_DIR`` is set."""
+    _check_in_memory()
+    for peer in [address, *peers]:
+        _check_channel(peer, authkey)
+    from src import controller
+    controller.data_handler = ShardDataHandler(shard=shard, shards=shards,
+                                               directory=PeerDirectory(peers, authkey))
+    ShardServer(controller.app, address, authkey, lifespan=controller.lifespan).serve_forever()
+
+
+# --- Lado del front ------------------------------------
+class ShardClient:
+    """Connection to one shard; requests are multiplexed by id."""
+
+    def __init__(self, address: Address, authkey: bytes = AUTHKEY):
+        _check_channel(address, authkey)
+        self._conn = Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+        self._sinks: Dict[int, Callable[[tuple], None]] = {}
+        self._ids = itertools.count(1)
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            while True:
+                message = self._conn.recv()
+                sink = self._sinks.get(message[1])
+                if sink is not None:
+                    sink(message)
+        except (EOFError, OSError):
+            for sink in list(self._sinks.values()):
+                sink(("error", 0))
+
+    def _open(self, scope: dict, body: bytes, sink: Callable[[tuple], None]) -> int:
+        rid = next(self._ids)
+        self._sinks[rid] = sink
+        portable = {key: scope[key] for key in _SCOPE_KEYS if key in scope}
+        with self._lock:
+            self._conn.send(("request", rid, portable, body))
+        return rid
+
+    def _finish(self, rid: int, cancel: bool):
+        self._sinks.pop(rid, None)
+        if cancel:
+            with self._lock:
+                self._conn.send(("cancel", rid))
+
+    async def stream(self, scope: dict, body: bytes = b"") -> AsyncIterator[tuple]:
+        """``("start", rid, status, headers)`` then ``("body", rid, chunk, more)`` messages."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        rid = self._open(scope, body, lambda message: loop.call_soon_threadsafe(queue.put_nowait, message))
+        finished = False
+        try:
+            while not finished:
+                message = await queue.get()
+                if message[0] == "error":
+                    raise ConnectionError("Lost connection to shard")
+                finished = message[0] == "body" and not message[3]
+                yield message
+        finally:
+            self._finish(rid, cancel=not finished)
+
+    async def fetch(self, scope: dict, body: bytes = b"") -> Reply:
+        status, headers, chunks = 500, [], []
+        async for message in self.stream(scope, body):
+            if message[0] == "start":
+                status, headers = message[2], message[3]
+            else:
+                chunks.append(message[2])
+        return status, headers, b"".join(chunks)
+
+    def fetch_sync(self, method: str, path: str, query: bytes = b"", timeout: float = 10.0) -> Reply:
+        done = threading.Event()
+        reply = [500, [], []]
+
+        def sink(message: tuple):
+            if message[0] == "start":
+                reply[0], reply[1] = message[2], message[3]
+            elif message[0] == "body":
+                reply[2].append(message[2])
+            # en "start" el último campo son los headers, no more_body
+            if message[0] == "error" or (message[0] == "body" and not message[3]):
+                done.set()
+
+        rid = self._open(request_scope(method, path, query), b"", sink)
+        finished = done.wait(timeout)
+        self._finish(rid, cancel=not finished)
+        if not finished:
+            raise TimeoutError(f"Shard did not answer {path} in {timeout} s")
+        return reply[0], reply[1], b"".join(reply[2])
+
+    def close(self):
+        self._conn.close()
+
+
+def _encode_cursor(key) -> str:
+    # el mismo formato que src.controller: los cursores sirven en cualquier shard
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _header(headers: list, name: bytes) -> Optional[bytes]:
+    return next((value for key, value in headers if key.lower() == name), None)
+
+
+async def _respond(send, status: int, body: bytes, headers: list = _JSON):
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body, "more_body": False})
+
+
+async def _error(send, status: int, detail: str):
+    await _respond(send, status, json.dumps({"detail": detail}).encode())
+
+
+async def _disconnected(receive):
+    """Returns when the client goes away (the body was already read)."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        if message["type"] == "http.request" and not message.get("more_body"):
+            await asyncio.Event().wait()        # sin más cuerpo: solo queda esperar la cancelación
+
+
+def _flag(params: Dict[str, List[str]], name: str) -> bool:
+    return params.get(name, ["false"])[0].lower() in ("1", "true", "yes", "on")
+
+
+_RIDE_DETAIL = re.compile(r"^/usuarios/[^/]+/rides/(\d+)$")
+_RIDE_PATH = re.compile(r"^/(?:usuarios/[^/]+/)?rides/(\d+)(?:/|$)")
+_USER_PATH = re.compile(r"^/usuarios/([^/]+)(/rides|/events)?$")
+
+
+class ShardRouter:
+    """ASGI front over ``len(addresses)`` shard servers, or over ``shards``
+    local shard processes started on first use."""
+
+    def __init__(self, addresses: Optional[Sequence[Address]] = None, shards: int = 0,
+                 authkey: bytes = AUTHKEY):
+        if not addresses and shards < 1:
+            raise ValueError("Need shard addresses or a number of shards to start")
+        self.addresses = list(addresses or [])
+        for address in self.addresses:
+            _check_channel(address, authkey)
+        self.shards = len(self.addresses) or shards
+        self.authkey = authkey
+        self.clients: List[ShardClient] = []
+        self._processes: List[subprocess.Popen] = []
+        self._connect_lock = threading.Lock()
+
+    # ---------- shards ----------
+    def connect(self):
+        with self._connect_lock:
+            if self.clients:
+                return
+            if not self.addresses:
+                self._start_local()
+            deadline = time.monotonic() + CONNECT_TIMEOUT
+            for address in self.addresses:
+                while True:
+                    try:
+                        self.clients.append(ShardClient(address, self.authkey))
+                        break
+                    except (FileNotFoundError, ConnectionRefusedError):
+                        if time.monotonic() > deadline or any(p.poll() is not None for p in self._processes):
+                            raise RuntimeError(f"Shard at {address} did not start")
+                        time.sleep(0.05)
+
+    def _start_local(self):
+        _check_in_memory()      # antes de lanzar procesos que saldrían con el mismo error
+        directory = tempfile.mkdtemp(prefix="rides-shards-")
+        self.addresses = [os.path.join(directory, f"shard-{k}.sock") for k in range(self.shards)]
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # clave propia de estos procesos: nadie más la conoce
+        self.authkey = os.urandom(32).hex().encode()
+        env = dict(os.environ, RIDES_SHARD_KEY=self.authkey.decode(),
+                   PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+        for k, address in enumerate(self.addresses):
+            self._processes.append(subprocess.Popen(
+                [sys.executable, "-m", "src.sharding", "shard", f"{k}/{self.shards}", address,
+                 "--peers", ",".join(self.addresses)], cwd=root, env=env))
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        for process in self._processes:
+            process.terminate()
+            process.wait()
+        self._processes = []
+
+    def user_shard(self, alias: str) -> ShardClient:
+        return self.clients[shard_of_user(alias, self.shards)]
+
+    def ride_shard(self, rideid: int) -> ShardClient:
+        return self.clients[shard_of_ride(rideid, self.shards)]
+
+    async def fan_out(self, scope: dict, body: bytes = b"") -> List[Reply]:
+        return await asyncio.gather(*(client.fetch(scope, body) for client in self.clients))
+
+    async def users(self, aliases: Sequence[str]) -> Dict[str, dict]:
+        """Profile and history size of each existing user, from every shard
+        (one request per shard for all of them)."""
+        if not aliases:
+            return {}
+        query = urlencode([("alias", alias) for alias in dict.fromkeys(aliases)]).encode()
+        found: Dict[str, dict] = {}
+        for status, _, body in await self.fan_out(request_scope("GET", "/_shard/users", query)):
+            if status != 200:
+                continue
+            for alias, info in json.loads(body).items():
+                user = found.setdefault(alias, {"home": False, "rides": 0})
+                user["rides"] += info["rides"]
+                if info["home"]:
+                    user.update(home=True, name=info["name"], carPlate=info["carPlate"])
+        return {alias: user for alias, user in found.items() if user["home"]}
+
+    # ---------- ASGI ----------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if not self.clients:
+            await asyncio.get_running_loop().run_in_executor(None, self.connect)
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        await self._route(scope, body, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await asyncio.get_running_loop().run_in_executor(None, self.connect)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, scope, body: bytes, receive, send):
+        path, method = scope["path"], scope["method"]
+        params = parse_qs(scope["query_string"].decode())
+        match = _RIDE_DETAIL.match(path)
+        if match and method == "GET":
+            return await self._ride_detail(self.ride_shard(int(match[1])), scope, send)
+        match = _RIDE_PATH.match(path)
+        if match:
+            return await self._relay(self.ride_shard(int(match[1])), scope, body, receive, send)
+        if path == "/usuarios" and method == "POST":
+            return await self._relay(self.user_shard(_json_field(body, "alias")), scope, body, receive, send)
+        if path == "/usuarios":
+            return await self._listing(scope, params, send, lambda user: user["alias"], users=True)
+        if path == "/rides" and method == "POST":
+            return await self._relay(self.user_shard(params.get("rideDriver", [""])[0]), scope, body, receive, send)
+        if path == "/rides":
+            by_departure = "from" in params or "to" in params
+            key = (lambda ride: [ride["rideDateAndTime"], ride["id"]]) if by_departure else (lambda ride: ride["id"])
+            return await self._listing(scope, params, send, key)
+        if path == "/rides/batch":
+            # todo el lote en un shard: valida y aplica como un solo proceso (atomic incluido)
+            rides = _json_field(body, "rides", [])
+            driver = rides[0].get("rideDriver", "") if rides and isinstance(rides[0], dict) else ""
+            return await self._relay(self.user_shard(driver), scope, body, receive, send)
+        if path == "/rides/search":
+            return await self._search(scope, params, send)
+        match = _USER_PATH.match(path)
+        if match and method == "GET":
+            alias, rest = match[1], match[2]
+            if rest is None:
+                return await self._user(alias, send)
+            if rest == "/rides":
+                return await self._listing(scope, params, send, lambda ride: ride["id"])
+            return await self._user_events(alias, scope, receive, send)
+        # estadísticas, métricas y perfilado son de cada proceso
+        shard = params.get("shard", [""])[0]
+        if not shard.isdigit() or int(shard) >= self.shards:
+            return await _error(send, 400, f"Per-shard endpoint: pass ?shard=0..{self.shards - 1}")
+        return await self._relay(self.clients[int(shard)], scope, body, receive, send)
+
+    # ---------- reenvío ----------
+    async def _relay(self, client: ShardClient, scope, body: bytes, receive, send):
+        async def pump():
+            async for message in client.stream(scope, body):
+                if message[0] == "start":
+                    await send({"type": "http.response.start", "status": message[2], "headers": message[3]})
+                else:
+                    await send({"type": "http.response.body", "body": message[2], "more_body": message[3]})
+
+        relay, watch = asyncio.ensure_future(pump()), asyncio.ensure_future(_disconnected(receive))
+        try:
+            await asyncio.wait((relay, watch), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watch.cancel()
+            if not relay.done():
+                relay.cancel()      # el cliente se fue: el shard suelta el stream
+        if relay.done() and not relay.cancelled():
+            relay.result()
+
+    async def _ride_detail(self, client: ShardClient, scope, send):
+        status, headers, body = await client.fetch(scope)
+        if status != 200:
+            return await _respond(send, status, body, headers)
+        ride = json.loads(body)
+        users = await self.users([p["participant"]["alias"] for p in ride["participants"] if p.get("participant")])
+        for p in ride["participants"]:
+            user = users.get(p["participant"]["alias"]) if p.get("participant") else None
+            if user:
+                p["participant"].update(name=user["name"], carPlate=user["carPlate"], rides=list(range(user["rides"])))
+        await _respond(send, 200, json.dumps(ride).encode())
+
+    async def _user(self, alias: str, send):
+        user = (await self.users([alias])).get(alias)
+        if user is None:
+            return await _error(send, 404, "User not found")
+        await _respond(send, 200, json.dumps({"alias": alias, "name": user["name"], "carPlate": user["carPlate"],
+                                              "rides": list(range(user["rides"]))}).encode())
+
+    async def _listing(self, scope, params, send, key: Callable, users: bool = False):
+        if _flag(params, "stream"):
+            return await _error(send, 400, "stream=true is not available through the shard router; page with limit/after")
+        replies = await self.fan_out(scope)
+        for status, headers, body in replies:
+            if status != 200:
+                return await _respond(send, status, body, headers)
+        items = list(heapq.merge(*(json.loads(body) for _, _, body in replies), key=key))
+        more = any(_header(headers, b"x-next-cursor") for _, headers, _ in replies)
+        limit = int(params["limit"][0]) if "limit" in params else None
+        if limit is not None and len(items) > limit:
+            items, more = items[:limit], True
+        headers = list(_JSON)
+        if limit is not None and more and items:
+            headers.append((b"x-next-cursor", _encode_cursor(key(items[-1])).encode()))
+        if users:
+            totals = await self.users([user["alias"] for user in items])
+            for user in items:
+                user["rides"] = list(range(totals.get(user["alias"], {}).get("rides", len(user["rides"]))))
+        await _respond(send, 200, json.dumps(items).encode(), headers)
+
+    async def _search(self, scope, params, send):
+        replies = await self.fan_out(scope)
+        for status, headers, body in replies:
+            if status != 200:
+                return await _respond(send, status, body, headers)
+        limit = int(params.get("limit", ["20"])[0])
+        matches = heapq.nsmallest(limit, (match for _, _, body in replies for match in json.loads(body)),
+                                  key=lambda m: (-m["score"], m["ride"]["rideDateAndTime"], m["ride"]["id"]))
+        await _respond(send, 200, json.dumps(matches).encode())
+
+    async def _user_events(self, alias: str, scope, receive, send):
+        if alias not in await self.users([alias]):
+            return await _error(send, 404, "User not found")
+        streams = [client.stream(scope) for client in self.clients]
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(stream):
+            async for message in stream:
+                if message[0] == "body" and message[2] and not message[2].startswith(b"retry:"):
+                    await queue.put(message[2])
+
+        async def forward():
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                                    (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")]})
+            await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+            while True:
+                await send({"type": "http.response.body", "body": await queue.get(), "more_body": True})
+
+        tasks = [asyncio.ensure_future(pump(stream)) for stream in streams]
+        tasks += [asyncio.ensure_future(forward()), asyncio.ensure_future(_disconnected(receive))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def _json_field(body: bytes, name: str, default=""):
+    try:
+        value = json.loads(body)
+    except ValueError:
+        return default
+    return value.get(name, default) if isinstance(value, dict) else default
+
+
+def _from_env() -> ShardRouter:
+    spec = os.environ.get("RIDES_SHARDS", str(os.cpu_count() or 1))
+    if spec.isdigit():
+        return ShardRouter(shards=int(spec))
+    return ShardRouter(addresses=[parse_address(address) for address in spec.split(",")])
+
+
+app = _from_env()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one shard server.")
+    parser.add_argument("command", choices=["shard"])
+    parser.add_argument("shard", help="k/N: this shard and the total")
+    parser.add_argument("address", help="Unix socket path or host:port to listen on")
+    parser.add_argument("--peers", required=True, help="comma-separated addresses of every shard, in order")
+    args = parser.parse_args()
+    shard, shards = (int(part) for part in args.shard.split("/"))
+    peers = [parse_address(address) for address in args.peers.split(",")]
+    if len(peers) != shards:
+        parser.error("--peers must list every shard")
+    try:
+        serve_shard(shard, shards, parse_address(args.address), peers)
+    except RuntimeError as e:
+        parser.exit(2, f"{parser.prog}: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# tests/test_analytics.py
+# Pruebas de las estadísticas columnares: agregaciones contra el cálculo con bucles y endpoints /stats.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src.models import analytics
+from src.models.analytics import Analytics, RideColumns
+from src.models.archive import RideArchive
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+
+def build() -> DataHandler:
+    dh = DataHandler()
+    for alias in ("d1", "d2", "p1", "p2", "p3"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    specs = [(1, "d1", "UTEC", 8, 3), (2, "d1", "Centro", 8, 2), (3, "d2", "UTEC", 17, 4)]
+    for rideid, driver, dest, hour, seats in specs:
+        ride = Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, hour), final_address=dest,
+                    allowed_spaces=seats, ride_driver=driver)
+        dh.add_ride(ride)
+        for alias in ("p1", "p2", "p3"):
+            ride.request_join(RideParticipation(participant_alias=alias, destination=dest, occupied_spaces=1))
+    r1, r2 = dh.get_ride(1), dh.get_ride(2)
+    r1.accept("p1")
+    r1.accept("p2")
+    r1.start()              # p3 missing
+    r1.get_participation("p1").mark_unloaded()
+    r1.end()                # p2 notmarked
+    r2.accept("p3")
+    r2.start()              # p1, p2 missing
+    dh.get_ride(3).accept("p2")
+    return dh
+
+
+# Success: occupancy per driver and utilization per destination match the loop version
+def test_seat_usage():
+    dh = build()
+    cols = RideColumns.from_rides(dh.rides)
+    by_driver = {row["driver"]: row for row in analytics.rows(analytics.occupancy_by_driver(cols))}
+    for driver in ("d1", "d2"):
+        rides = dh.rides_driven_by(driver)
+        assert by_driver[driver]["rides"] == len(rides)
+        assert by_driver[driver]["seatsOffered"] == sum(r.allowed_spaces for r in rides)
+        assert by_driver[driver]["seatsOccupied"] == sum(r.occupied for r in rides)
+    assert by_driver["d1"]["occupancyRate"] == pytest.approx(2 / 5)
+    by_dest = {row["destination"]: row for row in analytics.rows(analytics.utilization_by_destination(cols))}
+    assert by_dest["UTEC"]["rides"] == 2 and by_dest["UTEC"]["seatsOffered"] == 7
+    assert by_dest["UTEC"]["utilization"] == pytest.approx((1 + 1) / 7)
+    assert by_dest["Centro"]["utilization"] == pytest.approx(1 / 2)
+
+
+# Success: missing rate only counts rides that already started
+def test_missing_by_user():
+    cols = RideColumns.from_rides(build().rides)
+    by_user = {row["alias"]: row for row in analytics.rows(analytics.missing_by_user(cols))}
+    assert (by_user["p1"]["participations"], by_user["p1"]["missing"]) == (2, 1)
+    assert (by_user["p3"]["participations"], by_user["p3"]["missing"]) == (2, 1)
+    assert by_user["p2"]["missingRate"] == pytest.approx(1 / 2)
+
+
+# Success: rides per hour of the day
+def test_rides_by_hour():
+    hours = analytics.rides_by_hour(RideColumns.from_rides(build().rides))["rides"]
+    assert len(hours) == 24 and hours[8] == 2 and hours[17] == 1 and hours.sum() == 3
+
+
+# Success: empty storage gives empty tables and zero counts
+def test_empty():
+    cols = RideColumns.from_rides([])
+    assert analytics.rows(analytics.occupancy_by_driver(cols)) == []
+    assert analytics.rides_by_hour(cols)["rides"].sum() == 0
+
+
+# Success: columns are cached until an event marks them stale
+def test_analytics_cache():
+    dh = build()
+    stats = Analytics(dh, max_age=0)
+    first = stats.columns()
+    assert stats.columns() is first
+    dh.get_ride(3).start()
+    assert stats.columns() is not first and stats.rebuilds == 2
+    stats.close()
+
+
+# Success: archiving a finished ride leaves every statistic unchanged
+def test_stats_include_archive(monkeypatch):
+    dh = build()
+    monkeypatch.setattr(controller, "data_handler", dh)
+    monkeypatch.setenv("RIDES_STATS_MAX_AGE", "0")
+    client = TestClient(controller.app)
+    urls = ["/stats/drivers", "/stats/destinations", "/stats/users", "/stats/hours"]
+    key = lambda row: sorted(row.items())
+    before = {url: sorted(client.get(url).json(), key=key) for url in urls}
+    archive = RideArchive(dh, grace=0)
+    assert archive.sweep() == 1 and dh.loaded_ride(1) is None
+    dh.add_user(User(alias="p4", name="P4"))     # evento: las columnas se reconstruyen
+    after = {url: sorted(client.get(url).json(), key=key) for url in urls}
+    assert after == before
+    archive.close()
+
+
+# Success: /stats endpoints
+def test_stats_endpoints(monkeypatch):
+    monkeypatch.setattr(controller, "data_handler", build())
+    monkeypatch.setenv("RIDES_STATS_MAX_AGE", "0")
+    client = TestClient(controller.app)
+    drivers = client.get("/stats/drivers").json()
+    assert {d["driver"] for d in drivers} == {"d1", "d2"}
+    assert client.get("/stats/users").json()[0].keys() == {"alias", "participations", "missing", "missingRate"}
+    assert client.get("/stats/hours").json()[8] == {"hour": 8, "rides": 2}
+    assert len(client.get("/stats/destinations").json()) == 2
+    client.post("/usuarios/d2/rides/3/start")
+    users = {u["alias"]: u for u in client.get("/stats/users").json()}
+    assert users["p1"]["missing"] == 2
@@ -0,0 +1,138 @@
+# tests/test_archive.py
+# Pruebas del archivo: desalojo tras la gracia, lecturas bajo demanda, historial de usuarios y snapshots.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.models import archive as archive_module
+from src.models.archive import ArchivedEntry, RideArchive
+from src.models.data_handler import DataHandler
+from src.models.persistence import Persistence
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation, RPStatus
+from src.models.user import User
+
+BASE = datetime(2025, 7, 15, 8)
+
+
+def finish(ride: Ride, aliases=("p1", "p2")):
+    for alias in aliases:
+        ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+    ride.accept(aliases[0])
+    ride.start()
+    ride.get_participation(aliases[0]).mark_unloaded()
+    ride.end()
+
+
+def build(dh: DataHandler, n: int = 5) -> DataHandler:
+    for alias in ("d1", "p1", "p2"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    for rideid in range(1, n + 1):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=BASE + timedelta(hours=rideid), final_address="UTEC",
+                         allowed_spaces=2, ride_driver="d1"))
+    return dh
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# Success: done rides leave the hot indexes after the grace period
+def test_archive_after_grace():
+    dh = build(DataHandler())
+    clock = Clock()
+    archive = RideArchive(dh, grace=60, block_size=2, clock=clock)
+    for rideid in (1, 2, 3):
+        finish(dh.get_ride(rideid))
+    assert archive.sweep() == 0
+    clock.now = 61
+    assert archive.sweep() == 3
+    assert [r.id for r in dh.rides] == [4, 5]
+    assert [r.id for r in dh.rides_page()] == [4, 5]
+    assert dh.rides_with_status(RideStatus.done) == []
+    assert dh.rides_between() == [dh.get_ride(4), dh.get_ride(5)]
+    assert archive.stats()["blocks"] == 1 and len(archive) == 3
+    archive.close()
+
+
+# Success: archived rides are still found by id and by user
+def test_archive_lookups():
+    dh = build(DataHandler())
+    clock = Clock()
+    archive = RideArchive(dh, grace=0, block_size=2, clock=clock)
+    for rideid in (1, 2, 3):
+        finish(dh.get_ride(rideid))
+    archive.sweep()
+    ride = dh.get_ride(2)
+    assert ride.status is RideStatus.done and ride.get_participation("p1").status is RPStatus.done
+    assert ride.get_participation("p2").status is RPStatus.missing
+    assert dh.loaded_ride(2) is None and dh.get_ride(99) is None
+    assert [r.id for r in dh.rides_of_user("p1")] == [1, 2, 3]
+    assert [r.id for r in dh.rides_of_user("d1")] == [1, 2, 3, 4, 5]
+    assert [r.id for r in dh.rides_of_user_page("d1", after=2, limit=2)] == [3, 4]
+    archive.close()
+
+
+# Success: the id index keeps working once recent ids are merged into the sorted arrays
+def test_archive_index_merge(monkeypatch):
+    monkeypatch.setattr(archive_module, "_MERGE_EVERY", 3)
+    dh = build(DataHandler(), n=8)
+    archive = RideArchive(dh, grace=0, block_size=3, clock=Clock())
+    for rideid in (5, 1, 7, 3, 8, 2):
+        finish(dh.get_ride(rideid))
+    archive.sweep()
+    assert len(archive._ids) == 6 and not archive._recent
+    assert all(dh.get_ride(rideid).id == rideid for rideid in range(1, 9))
+
+
+# Success: user histories keep their stats with stand-ins
+def test_archive_user_history():
+    dh = build(DataHandler())
+    archive = RideArchive(dh, grace=0, clock=Clock())
+    finish(dh.get_ride(1))
+    before = dh.get_user("p2").get_ride_stats()
+    archive.sweep()
+    user = dh.get_user("p2")
+    assert isinstance(user.rides[0], ArchivedEntry)
+    assert user.get_ride_stats() == before and before["previousRidesMissing"] == 1
+    assert dh.get_user("d1").get_ride_stats()["previousRidesCompleted"] == 1
+
+
+# Success: snapshots include archived rides
+def test_archive_snapshot(tmp_path):
+    engine = Persistence(build(DataHandler()), str(tmp_path), snapshot_every=0)
+    archive = RideArchive(engine.data_handler, grace=0, clock=Clock())
+    finish(engine.data_handler.get_ride(1))
+    archive.sweep()
+    engine.snapshot()
+    engine.close()
+    dh = Persistence.open(str(tmp_path)).data_handler
+    assert dh.get_ride(1).status is RideStatus.done
+    assert dh.get_user("p1").get_ride_stats()["previousRidesCompleted"] == 1
+
+
+# Success: /stats/archive
+def test_archive_endpoint(monkeypatch):
+    monkeypatch.setenv("RIDES_ARCHIVE", "1")
+    monkeypatch.setattr(controller, "data_handler", build(DataHandler()))
+    client = TestClient(controller.app)
+    assert client.get("/stats/archive").json()["hotRides"] == 5
+
+# Error: the archive is opt-in; without RIDES_ARCHIVE=1 done rides stay listed
+def test_archive_off_by_default(monkeypatch):
+    monkeypatch.delenv("RIDES_ARCHIVE", raising=False)
+    dh = build(DataHandler())
+    dh.get_ride(1).start()
+    dh.get_ride(1).end()
+    monkeypatch.setattr(controller, "data_handler", dh)
+    with TestClient(controller.app) as client:
+        assert dh.archive is None
+        assert client.get("/stats/archive").status_code == 404
+        assert [r["id"] for r in client.get("/rides", params={"status": "done"}).json()] == [1]
@@ -0,0 +1,126 @@
+# tests/test_async_controller.py
+# Pruebas de la variante async: mismas rutas que el controller síncrono y
+# requests atendidos en el event loop (memoria) o en un hilo (SQLite).
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+from datetime import datetime
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+import src.async_controller as async_controller
+from src.models.async_storage import AsyncStorage
+from src.models.data_handler import DataHandler
+from src.models.persistence import Persistence
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.ride import Ride
+from src.models.user import User
+
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path, monkeypatch):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    monkeypatch.setattr(controller, "data_handler", handler)
+    yield TestClient(async_controller.app)
+    if request.param == "sqlite":
+        handler.close()
+
+
+# Success: same routes and methods as the sync controller
+def test_same_routes():
+    def routes(app):
+        return {(r.path, frozenset(r.methods), r.response_model) for r in app.routes if isinstance(r, APIRoute)}
+    assert routes(async_controller.app) == routes(controller.app)
+
+
+# Success: full ride flow through the async app
+def test_async_flow(client):
+    client.post("/usuarios", json={"alias": "drv", "name": "Driver", "carPlate": "ABC123"})
+    client.post("/usuarios", json={"alias": "p1", "name": "P1"})
+    rideid = client.post("/rides", params=dict(rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC",
+                                               allowedSpaces=2, rideDriver="drv")).json()["id"]
+    assert client.post(f"/usuarios/drv/rides/{rideid}/requestToJoin/p1",
+                       params={"destination": "UTEC"}).status_code == 200
+    assert client.post(f"/usuarios/drv/rides/{rideid}/accept/p1").json() == {"message": "Accepted"}
+    assert client.post(f"/usuarios/drv/rides/{rideid}/accept/p1").status_code == 422
+    detail = client.get(f"/usuarios/drv/rides/{rideid}").json()
+    assert detail["participants"][0]["participant"]["alias"] == "p1"
+    assert client.get("/rides", params={"status": "ready"}).json()[0]["participants"][0]["status"] == "confirmed"
+
+
+# Error: validation and HTTP errors behave like the sync app
+def test_async_errors(client):
+    assert client.get("/usuarios/ghost").status_code == 404
+    assert client.post("/rides", params={"finalAddress": "UTEC"}).status_code == 422
+
+
+# Success: the in-memory backend is called on the event loop, SQLite and a persisted handler in a worker thread
+def test_storage_dispatch(tmp_path):
+    calls = []
+
+    class Probe(DataHandler):
+        def get_user(self, alias):
+            calls.append(on_event_loop())
+            return super().get_user(alias)
+
+    class SQLiteProbe(SQLiteDataHandler):
+        def get_user(self, alias):
+            calls.append(on_event_loop())
+            return super().get_user(alias)
+
+    sqlite = SQLiteProbe(str(tmp_path / "rides.sqlite"))
+    def lookup(handler):
+        asyncio.run(AsyncStorage(handler).run(handler.get_user, "x"))
+
+    lookup(Probe())
+    lookup(sqlite)
+    sqlite.close()
+    persisted = Probe()
+    engine = Persistence(persisted, str(tmp_path / "data"))     # escribe snapshots: a un hilo
+    lookup(persisted)
+    engine.close()
+    lookup(persisted)
+    assert calls == [True, False, False, True]
+
+
+# Success: with the in-memory backend only entity lookups run on the event loop;
+# listings and ride transitions (which wait for ride_lock) go to the thread pool
+def test_heavy_routes_off_event_loop(monkeypatch):
+    calls = []
+
+    class Probe(DataHandler):
+        def get_user(self, alias):
+            calls.append(("get_user", on_event_loop()))
+            return super().get_user(alias)
+
+        def rides_page(self, *args, **kwargs):
+            calls.append(("rides_page", on_event_loop()))
+            return super().rides_page(*args, **kwargs)
+
+        def ride_lock(self, rideid):
+            calls.append(("ride_lock", on_event_loop()))
+            return super().ride_lock(rideid)
+
+    dh = Probe()
+    dh.add_user(User(alias="drv", name="Driver"))
+    dh.add_ride(Ride(id=1, ride_date_and_time=datetime.now(), final_address="X", allowed_spaces=1,
+                     ride_driver="drv"))
+    monkeypatch.setattr(controller, "data_handler", dh)
+    client = TestClient(async_controller.app)
+    calls.clear()
+    assert client.get("/usuarios/drv").status_code == 200
+    assert client.get("/rides").status_code == 200
+    assert client.post("/usuarios/drv/rides/1/start").status_code == 200
+    assert calls == [("get_user", True), ("rides_page", False), ("ride_lock", False)]
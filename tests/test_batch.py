@@ -0,0 +1,81 @@
+# tests/test_batch.py
+# Pruebas de los endpoints por lotes: resultados por ítem, modo todo-o-nada y creación masiva de rides.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime
+from fastapi import HTTPException
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.ride_participation import RPStatus
+from src.schemas import UserSchema, BatchAliasesSchema, BulkRidesSchema, RideCreateSchema
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path, monkeypatch):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    monkeypatch.setattr(controller, "data_handler", handler)
+    yield handler
+    if request.param == "sqlite":
+        handler.close()
+
+
+def reload(ride):
+    # SQLite devuelve objetos nuevos en cada consulta
+    return controller.data_handler.get_ride(ride.id)
+
+
+@pytest.fixture
+def ride(storage):
+    controller.create_user(UserSchema(alias="drv", name="Driver", carPlate="ABC123"))
+    for alias in ("p1", "p2", "p3", "p4"):
+        controller.create_user(UserSchema(alias=alias, name=alias.upper()))
+    rideid = controller.create_ride(datetime.now(), "UTEC", 2, "drv").id
+    for alias in ("p1", "p2", "p3", "p4"):
+        controller.request_to_join("drv", rideid, alias, destination="UTEC")
+    return controller.data_handler.get_ride(rideid)
+
+
+# Success: partial batch applies what it can and reports each item
+def test_batch_accept_partial(ride):
+    result = controller.accept_participants("drv", ride.id, BatchAliasesSchema(aliases=["p1", "ghost", "p2", "p3", "p1"]))
+    assert result.applied == 2
+    assert [(r.key, r.status_code) for r in result.results] == [
+        ("p1", 200), ("ghost", 422), ("p2", 200), ("p3", 422), ("p1", 422)]
+    assert result.results[3].detail == "No free seats"
+    assert reload(ride).occupied == 2
+
+# Error: atomic batch with one bad item changes nothing
+def test_batch_accept_atomic(ride):
+    with pytest.raises(HTTPException) as exc:
+        controller.accept_participants("drv", ride.id, BatchAliasesSchema(aliases=["p1", "p2", "p3"], atomic=True))
+    assert exc.value.status_code == 422
+    assert [item["status_code"] for item in exc.value.detail] == [200, 200, 422]
+    assert reload(ride).occupied == 0
+    assert reload(ride).status_count(RPStatus.waiting) == 4
+
+# Success: reject and unload batches
+def test_batch_reject_and_unload(ride):
+    controller.accept_participants("drv", ride.id, BatchAliasesSchema(aliases=["p1", "p2"]))
+    assert controller.reject_participants("drv", ride.id, BatchAliasesSchema(aliases=["p3", "p4"], atomic=True)).applied == 2
+    controller.start_ride("drv", ride.id)
+    result = controller.unload_participants("drv", ride.id, BatchAliasesSchema(aliases=["p1", "p2", "p9"]))
+    assert [r.status_code for r in result.results] == [200, 200, 404]
+    assert reload(ride).status_count(RPStatus.done) == 2
+
+# Success / Error: bulk ride creation with one missing driver
+def test_bulk_create_rides(ride):
+    items = [RideCreateSchema(rideDateAndTime=datetime.now(), finalAddress=f"A{i}", allowedSpaces=3, rideDriver=driver)
+             for i, driver in enumerate(["drv", "drv", "nobody"])]
+    with pytest.raises(HTTPException):
+        controller.create_rides(BulkRidesSchema(rides=items, atomic=True))
+    assert len(controller.data_handler.rides) == 1
+    result = controller.create_rides(BulkRidesSchema(rides=items))
+    assert result.applied == 2
+    assert [r.status_code for r in result.results] == [200, 200, 404]
+    assert [r.ride.id for r in result.results[:2]] == [2, 3]
+    assert [r.id for r in controller.data_handler.rides_driven_by("drv")] == [1, 2, 3]
@@ -0,0 +1,58 @@
+# tests/test_benchmarks.py
+# Pruebas de la suite de benchmarks: datos sintéticos coherentes, veredictos de la comparación y una corrida mínima.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../benchmarks')))
+
+import src.controller as controller
+from src.models.ride import RideStatus
+from src.models.ride_participation import RPStatus
+
+import suite
+from datagen import NOW, describe, generate
+
+
+# Success: generated rides follow their departure (past ones finished, future ones ready) with valid counters
+def test_datagen_consistent():
+    dh = generate(users=200, rides=400, seed=3)
+    assert len(dh.users) == 200 and len(dh.rides) == 400 and dh.allocate_ride_id() == 401
+    for ride in dh.rides:
+        ride.verify_counters()
+        assert ride.ride_driver not in {p.participant_alias for p in ride.participants}
+        if ride.ride_date_and_time > NOW:
+            assert ride.status is RideStatus.ready
+        elif ride.status is RideStatus.done:
+            assert not any(p.status in (RPStatus.waiting, RPStatus.confirmed, RPStatus.inprogress)
+                           for p in ride.participants)
+    stats = describe(dh)
+    assert stats["rides"]["done"] > stats["rides"]["ready"] > 0
+    assert sum(stats["ridersPerRide"].values()) == 400
+    # mismo seed, mismos datos
+    again = generate(users=200, rides=400, seed=3)
+    assert [len(ride.participants) for ride in again.rides] == [len(ride.participants) for ride in dh.rides]
+
+
+# Success: only a slower median whose best sample is also slower than the baseline counts as a regression
+def test_compare_verdicts():
+    def report(**medians):
+        return {"results": {name: {"median": median, "min": min_} for name, (median, min_) in medians.items()}}
+
+    baseline = report(a=(10.0, 9.0), b=(10.0, 9.0), c=(10.0, 9.0), d=(10.0, 9.0), gone=(1.0, 1.0))
+    current = report(a=(14.0, 12.0), b=(14.0, 8.0), c=(7.0, 6.0), d=(10.5, 10.0), new=(1.0, 1.0))
+    verdicts = {row["case"]: row["verdict"] for row in suite.compare(current, baseline, 0.25)}
+    assert verdicts == {"a": "regression", "b": "same", "c": "faster", "d": "same",
+                        "new": "new", "gone": "missing"}
+
+
+# Success: a tiny run produces machine-readable results for micro and end-to-end cases
+def test_suite_smoke():
+    previous = controller.data_handler
+    params = {"users": 50, "rides": 100, "seed": 1, "repeat": 2, "min_time": 0.001, "flows": 3}
+    report = suite.run(params, only=["get_ride_stats_typical", "ride.lifecycle", "e2e.ride_flow"],
+                       log=lambda line: None)
+    assert controller.data_handler is previous
+    assert set(report["results"]) == {"user.get_ride_stats_typical", "ride.lifecycle", "e2e.ride_flow"}
+    assert report["results"]["e2e.ride_flow"]["group"] == "e2e"
+    assert report["meta"]["params"] == params
+    assert all(result["median"] > 0 for result in report["results"].values())
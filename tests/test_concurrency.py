@@ -0,0 +1,83 @@
+# tests/test_concurrency.py
+# Pruebas de concurrencia: joins/accepts simultáneos sobre los endpoints nunca sobrevenden asientos
+# y las creaciones simultáneas de rides nunca repiten id (ambos backends).
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import time
+from fastapi import HTTPException
+import pytest
+
+import src.controller as controller
+from src.models.concurrency import KeyedLocks
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.schemas import UserSchema
+
+RIDES = 10
+SEATS = 4
+RIDERS = 100
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def dh(request, tmp_path, monkeypatch):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    monkeypatch.setattr(controller, "data_handler", handler)
+    # ceder el GIL entre el chequeo de asientos y el cambio de estado para provocar intercalados
+    free_spaces = Ride.free_spaces.fget
+    monkeypatch.setattr(Ride, "free_spaces", property(lambda self: (free_spaces(self), time.sleep(0.001))[0]))
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield handler
+    sys.setswitchinterval(interval)
+    if request.param == "sqlite":
+        handler.close()
+
+
+def _call(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except HTTPException as e:
+        return e.status_code
+
+
+# Success: thousands of concurrent join/accept calls never oversell a ride
+def test_concurrent_join_accept_never_oversells(dh):
+    controller.create_user(UserSchema(alias="drv", name="Driver", carPlate="ABC123"))
+    for i in range(RIDERS):
+        controller.create_user(UserSchema(alias=f"p{i}", name=f"P{i}"))
+    for _ in range(RIDES):
+        controller.create_ride(datetime.now(), "UTEC", SEATS, "drv")
+
+    jobs = [(rideid, f"p{i}") for i in range(RIDERS) for rideid in range(1, RIDES + 1)]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        joined = list(pool.map(lambda job: _call(controller.request_to_join, "drv", *job, destination="UTEC"), jobs))
+        accepted = list(pool.map(lambda job: _call(controller.accept_participant, "drv", *job), jobs))
+    assert joined.count({"message": "Request registered"}) == RIDES * RIDERS
+    assert accepted.count({"message": "Accepted"}) == RIDES * SEATS
+    for rideid in range(1, RIDES + 1):
+        ride = dh.get_ride(rideid)
+        ride.verify_counters()
+        assert ride.occupied == SEATS
+        assert ride.status_count("confirmed") == SEATS
+
+# Success: concurrent ride creation hands out distinct ids
+def test_concurrent_create_ride_unique_ids(dh):
+    controller.create_user(UserSchema(alias="drv", name="Driver", carPlate="ABC123"))
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        created = list(pool.map(lambda _: controller.create_ride(datetime.now(), "UTEC", 2, "drv"), range(300)))
+    ids = [r.id for r in created]
+    assert len(set(ids)) == 300
+    assert len(dh.rides) == 300
+
+# Success: KeyedLocks hands back the same lock per key and distinct locks per ride
+def test_keyed_locks():
+    locks = KeyedLocks()
+    assert locks(1) is locks(1)
+    assert locks(1) is not locks(2)
+    locks.discard(1)
+    assert len(locks) == 1
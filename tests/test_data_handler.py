@@ -0,0 +1,251 @@
+# tests/test_data_handler.py
+# Pruebas unitarias para la clase DataHandler: índices por alias/id, consistencia con las listas y casos de error.
+# Las pruebas con el fixture "dh" corren contra ambos backends (memoria y SQLite).
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.user import User
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation, RPStatus
+from datetime import datetime
+import multiprocessing
+import time
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def dh(request, tmp_path):
+    if request.param == "memory":
+        yield DataHandler()
+    else:
+        handler = SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+        yield handler
+        handler.close()
+
+
+def _ride(rideid, driver="drv"):
+    return Ride(
+        id=rideid,
+        ride_date_and_time=datetime.now(),
+        final_address="X",
+        allowed_spaces=2,
+        ride_driver=driver,
+        status=RideStatus.ready,
+        participants=[]
+    )
+
+# Success: get_user / get_ride find what was added
+def test_data_handler_lookup_success(dh):
+    user = User(alias="testuser", name="Test User", carPlate="ABC123")
+    dh.add_user(user)
+    ride = _ride(dh.next_ride_id, driver="testuser")
+    dh.add_ride(ride)
+    assert dh.get_user("testuser").carPlate == "ABC123"
+    assert dh.get_ride(1).ride_driver == "testuser"
+    assert dh.next_ride_id == 2
+    assert dh.get_user("testuser").get_ride_stats()["previousRidesTotal"] == 1
+
+# Success: the in-memory backend hands back the stored objects themselves
+def test_data_handler_memory_identity():
+    dh = DataHandler()
+    user = User(alias="testuser", name="Test User")
+    ride = _ride(1)
+    dh.add_user(user)
+    dh.add_ride(ride)
+    assert dh.get_user("testuser") is user
+    assert dh.get_ride(1) is ride
+
+# Success: list-style iteration keeps insertion order
+def test_data_handler_lists_still_iterable(dh):
+    for alias in ("a", "b", "c"):
+        dh.add_user(User(alias=alias, name=alias))
+    assert [u.alias for u in dh.users] == ["a", "b", "c"]
+
+# Success: lists passed to the constructor are indexed too
+def test_data_handler_constructor_lists_indexed():
+    dh = DataHandler(users=[User(alias="u1", name="U1")], rides=[_ride(7)], next_ride_id=8)
+    assert dh.get_user("u1").name == "U1"
+    assert dh.get_ride(7).id == 7
+
+# Error: lookups for unknown keys return None
+def test_data_handler_lookup_missing(dh):
+    assert dh.get_user("nobody") is None
+    assert dh.get_ride(99) is None
+
+# Error: duplicate alias / ride id
+def test_data_handler_duplicates(dh):
+    dh.add_user(User(alias="u1", name="U1"))
+    dh.add_ride(_ride(1))
+    with pytest.raises(ValueError):
+        dh.add_user(User(alias="u1", name="Other"))
+    with pytest.raises(ValueError):
+        dh.add_ride(_ride(1))
+    assert len(dh.users) == 1 and len(dh.rides) == 1
+
+# Error: POST /usuarios answers 422 when add_user itself finds the alias taken
+def test_create_user_duplicate_race(dh, monkeypatch):
+    dh.add_user(User(alias="u1", name="U1"))       # p.ej. otro worker, después de cualquier chequeo previo
+    monkeypatch.setattr(controller, "data_handler", dh)
+    monkeypatch.setattr(dh, "get_user", lambda alias: None)
+    response = TestClient(controller.app).post("/usuarios", json={"alias": "u1", "name": "Other"})
+    assert response.status_code == 422 and response.json()["detail"] == "User already exists"
+
+# Success: status index follows start()/end()
+def test_data_handler_status_index_follows_transitions(dh):
+    r1, r2 = _ride(1), _ride(2)
+    dh.add_ride(r1)
+    dh.add_ride(r2)
+    assert [r.id for r in dh.rides_with_status("ready")] == [1, 2]
+    r1.start()
+    assert [r.id for r in dh.rides_with_status(RideStatus.ready)] == [2]
+    assert [r.id for r in dh.rides_with_status("inprogress")] == [1]
+    r1.end()
+    assert dh.rides_with_status("inprogress") == []
+    assert [r.id for r in dh.rides_with_status("done")] == [1]
+
+# Success: driver and participant indexes
+def test_data_handler_rides_of_user(dh):
+    dh.add_ride(_ride(1, driver="d1"))
+    dh.add_ride(_ride(2, driver="d2"))
+    dh.add_ride(_ride(3, driver="p1"))
+    dh.get_ride(2).request_join(RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1))
+    assert [r.id for r in dh.rides_driven_by("d1")] == [1]
+    assert [r.id for r in dh.rides_joined_by("p1")] == [2]
+    assert [r.id for r in dh.rides_of_user("p1")] == [2, 3]
+    assert dh.rides_of_user("nobody") == []
+
+# Error: unknown status filters to an empty list
+def test_data_handler_unknown_status(dh):
+    dh.add_ride(_ride(1))
+    assert dh.rides_with_status("flying") == []
+
+# Success: two SQLite handlers on the same file (two workers) see each other's writes
+def test_data_handler_sqlite_shared_store(tmp_path):
+    path = str(tmp_path / "rides.sqlite")
+    w1, w2 = SQLiteDataHandler(path), SQLiteDataHandler(path)
+    w1.add_user(User(alias="p1", name="P1"))
+    w1.add_ride(_ride(1))
+    w2.get_ride(1).request_join(RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1))
+    w1.get_ride(1).accept("p1")
+    ride = w2.get_ride(1)
+    assert ride.get_participation("p1").confirmation is not None
+    assert ride.free_spaces == 1
+    assert [r.id for r in w2.rides_of_user("p1")] == [1]
+    w1.close()
+    w2.close()
+
+# Success: SQLite get_user counts the stats in one query without loading the history
+def test_data_handler_sqlite_user_stats_query(tmp_path):
+    dh = SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    dh.add_user(User(alias="drv", name="Driver"))
+    dh.add_user(User(alias="p1", name="P1"))
+    for rideid in range(1, 51):
+        dh.add_ride(_ride(rideid))
+    dh.get_ride(2).start()
+    dh.get_ride(2).end()
+    dh.get_ride(3).request_join(RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1))
+    dh.get_ride(3).reject("p1")
+    statements = []
+    dh._conn().set_trace_callback(statements.append)
+    driver, p1 = dh.get_user("drv"), dh.get_user("p1")
+    assert len(statements) == 4     # fila + contadores de cada usuario
+    assert driver.get_ride_stats()["previousRidesTotal"] == 50
+    assert driver.get_ride_stats()["previousRidesCompleted"] == 1
+    assert p1.get_ride_stats()["previousRidesRejected"] == 1
+    assert len(statements) == 4
+    # el historial se carga recién al leerlo
+    assert [r.id for r in driver.rides][:2] == [1, 2]
+    assert len(driver.rides) == 50
+    dh.close()
+
+def _accept_in_worker(path, alias, barrier, results):
+    worker = SQLiteDataHandler(path)
+    barrier.wait()
+    with worker.ride_lock(1):
+        ride = worker.get_ride(1)
+        time.sleep(0.2)     # el otro proceso intenta aceptar en este intervalo
+        try:
+            ride.accept(alias)
+            results.put("accepted")
+        except ValueError as e:
+            results.put(str(e))
+    worker.close()
+
+# Error: two worker processes cannot both accept against the last seat
+def test_data_handler_sqlite_last_seat_two_processes(tmp_path):
+    path = str(tmp_path / "rides.sqlite")
+    dh = SQLiteDataHandler(path)
+    ride = _ride(1)
+    ride.allowed_spaces = 1
+    dh.add_ride(ride)
+    for alias in ("p1", "p2"):
+        dh.get_ride(1).request_join(RideParticipation(participant_alias=alias, destination="X", occupied_spaces=1))
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(2), context.Queue()
+    workers = [context.Process(target=_accept_in_worker, args=(path, alias, barrier, results))
+               for alias in ("p1", "p2")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert sorted(results.get(timeout=5) for _ in workers) == ["No free seats", "accepted"]
+    assert dh.get_ride(1).status_count(RPStatus.confirmed) == 1
+    dh.close()
+
+# Success: keyset pages of rides, users and a user's rides
+def test_data_handler_pages(dh):
+    for alias in ("drv", "p1", "p2"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    for rideid in (3, 1, 2, 5, 4):
+        dh.add_ride(_ride(rideid))
+    dh.get_ride(2).request_join(RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1))
+    dh.get_ride(4).start()
+    assert [r.id for r in dh.rides_page(limit=2)] == [1, 2]
+    assert [r.id for r in dh.rides_page(after=2, limit=2)] == [3, 4]
+    assert [r.id for r in dh.rides_page(after=4)] == [5]
+    assert [r.id for r in dh.rides_page(after=1, status="ready")] == [2, 3, 5]
+    assert dh.rides_page(status="nope") == []
+    assert [u.alias for u in dh.users_page(limit=2)] == ["drv", "p1"]
+    assert [u.alias for u in dh.users_page(after="p1")] == ["p2"]
+    assert dh.users_page(after="ghost") == []
+    assert [r.id for r in dh.rides_of_user_page("drv", after=2, limit=2)] == [3, 4]
+    assert [r.id for r in dh.rides_of_user_page("p1")] == [2]
+
+# Success: a user's ride pages keep id order whatever the order they joined in, without repeats
+def test_data_handler_user_pages_order(dh):
+    for alias in ("drv", "p1"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    for rideid in (1, 2, 3, 4):
+        dh.add_ride(_ride(rideid))
+    dh.add_ride(_ride(5, driver="p1"))
+    for rideid in (4, 1, 5):
+        dh.get_ride(rideid).request_join(RideParticipation(participant_alias="p1", destination="X",
+                                                           occupied_spaces=1))
+    assert [r.id for r in dh.rides_of_user("p1")] == [1, 4, 5]
+    assert [r.id for r in dh.rides_of_user_page("p1", after=1, limit=1)] == [4]
+    assert [r.id for r in dh.rides_of_user_page("p1", after=4)] == [5]
+    assert dh.rides_of_user_page("p1", after=5) == []
+
+# Success: time window queries follow (departure, id) order with open bounds and cursors
+def test_data_handler_rides_between(dh):
+    dh.add_user(User(alias="drv", name="Driver"))
+    hours = {1: 10, 2: 8, 3: 9, 4: 8, 5: 12}
+    for rideid, hour in hours.items():
+        ride = _ride(rideid)
+        ride.ride_date_and_time = datetime(2025, 7, 15, hour)
+        dh.add_ride(ride)
+    dh.get_ride(3).start()
+    at = lambda hour: datetime(2025, 7, 15, hour)
+    assert [r.id for r in dh.rides_between(at(8), at(10))] == [2, 4, 3, 1]
+    assert [r.id for r in dh.rides_between(at(9))] == [3, 1, 5]
+    assert [r.id for r in dh.rides_between(end=at(9), limit=2)] == [2, 4]
+    assert [r.id for r in dh.rides_between(at(8), at(12), after=(at(8), 4), limit=2)] == [3, 1]
+    assert [r.id for r in dh.rides_between(at(8), at(10), status="ready")] == [2, 4, 1]
+    assert dh.rides_between(at(13)) == []
+    assert dh.rides_between(status="nope") == []
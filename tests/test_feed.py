@@ -0,0 +1,110 @@
+# tests/test_feed.py
+# Pruebas del feed de cambios: deltas por ride y por usuario, colas acotadas y el stream SSE.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import json
+from datetime import datetime
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.feed import RESYNC, ChangeFeed
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    yield handler
+    if request.param == "sqlite":
+        handler.close()
+
+
+def build(dh=None) -> DataHandler:
+    dh = DataHandler() if dh is None else dh
+    for alias in ("d1", "p1", "p2"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    for rideid in (1, 2):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                         allowed_spaces=2, ride_driver="d1"))
+    return dh
+
+
+def join(ride: Ride, alias: str):
+    ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+
+
+def events(frames) -> list:
+    parsed = []
+    for frame in frames:
+        fields = dict(line.split(": ", 1) for line in frame.decode().strip().splitlines())
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+# Success: a ride subscriber gets every change of that ride, a user only what involves them
+def test_feed_routing(storage):
+    dh = build(storage)
+    feed = ChangeFeed(dh)
+    ride_sub, p1_sub, p2_sub = feed.subscribe_ride(1), feed.subscribe_user("p1"), feed.subscribe_user("p2")
+    ride = dh.get_ride(1)
+    join(ride, "p1")
+    join(ride, "p2")
+    ride.accept("p1")
+    join(dh.get_ride(2), "p2")      # otro ride
+    ride.start()
+    ride.get_participation("p1").mark_unloaded()
+    assert [event for event, _ in events(ride_sub.drain())] == ["joined", "joined", "accepted", "started", "unloaded"]
+    assert [event for event, _ in events(p1_sub.drain())] == ["joined", "accepted", "started", "unloaded"]
+    p2 = events(p2_sub.drain())
+    assert [(event, change["ride"]) for event, change in p2] == [("joined", 1), ("joined", 2), ("started", 1)]
+    assert p2[2][1]["participants"] == {"p1": "inprogress", "p2": "missing"}
+    assert p2[0][1] == {"event": "joined", "ride": 1, "version": p2[0][1]["version"], "status": "ready",
+                        "freeSpaces": 2, "alias": "p2", "participation": "waiting"}
+    feed.close()
+    assert not dh._listeners
+
+
+# Error: a subscriber that falls behind gets "resync" and is dropped, without blocking the producer
+def test_feed_backpressure(storage):
+    dh = build(storage)
+    feed = ChangeFeed(dh, queue_size=2)
+    slow = feed.subscribe_ride(1)
+    fast = feed.subscribe_ride(1)
+    ride = dh.get_ride(1)
+    join(ride, "p1")
+    join(ride, "p2")
+    assert len(fast.drain()) == 2
+    ride.accept("p1")
+    assert slow.drain() == [RESYNC] and slow.closed and slow.lagged
+    assert len(fast.drain()) == 1 and not fast.closed
+    assert feed.stats() == {"subscribers": 1, "published": 3, "lagged": 1}
+
+
+# Success: the SSE stream delivers changes made by other requests; unknown rides are 404
+def test_ride_events_stream(storage, monkeypatch):
+    dh = build(storage)
+    monkeypatch.setattr(controller, "data_handler", dh)
+    assert TestClient(controller.app).get("/rides/99/events").status_code == 404
+
+    async def read():
+        body = controller.ride_events(1).body_iterator
+        assert (await body.__anext__()).startswith(b"retry:")
+        pending = asyncio.ensure_future(body.__anext__())
+        await asyncio.sleep(0)
+        # como lo haría otro request, desde un hilo
+        await asyncio.to_thread(controller.request_to_join, "d1", 1, "p1", destination="UTEC")
+        frame = await asyncio.wait_for(pending, 5)
+        await body.aclose()
+        return frame
+
+    [(event, change)] = events([asyncio.run(read())])
+    assert event == "joined" and change["alias"] == "p1" and change["ride"] == 1
+    assert len(controller._feed()) == 0     # al cerrar el stream se desuscribe
@@ -0,0 +1,93 @@
+# tests/test_idempotency.py
+# Pruebas de Idempotency-Key: reintentos contestados desde la caché, claves reusadas, vencimiento y límite.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+from urllib.parse import urlencode
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.idempotency import IdempotencyCache, fingerprint
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.user import User
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path, monkeypatch):
+    # un data_handler nuevo vacía la caché de respuestas (son de otros datos)
+    dh = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    for alias in ("driver", "rider"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    monkeypatch.setattr(controller, "data_handler", dh)
+    yield TestClient(controller.app)
+    if request.param == "sqlite":
+        dh.close()
+
+
+RIDE = {"rideDateAndTime": "2025-07-15T08:00:00", "finalAddress": "UTEC", "allowedSpaces": 2, "rideDriver": "driver"}
+
+
+# Success: a retried POST /rides is answered from the cache and creates a single ride
+def test_retried_create_ride(client):
+    hits = controller.idempotency_cache.hits
+    first = client.post("/rides", params=RIDE, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/rides", params=RIDE, headers={"Idempotency-Key": "k1"})
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json() and retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(controller.data_handler.rides) == 1
+    other = client.post("/rides", params=RIDE, headers={"Idempotency-Key": "k2"})
+    assert other.json()["id"] != first.json()["id"]
+    assert client.post("/rides", params=RIDE).json()["id"] == 3      # sin clave: como siempre
+    text = client.get("/metrics").text
+    assert f'idempotency_cache{{stat="hits"}} {hits + 1}' in text
+    assert 'idempotency_cache{stat="entries"} 2' in text
+
+
+# Success: a retried join replays the first answer instead of "Duplicate request"
+def test_retried_join(client):
+    rideid = client.post("/rides", params=RIDE).json()["id"]
+    join = f"/usuarios/driver/rides/{rideid}/requestToJoin/rider"
+    for _ in range(2):
+        response = client.post(join, params={"destination": "UTEC"}, headers={"Idempotency-Key": "j"})
+        assert response.status_code == 200 and response.json() == {"message": "Request registered"}
+    assert len(controller.data_handler.get_ride(rideid).participants) == 1
+    # otra clave es otro intento: el modelo lo rechaza
+    assert client.post(join, params={"destination": "UTEC"}, headers={"Idempotency-Key": "j2"}).status_code == 422
+
+
+# Error: a key reused for a different request, an empty key and a retry while the first one runs
+def test_key_misuse(client):
+    assert client.post("/rides", params=RIDE, headers={"Idempotency-Key": "k"}).status_code == 200
+    changed = dict(RIDE, allowedSpaces=3)
+    response = client.post("/rides", params=changed, headers={"Idempotency-Key": "k"})
+    assert response.status_code == 422 and "different request" in response.json()["detail"]
+    assert client.post("/rides", params=RIDE, headers={"Idempotency-Key": " "}).status_code == 400
+    # la primera request con "busy" sigue corriendo
+    cache = controller.idempotency_cache
+    running = fingerprint({"method": "POST", "path": "/rides", "query_string": urlencode(RIDE).encode()}, b"")
+    assert cache.begin("busy", running, controller.data_handler) is None
+    assert client.post("/rides", params=RIDE, headers={"Idempotency-Key": "busy"}).status_code == 409
+    assert len(controller.data_handler.rides) == 1
+    cache.abandon("busy")
+
+
+# Success: entries expire after the ttl and the oldest go first when the cache is full
+def test_cache_ttl_and_bound():
+    now = [0.0]
+    cache = IdempotencyCache(max_bytes=10, ttl=60, clock=lambda: now[0])
+    for key in ("a", "b", "c"):
+        assert cache.begin(key, key.encode()) is None
+        cache.finish(key, 200, [], b"1234")
+    assert len(cache) == 2 and cache.stats()["evictions"] == 1
+    assert cache.begin("a", b"a") is None                  # desalojada: corre de nuevo
+    cache.abandon("a")
+    assert cache.begin("c", b"c").body == b"1234"
+    now[0] = 61
+    assert cache.begin("c", b"c") is None and cache.stats()["expired"] == 2
+    assert cache.begin("big", b"big") is None
+    cache.finish("big", 200, [], b"x" * 11)                 # más grande que la caché: no se guarda
+    assert cache.begin("big", b"big") is None
@@ -0,0 +1,155 @@
+# tests/test_matching.py
+# Pruebas del índice de destinos: tokens, coincidencia exacta/prefijo, cercanía y GET /rides/search.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.matching import DestinationIndex, tokenize
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.user import User
+
+
+def build() -> DataHandler:
+    dh = DataHandler()
+    for alias in ("d1", "p1", "p2"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    specs = [(1, "Av. Javier Prado 123, San Isidro", 9, 1, (-12.0911, -77.0230)),
+             (2, "UTEC - Barranco", 8, 1, (-12.1353, -77.0224)),
+             (3, "Jr. Medrano Silva 165, Barranco", 7, 2, (-12.1360, -77.0220)),
+             (4, "Plaza San Martín", 6, 3, None)]
+    for rideid, dest, hour, seats, location in specs:
+        lat, lon = location or (None, None)
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, hour), final_address=dest,
+                         allowed_spaces=seats, ride_driver="d1", final_lat=lat, final_lon=lon))
+    return dh
+
+
+# Success: normalization drops accents, punctuation and stopwords
+def test_tokenize():
+    assert tokenize("Plaza San Martín de Porres") == ["plaza", "san", "martin", "porres"]
+    assert tokenize("UTEC - Barranco, barranco") == ["utec", "barranco"]
+
+
+# Success: exact tokens beat prefixes, ties go to the earliest departure
+def test_destination_search():
+    index = DestinationIndex(build())
+    assert [r.id for _, r in index.search("barranco")] == [3, 2]
+    assert [r.id for _, r in index.search("utec barranco")][0] == 2
+    assert [r.id for _, r in index.search("barr")] == [3, 2]
+    assert [r.id for _, r in index.search("san")] == [4, 1]
+    score, ride = index.search("martin")[0]
+    assert ride.id == 4 and score == pytest.approx(1.0)
+    assert index.search("miraflores") == []
+
+
+# Success: rides without free seats or already started are skipped
+def test_destination_search_filters():
+    dh = build()
+    index = DestinationIndex(dh)
+    assert [r.id for _, r in index.search("barranco", seats=2)] == [3]
+    dh.get_ride(3).request_join(RideParticipation(participant_alias="p1", destination="Barranco", occupied_spaces=1))
+    dh.get_ride(3).accept("p1")
+    assert index.search("barranco", seats=2) == []
+    dh.get_ride(2).start()
+    assert [r.id for _, r in index.search("barranco")] == [3]
+    assert len(index) == 3
+    dh.add_ride(Ride(id=5, ride_date_and_time=datetime(2025, 7, 15, 5), final_address="Barranco",
+                     allowed_spaces=1, ride_driver="d1"))
+    assert [r.id for _, r in index.search("barranco")] == [5, 3]
+    index.close()
+
+
+# Success: changing a ride's destination re-indexes it (text and grid)
+def test_destination_search_relocated():
+    dh = build()
+    index = DestinationIndex(dh)
+    ride = dh.get_ride(4)
+    ride.final_address = "Barranco"
+    ride.final_lat, ride.final_lon = -12.1358, -77.0221
+    assert [r.id for _, r in index.search("barranco")] == [4, 3, 2]
+    assert index.search("martin") == []
+    assert 4 in [r.id for _, r in index.search(origin=(-12.1355, -77.0222), radius_km=1.0)]
+    index.close()
+
+
+# Success: with SQLite the index also sees rides created and relocated by other workers
+def test_destination_search_sqlite_workers(tmp_path):
+    path = str(tmp_path / "rides.sqlite")
+    mine, other = SQLiteDataHandler(path), SQLiteDataHandler(path)
+    mine.add_user(User(alias="d1", name="D1"))
+    mine.add_ride(Ride(id=mine.allocate_ride_id(), ride_date_and_time=datetime(2025, 7, 15, 9),
+                       final_address="UTEC - Barranco", allowed_spaces=1, ride_driver="d1"))
+    index = DestinationIndex(mine, max_age=0)
+    other.add_ride(Ride(id=other.allocate_ride_id(), ride_date_and_time=datetime(2025, 7, 15, 8),
+                        final_address="Barranco", allowed_spaces=1, ride_driver="d1"))
+    assert [r.id for _, r in index.search("barranco")] == [2, 1]
+    other.get_ride(1).final_address = "Miraflores"
+    assert [r.id for _, r in index.search("barranco")] == [2]
+    assert [r.id for _, r in index.search("miraflores")] == [1]
+    assert mine.get_ride(1).final_address == "Miraflores"
+    assert index.rebuilds >= 1
+    index.close()
+    mine.close()
+    other.close()
+
+
+# Success: proximity search with the lat/lon grid
+def test_destination_search_near():
+    index = DestinationIndex(build())
+    near = index.search(origin=(-12.1355, -77.0222), radius_km=1.0)
+    assert [r.id for _, r in near] == [2, 3]
+    assert all(0 < score <= 1 for score, _ in near)
+    assert {r.id for _, r in index.search(origin=(-12.1355, -77.0222), radius_km=10.0)} == {1, 2, 3}
+    # texto + cercanía suman
+    assert index.search("barranco", origin=(-12.1360, -77.0220))[0][1].id == 3
+
+
+# Error: half a coordinate pair
+def test_ride_coordinates_pair():
+    with pytest.raises(ValueError):
+        Ride(id=1, ride_date_and_time=datetime(2025, 7, 15), final_address="X", allowed_spaces=1,
+             ride_driver="d1", final_lat=-12.0)
+
+
+# Success: coordinates survive the SQLite backend
+def test_sqlite_coordinates(tmp_path):
+    dh = SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    dh.add_user(User(alias="d1", name="D1"))
+    dh.add_ride(Ride(id=dh.allocate_ride_id(), ride_date_and_time=datetime(2025, 7, 15), final_address="UTEC",
+                     allowed_spaces=1, ride_driver="d1", final_lat=-12.13, final_lon=-77.02))
+    ride = SQLiteDataHandler(str(tmp_path / "rides.sqlite")).get_ride(1)
+    assert (ride.final_lat, ride.final_lon) == (-12.13, -77.02)
+
+
+# Success: GET /rides/search
+def test_search_endpoint(monkeypatch):
+    monkeypatch.setattr(controller, "data_handler", build())
+    client = TestClient(controller.app)
+    response = client.get("/rides/search", params={"destination": "Barranco"})
+    assert response.status_code == 200
+    assert [m["ride"]["id"] for m in response.json()] == [3, 2]
+    assert response.json()[0]["ride"]["finalLat"] == -12.1360
+    response = client.get("/rides/search", params={"lat": -12.1355, "lon": -77.0222, "radiusKm": 1, "limit": 1})
+    assert [m["ride"]["id"] for m in response.json()] == [2]
+    created = client.post("/rides", params={"rideDateAndTime": "2025-07-15T05:00:00", "finalAddress": "Barranco",
+                                            "allowedSpaces": 1, "rideDriver": "d1",
+                                            "finalLat": -12.14, "finalLon": -77.02}).json()
+    assert client.get("/rides/search", params={"destination": "barranco"}).json()[0]["ride"]["id"] == created["id"]
+
+
+# Error: search without destination or coordinates
+def test_search_endpoint_errors(monkeypatch):
+    monkeypatch.setattr(controller, "data_handler", build())
+    client = TestClient(controller.app)
+    assert client.get("/rides/search").status_code == 422
+    assert client.get("/rides/search", params={"lat": -12.1}).status_code == 422
+    assert client.post("/rides", params={"rideDateAndTime": "2025-07-15T05:00:00", "finalAddress": "X",
+                                         "allowedSpaces": 1, "rideDriver": "d1", "finalLat": -12.1}).status_code == 422
@@ -0,0 +1,67 @@
+# tests/test_metrics.py
+# Pruebas del registro de métricas, el middleware por ruta y el endpoint /metrics.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src import metrics
+from src.metrics import Registry
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.user import User
+
+
+# Success: text format of counters, gauges and cumulative histogram buckets
+def test_registry_render():
+    registry = Registry()
+    hits = registry.counter("hits_total", "Hits.", ("route",))
+    depth = registry.gauge("depth", "Depth.")
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    hits.inc("/a")
+    hits.inc("/a", amount=2)
+    depth.inc()
+    depth.dec()
+    latency.observe("/a", value=0.05)
+    latency.observe("/a", value=0.5)
+    latency.observe("/a", value=5)
+    text = registry.render()
+    assert "# TYPE hits_total counter" in text
+    assert 'hits_total{route="/a"} 3' in text
+    assert "depth 0" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+# Success: requests are labeled by route template; domain events and refused transitions are counted
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_metrics_endpoint(backend, tmp_path, monkeypatch):
+    dh = DataHandler() if backend == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    dh.add_user(User(alias="d1", name="D1", carPlate="ABC"))
+    dh.add_user(User(alias="p1", name="P1"))
+    monkeypatch.setattr(controller, "data_handler", dh)
+    client = TestClient(controller.app)
+    client.get("/metrics")      # se suscribe al data_handler
+    latency_before = metrics.REQUEST_LATENCY.count("GET", "/usuarios/{alias}")
+    joined_before = metrics.RIDE_EVENTS.value("joined")
+    errors_before = metrics.TRANSITION_ERRORS.value("accept")
+    missing_before = metrics.RESPONSES.value("GET", "/usuarios/{alias}", "404")
+    client.get("/usuarios/d1")
+    client.get("/usuarios/nobody")
+    ride = client.post("/rides", params={"rideDateAndTime": "2025-07-15T08:00:00", "finalAddress": "UTEC",
+                                         "allowedSpaces": 1, "rideDriver": "d1"}).json()
+    client.post(f"/usuarios/d1/rides/{ride['id']}/requestToJoin/p1", params={"destination": "UTEC"})
+    client.post(f"/usuarios/d1/rides/{ride['id']}/accept/nobody")
+    assert metrics.REQUEST_LATENCY.count("GET", "/usuarios/{alias}") == latency_before + 2
+    assert metrics.RESPONSES.value("GET", "/usuarios/{alias}", "404") == missing_before + 1
+    assert metrics.RIDE_EVENTS.value("joined") == joined_before + 1
+    assert metrics.TRANSITION_ERRORS.value("accept") == errors_before + 1
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_responses_total{method="POST",route="/rides",status="200"}' in response.text
+    assert 'ride_cache{stat="hits"}' in response.text
@@ -0,0 +1,118 @@
+# tests/test_pagination.py
+# Pruebas de la paginación por cursor (limit/after) y del modo NDJSON de los listados.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import json
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path, monkeypatch):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    monkeypatch.setattr(controller, "data_handler", handler)
+    client = TestClient(controller.app)
+    client.post("/usuarios", json={"alias": "drv", "name": "Driver", "carPlate": "ABC123"})
+    for i in range(4):
+        client.post("/usuarios", json={"alias": f"p{i}", "name": f"P{i}"})
+    for _ in range(7):
+        client.post("/rides", params=dict(rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC",
+                                          allowedSpaces=2, rideDriver="drv"))
+    return client
+
+
+def walk(client, url, limit):
+    items, params = [], {"limit": limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        items += response.json()
+        if "x-next-cursor" not in response.headers:
+            return items
+        params["after"] = response.headers["x-next-cursor"]
+
+
+# Success: walking the pages returns exactly the full listing
+@pytest.mark.parametrize("url", ["/rides", "/usuarios", "/usuarios/drv/rides"])
+def test_pages_cover_listing(client, url):
+    assert walk(client, url, 3) == client.get(url).json()
+
+
+# Success: the cursor is stable when new rides arrive between pages
+def test_cursor_stable_with_inserts(client):
+    first = client.get("/rides", params={"limit": 4})
+    client.post("/rides", params=dict(rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC",
+                                      allowedSpaces=2, rideDriver="drv"))
+    rest = client.get("/rides", params={"after": first.headers["x-next-cursor"]}).json()
+    assert [r["id"] for r in first.json() + rest] == list(range(1, 9))
+
+
+# Success: the last page carries no cursor
+def test_last_page_without_cursor(client):
+    response = client.get("/usuarios", params={"limit": 5})
+    assert len(response.json()) == 5 and "x-next-cursor" not in response.headers
+
+
+# Success: NDJSON streaming yields one record per line, honoring after/limit
+def test_ndjson_stream(client, monkeypatch):
+    monkeypatch.setattr(controller, "STREAM_CHUNK", 2)
+    response = client.get("/rides", params={"stream": "true"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rides = [json.loads(line) for line in response.text.splitlines()]
+    assert rides == client.get("/rides").json()
+    cursor = client.get("/rides", params={"limit": 2}).headers["x-next-cursor"]
+    response = client.get("/rides", params={"stream": "true", "after": cursor, "limit": 3})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [3, 4, 5]
+
+
+# Error: malformed cursors and out-of-range limits
+def test_invalid_cursor_and_limit(client):
+    assert client.get("/rides", params={"after": "not-a-cursor"}).status_code == 400
+    user_cursor = client.get("/usuarios", params={"limit": 1}).headers["x-next-cursor"]
+    assert client.get("/rides", params={"after": user_cursor}).status_code == 400
+    assert client.get("/rides", params={"limit": 0}).status_code == 422
+
+
+# Success: from/to select a departure window ordered by time, with its own cursor
+def test_time_window(client):
+    for hour in (11, 9, 10):
+        client.post("/rides", params=dict(rideDateAndTime=f"2025-07-16T{hour:02d}:00:00", finalAddress="UTEC",
+                                          allowedSpaces=2, rideDriver="drv"))
+    window = {"from": "2025-07-16T09:00:00", "to": "2025-07-16T10:30:00"}
+    assert [r["id"] for r in client.get("/rides", params=window).json()] == [9, 10]
+    first = client.get("/rides", params={"from": "2025-07-16T00:00:00", "limit": 2})
+    assert [r["id"] for r in first.json()] == [9, 10]
+    rest = client.get("/rides", params={"from": "2025-07-16T00:00:00", "after": first.headers["x-next-cursor"]})
+    assert [r["id"] for r in rest.json()] == [8]
+    assert client.get("/rides", params={"to": "2025-07-15T08:00:00", "status": "ready"}).json()[0]["id"] == 1
+    assert client.get("/rides", params={"from": "2025-07-16T00:00:00", "after": "W10="}).status_code == 400
+
+
+# Success: times with an offset are stored as naive UTC and mix with naive ones in the time index
+def test_time_window_mixed_offsets(client):
+    created = client.post("/rides", params=dict(rideDateAndTime="2025-07-16T09:00:00Z", finalAddress="UTEC",
+                                                allowedSpaces=2, rideDriver="drv"))
+    assert created.status_code == 200 and created.json()["rideDateAndTime"] == "2025-07-16T09:00:00"
+    client.post("/rides", params=dict(rideDateAndTime="2025-07-16T08:30:00-03:00", finalAddress="UTEC",
+                                      allowedSpaces=2, rideDriver="drv"))        # 11:30 UTC
+    client.post("/rides", params=dict(rideDateAndTime="2025-07-16T10:00:00", finalAddress="UTEC",
+                                      allowedSpaces=2, rideDriver="drv"))
+    window = client.get("/rides", params={"from": "2025-07-16T06:00:00-03:00", "to": "2025-07-16T12:00:00Z"})
+    assert window.status_code == 200
+    assert [(r["id"], r["rideDateAndTime"]) for r in window.json()] == [
+        (8, "2025-07-16T09:00:00"), (10, "2025-07-16T10:00:00"), (9, "2025-07-16T11:30:00")]
+    assert len(client.get("/usuarios/drv/rides").json()) == 10      # todos en el historial del conductor
+
+
+# Error: an invalid ride is rejected with 422 before anything is indexed
+def test_create_ride_invalid(client):
+    response = client.post("/rides", params=dict(rideDateAndTime="2025-07-16T09:00:00Z", finalAddress="UTEC",
+                                                 allowedSpaces=0, rideDriver="drv"))
+    assert response.status_code == 422
+    assert len(client.get("/rides").json()) == 7
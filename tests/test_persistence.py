@@ -0,0 +1,182 @@
+# tests/test_persistence.py
+# Pruebas unitarias para la persistencia del DataHandler: log de eventos, snapshots y recuperación.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src.models.persistence import EventLog, Persistence, dump_state
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation, RPStatus
+from src.models.user import User
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import time
+import pytest
+
+
+def _populate(dh):
+    dh.add_user(User(alias="drv", name="Driver", carPlate="ABC123"))
+    for alias in ("p1", "p2", "p3"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    dh.add_ride(Ride(id=dh.next_ride_id, ride_date_and_time=datetime(2025, 7, 15, 8, 0),
+                     final_address="UTEC", allowed_spaces=3, ride_driver="drv"))
+    ride = dh.get_ride(1)
+    for alias in ("p1", "p2", "p3"):
+        ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+    ride.accept("p1")
+    ride.reject("p2")
+    ride.start()
+    ride.get_participation("p1").mark_unloaded()
+    ride.end()
+    dh.add_ride(Ride(id=dh.next_ride_id, ride_date_and_time=datetime(2025, 7, 16, 8, 0),
+                     final_address="Barranco", allowed_spaces=2, ride_driver="drv"))
+
+
+def _assert_recovered(dh):
+    ride = dh.get_ride(1)
+    assert ride.status is RideStatus.done
+    assert [p.status for p in ride.participants] == [RPStatus.done, RPStatus.rejected, RPStatus.missing]
+    assert ride.get_participation("p1").confirmation is not None
+    ride.verify_counters()
+    assert [r.id for r in dh.rides_with_status("ready")] == [2]
+    assert dh.next_ride_id == 3
+    assert dh.get_user("drv").get_ride_stats()["previousRidesTotal"] == 2
+    assert dh.get_user("p2").get_ride_stats()["previousRidesRejected"] == 1
+
+
+# Success: state is rebuilt from the event log alone
+def test_persistence_recover_from_log(tmp_path):
+    engine = Persistence.open(str(tmp_path))
+    _populate(engine.data_handler)
+    engine.close()
+    recovered = Persistence.open(str(tmp_path))
+    _assert_recovered(recovered.data_handler)
+    recovered.close()
+
+# Success: a destination change is logged and replayed
+def test_persistence_relocated(tmp_path):
+    engine = Persistence.open(str(tmp_path))
+    _populate(engine.data_handler)
+    ride = engine.data_handler.get_ride(2)
+    ride.final_address = "Barranco"
+    ride.final_lat, ride.final_lon = -12.13, -77.02
+    engine.close()
+    recovered = Persistence.open(str(tmp_path))
+    ride = recovered.data_handler.get_ride(2)
+    assert (ride.final_address, ride.final_lat, ride.final_lon) == ("Barranco", -12.13, -77.02)
+    recovered.close()
+
+# Success: snapshot plus log tail, old segments are compacted away
+def test_persistence_snapshot_and_tail(tmp_path):
+    engine = Persistence.open(str(tmp_path), snapshot_every=5)
+    _populate(engine.data_handler)
+    engine.close()
+    names = os.listdir(tmp_path)
+    assert sum(n.startswith("snapshot-") for n in names) == 1
+    recovered = Persistence.open(str(tmp_path))
+    _assert_recovered(recovered.data_handler)
+    # lo recuperado sigue registrándose
+    recovered.data_handler.add_user(User(alias="late", name="Late"))
+    recovered.close()
+    assert Persistence.open(str(tmp_path)).data_handler.get_user("late") is not None
+
+# Success: lazy recovery leaves done rides in the archive as records until warmed
+def test_persistence_lazy_recover(tmp_path):
+    engine = Persistence.open(str(tmp_path))
+    _populate(engine.data_handler)
+    engine.snapshot()
+    engine.close()
+    recovered = Persistence.open(str(tmp_path), lazy=True)
+    dh = recovered.data_handler
+    assert [r.id for r in dh.rides] == [2] and dh.archive.stats()["unencoded"] == 1
+    _assert_recovered(dh)
+    # los rides que quedaron en el archivo siguen en las páginas de cada usuario
+    assert [r.id for r in dh.rides_of_user("drv")] == [1, 2]
+    assert [r.id for r in dh.rides_of_user_page("p3", after=0)] == [1]
+    while dh.archive.warm():
+        pass
+    assert dh.archive.stats()["unencoded"] == 0
+    _assert_recovered(dh)
+    recovered.close()
+    _assert_recovered(Persistence.open(str(tmp_path)).data_handler)
+
+# Success: snapshots taken while other threads mutate replay their log tail without errors
+def test_persistence_snapshot_under_load(tmp_path):
+    engine = Persistence.open(str(tmp_path), snapshot_every=7)
+    dh = engine.data_handler
+    # ensancha el hueco entre el cambio del modelo y su línea en el log
+    dh._listeners.insert(0, lambda *event: time.sleep(0.001))
+    dh.add_user(User(alias="drv", name="Driver"))
+    for i in range(40):
+        dh.add_user(User(alias=f"p{i}", name=f"P{i}"))
+    for rideid in range(1, 9):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                         allowed_spaces=3, ride_driver="drv"))
+
+    def join_and_accept(job):
+        rideid, alias = job
+        with dh.ride_lock(rideid):
+            ride = dh.get_ride(rideid)
+            if ride.free_spaces:
+                ride.request_join(RideParticipation(participant_alias=alias, destination="UTEC", occupied_spaces=1))
+        with dh.ride_lock(rideid):
+            ride = dh.get_ride(rideid)
+            if ride.free_spaces and ride.get_participation(alias):
+                ride.accept(alias)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(join_and_accept, [(rideid, f"p{i}") for i in range(40) for rideid in range(1, 9)]))
+    finally:
+        sys.setswitchinterval(interval)
+    engine.close()
+    assert dump_state(Persistence.open(str(tmp_path)).data_handler) == dump_state(dh)
+
+# Error: an event the recovered state cannot take fails the recovery, snapshot or not
+def test_persistence_replay_error(tmp_path):
+    engine = Persistence.open(str(tmp_path))
+    _populate(engine.data_handler)
+    engine.snapshot()
+    engine.log.append({"type": "accepted", "ride": 99, "alias": "p1", "confirmation": "2025-07-15T08:00:00"})
+    engine.close()
+    with pytest.raises(ValueError, match="Cannot replay event"):
+        Persistence.open(str(tmp_path))
+
+# Success: a torn last line is ignored and later writes are not glued to it
+def test_persistence_torn_tail(tmp_path):
+    engine = Persistence.open(str(tmp_path))
+    engine.data_handler.add_user(User(alias="u1", name="U1"))
+    engine.close()
+    segment = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('{"seq":2,"type":"user_cre')
+    engine = Persistence.open(str(tmp_path))
+    assert [u.alias for u in engine.data_handler.users] == ["u1"]
+    engine.data_handler.add_user(User(alias="u2", name="U2"))
+    engine.close()
+    assert [u.alias for u in Persistence.open(str(tmp_path)).data_handler.users] == ["u1", "u2"]
+
+# Success: the last batch before an idle period is synced within sync_interval
+def test_event_log_syncs_when_idle(tmp_path):
+    log = EventLog(str(tmp_path), batch_size=1000, sync_interval=0.2)
+    log.append({"type": "user_created", "alias": "u1", "name": "U1", "carPlate": None})
+    assert log._pending == 1
+    deadline = time.monotonic() + 2
+    while log._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log._pending == 0
+    log.close()
+    log._syncer.join(1)
+    assert not log._syncer.is_alive()
+
+# Error: a corrupt line in the middle of the log
+def test_persistence_corrupt_log(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.append({"type": "user_created", "alias": "u1", "name": "U1", "carPlate": None})
+    log._file.write("not json\n")
+    log.append({"type": "user_created", "alias": "u2", "name": "U2", "carPlate": None})
+    log.close()
+    with pytest.raises(ValueError):
+        list(EventLog.read(str(tmp_path)))
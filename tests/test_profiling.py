@@ -0,0 +1,102 @@
+# tests/test_profiling.py
+# Pruebas del perfilado: spans anidados, muestreo, instrumentación reversible y /admin/profile.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+from src.models import profiling
+from src.models.data_handler import DataHandler
+from src.models.profiling import Profiler, Trace, profiled, span
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.user import User
+
+
+class Service:
+    @profiled("service.outer")
+    def outer(self):
+        with span("service.block"):
+            return self.inner() + self.inner()
+
+    @profiled("service.inner")
+    def inner(self):
+        return 1
+
+
+# Success: marked functions are untouched until enabled, and restored on disable
+def test_enable_disable():
+    original = Service.__dict__["outer"]
+    profiler = Profiler()
+    assert Service().outer() == 2       # sin traza: no se registra nada
+    profiler.enable(1.0, [Service])
+    assert Service.__dict__["outer"] is not original
+    trace = profiler.sample()
+    token = profiling._TRACE.set(trace)
+    try:
+        assert Service().outer() == 2
+    finally:
+        profiling._TRACE.reset(token)
+    profiler.record("GET /service", trace, elapsed=trace.child_time + 1000)
+    profiler.disable()
+    assert Service.__dict__["outer"] is original and not profiler.enabled
+    spans = {item["stack"]: item["count"] for item in profiler.stacks()}
+    assert spans == {"GET /service": 1, "GET /service;service.outer": 1,
+                     "GET /service;service.outer;service.block": 1,
+                     "GET /service;service.outer;service.block;service.inner": 2}
+    assert profiler.folded().splitlines()[0] == "GET /service 1"
+
+
+# Success: self time excludes the children
+def test_trace_self_time():
+    trace = Trace()
+    trace.enter("a")
+    trace.enter("b")
+    trace.exit(300)
+    trace.exit(1000)
+    assert trace.spans[("a",)] == [1, 1000, 700]
+    assert trace.spans[("a", "b")] == [1, 300, 300]
+    assert trace.child_time == 1000
+
+
+# Error: the sample rate must be a fraction
+def test_enable_invalid_rate():
+    profiler = Profiler()
+    for rate in (0, 1.5):
+        try:
+            profiler.enable(rate)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    assert profiler.sample() is None
+
+
+# Success: sampled requests show up in /admin/profile by route and span
+def test_profile_endpoint(monkeypatch):
+    dh = DataHandler()
+    dh.add_user(User(alias="d1", name="D1", carPlate="ABC"))
+    dh.add_user(User(alias="p1", name="P1"))
+    ride = Ride(id=1, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                allowed_spaces=2, ride_driver="d1")
+    dh.add_ride(ride)
+    ride.request_join(RideParticipation(participant_alias="p1", destination="UTEC", occupied_spaces=1))
+    monkeypatch.setattr(controller, "data_handler", dh)
+    client = TestClient(controller.app)
+    try:
+        assert client.put("/admin/profile", params={"sample": 1}).json()["enabled"]
+        client.delete("/admin/profile")
+        assert client.get("/usuarios/d1/rides/1").status_code == 200
+        stats = client.get("/admin/profile").json()
+        stacks = {item["stack"]: item for item in stats["spans"]}
+        root = "GET /usuarios/{alias}/rides/{rideid}"
+        assert stacks[root]["count"] == 1
+        assert stacks[f"{root};data_handler.get_ride"]["count"] == 1
+        assert stacks[f"{root};ride_detail.schema;ride_detail.participant;user.get_ride_stats"]["count"] == 1
+        folded = client.get("/admin/profile", params={"format": "folded"}).text
+        assert f"{root};ride_detail.schema " in folded
+    finally:
+        assert not client.put("/admin/profile", params={"sample": 0}).json()["enabled"]
+    assert not hasattr(DataHandler.get_ride, "__profiled_original__")
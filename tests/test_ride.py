@@ -6,8 +6,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 from src.models.ride import Ride, RideStatus
 from src.models.ride_participation import RideParticipation, RPStatus
-from datetime import datetime
+from src.serialization import ride_schema
+from datetime import datetime, timedelta, timezone
 import pytest
+import time
 
 # Success: Ride occupied/free spaces calculation
 def test_ride_occupied_free_spaces():
@@ -216,4 +218,101 @@ def test_ride_end_not_inprogress():
         participants=[]
     )
     with pytest.raises(ValueError):
-        ride.end() 
\ No newline at end of file
+        ride.end() 
+# Success: seat/status counters follow every transition (consistency-check mode on)
+def test_ride_counters_follow_transitions(monkeypatch):
+    monkeypatch.setattr(Ride, "check_counters", True)
+    ride = Ride(
+        id=15,
+        ride_date_and_time=datetime.now(),
+        final_address="X",
+        allowed_spaces=4,
+        ride_driver="drv",
+        status=RideStatus.ready,
+        participants=[RideParticipation(participant_alias="p1", destination="X", occupied_spaces=2, status=RPStatus.confirmed, confirmation=None)]
+    )
+    for alias in ("p2", "p3", "p4"):
+        ride.request_join(RideParticipation(participant_alias=alias, destination="X", occupied_spaces=1))
+    assert ride.status_count(RPStatus.waiting) == 3
+    ride.accept("p2")
+    ride.reject("p3")
+    assert ride.occupied == 3 and ride.free_spaces == 1
+    assert ride.status_count("confirmed") == 2 and ride.status_count("rejected") == 1
+    ride.start()
+    assert ride.status_count(RPStatus.missing) == 1 and ride.status_count(RPStatus.inprogress) == 2
+    ride.get_participation("p1").mark_unloaded()
+    ride.end()
+    assert ride.occupied == 2
+    assert ride.status_count(RPStatus.done) == 1 and ride.status_count(RPStatus.notmarked) == 1
+    ride.verify_counters()
+
+# Error: counters drift is detected by verify_counters
+def test_ride_verify_counters_detects_drift():
+    ride = Ride(
+        id=16,
+        ride_date_and_time=datetime.now(),
+        final_address="X",
+        allowed_spaces=2,
+        ride_driver="drv",
+        status=RideStatus.ready,
+        participants=[RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1, status=RPStatus.confirmed, confirmation=None)]
+    )
+    ride.participants.append(RideParticipation(participant_alias="p2", destination="X", occupied_spaces=1, status=RPStatus.confirmed))
+    with pytest.raises(AssertionError):
+        ride.verify_counters()
+
+# Success: alias index and participants list stay in sync
+def test_ride_alias_index_matches_list():
+    ride = Ride(
+        id=17,
+        ride_date_and_time=datetime.now(),
+        final_address="X",
+        allowed_spaces=3,
+        ride_driver="drv",
+        status=RideStatus.ready,
+        participants=[RideParticipation(participant_alias="p0", destination="X", occupied_spaces=1, status=RPStatus.waiting, confirmation=None)]
+    )
+    for i in range(1, 6):
+        ride.request_join(RideParticipation(participant_alias=f"p{i}", destination="X", occupied_spaces=0))
+    with pytest.raises(ValueError):
+        ride.request_join(RideParticipation(participant_alias="p3", destination="Y", occupied_spaces=0))
+    ride.accept("p1")
+    ride.reject("p2")
+    ride.verify_counters()
+    assert [p.participant_alias for p in ride.participants] == [f"p{i}" for i in range(6)]
+    assert all(ride.get_participation(p.participant_alias) is p for p in ride.participants)
+    assert ride.get_participation("p3").destination == "X"
+    assert ride.get_participation("ghost") is None
+    # la serialización sigue siendo solo la lista
+    assert len(ride_schema(ride).participants) == 6
+
+# Error: duplicate aliases in the constructor
+def test_ride_duplicate_participants_in_constructor():
+    with pytest.raises(ValueError):
+        Ride(
+            id=18,
+            ride_date_and_time=datetime.now(),
+            final_address="X",
+            allowed_spaces=2,
+            ride_driver="drv",
+            status=RideStatus.ready,
+            participants=[RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1, status=RPStatus.waiting, confirmation=None),
+                          RideParticipation(participant_alias="p1", destination="Y", occupied_spaces=1, status=RPStatus.waiting, confirmation=None)]
+        )
+
+
+# Success: the confirmation time is naive UTC, like every stored time
+def test_ride_accept_confirmation_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "PET5")       # UTC-5: la hora local se notaría
+    time.tzset()
+    ride = Ride(id=9, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="X", allowed_spaces=1,
+                ride_driver="drv")
+    ride.request_join(RideParticipation(participant_alias="p1", destination="X", occupied_spaces=1))
+    try:
+        ride.accept("p1")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    confirmation = ride.get_participation("p1").confirmation
+    assert confirmation.tzinfo is None
+    assert abs(confirmation - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(seconds=5)
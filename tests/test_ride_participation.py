@@ -4,7 +4,7 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from src.models.ride_participation import RideParticipation
+from src.models.ride_participation import RideParticipation, RPStatus
 from datetime import datetime
 
 # Success: RideParticipation creation with all fields
@@ -52,4 +52,13 @@ def test_ride_participation_zero_spaces():
         status="confirmed",
         participant_alias="testuser"
     )
-    assert rp.occupied_spaces == 0 
\ No newline at end of file
+    assert rp.occupied_spaces == 0 
+# Success: status assignments are reported to subscribers
+def test_ride_participation_status_listeners():
+    rp = RideParticipation(destination="X", occupied_spaces=1, participant_alias="testuser")
+    seen = []
+    rp.subscribe(lambda p, old, new: seen.append((old, new)))
+    rp.status = "confirmed"
+    rp.status = RPStatus.confirmed
+    assert seen == [(RPStatus.waiting, RPStatus.confirmed)]
+    assert rp.status is RPStatus.confirmed
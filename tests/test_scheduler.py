@@ -0,0 +1,139 @@
+# tests/test_scheduler.py
+# Pruebas del scheduler: arranque automático, expiración, tandas, timers obsoletos y /stats/scheduler.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+import time
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.ride import Ride, RideStatus
+from src.models.ride_participation import RideParticipation, RPStatus
+from src.models.scheduler import RideScheduler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.user import User
+
+BASE = datetime(2025, 7, 15, 8)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    yield handler
+    if request.param == "sqlite":
+        handler.close()
+
+
+def build(n: int = 3, dh=None) -> DataHandler:
+    dh = DataHandler() if dh is None else dh
+    for alias in ("d1", "p1", "p2"):
+        dh.add_user(User(alias=alias, name=alias.upper()))
+    for rideid in range(1, n + 1):
+        dh.add_ride(Ride(id=rideid, ride_date_and_time=BASE + timedelta(hours=rideid), final_address="UTEC",
+                         allowed_spaces=2, ride_driver="d1"))
+    return dh
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now.replace(tzinfo=timezone.utc).timestamp()
+
+
+# Success: overdue rides start (waiting -> missing) and stale ones end
+def test_scheduler_start_and_expire(storage):
+    dh = build(dh=storage)
+    ride = dh.get_ride(1)
+    ride.request_join(RideParticipation(participant_alias="p1", destination="UTEC", occupied_spaces=1))
+    ride.request_join(RideParticipation(participant_alias="p2", destination="UTEC", occupied_spaces=1))
+    ride.accept("p2")
+    clock = Clock(BASE)
+    scheduler = RideScheduler(dh, start_grace=600, expire_after=3600, clock=clock)
+    assert scheduler.sweep() == 0 and len(scheduler) == 3
+    clock.now = BASE + timedelta(hours=1, minutes=10)
+    assert scheduler.sweep() == 1
+    ride = dh.get_ride(1)
+    assert ride.status is RideStatus.inprogress
+    assert ride.get_participation("p1").status is RPStatus.missing
+    assert ride.get_participation("p2").status is RPStatus.inprogress
+    assert dh.get_ride(2).status is RideStatus.ready
+    clock.now = BASE + timedelta(hours=2)
+    scheduler.sweep()
+    ride = dh.get_ride(1)
+    assert ride.status is RideStatus.done and scheduler.expired == 1
+    assert ride.get_participation("p2").status is RPStatus.notmarked
+    assert scheduler.metrics()["started"] == 1
+    scheduler.close()
+
+
+# Success: timers of rides moved by hand are skipped; new rides get timers
+def test_scheduler_stale_timers():
+    dh = build()
+    clock = Clock(BASE)
+    scheduler = RideScheduler(dh, start_grace=0, expire_after=3600, clock=clock)
+    dh.get_ride(1).start()
+    dh.get_ride(2).ride_date_and_time = BASE + timedelta(days=1)
+    dh.add_ride(Ride(id=4, ride_date_and_time=BASE, final_address="UTEC", allowed_spaces=1, ride_driver="d1"))
+    clock.now = BASE + timedelta(hours=2, minutes=30)
+    scheduler.sweep()
+    assert scheduler.started == 1      # solo el 4
+    assert dh.get_ride(4).status is RideStatus.inprogress
+    assert dh.get_ride(2).status is RideStatus.ready
+    assert dh.get_ride(1).status is RideStatus.done
+    scheduler.close()
+
+
+# Success: due timers are applied in batches; the thread drains them
+def test_scheduler_batches(storage):
+    dh = build(25, storage)
+    clock = Clock(BASE + timedelta(days=2))
+    scheduler = RideScheduler(dh, start_grace=0, expire_after=10 ** 9, batch_size=10, interval=0.01, clock=clock)
+    assert scheduler.sweep() == 10
+    assert scheduler.metrics()["lagSeconds"] > 0
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while scheduler.started < 25 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.close()
+    assert len(dh.rides_with_status(RideStatus.inprogress)) == 25
+
+
+# Success: /stats/scheduler
+def test_scheduler_endpoint(storage, monkeypatch):
+    monkeypatch.setattr(controller, "data_handler", build(dh=storage))
+    client = TestClient(controller.app)
+    stats = client.get("/stats/scheduler").json()
+    assert stats["queueDepth"] == 3 and stats["sweeps"] == 0
+
+
+# Success: departures are read as UTC whatever the local time zone
+def test_scheduler_utc(storage, monkeypatch):
+    dh = build(dh=storage)
+    monkeypatch.setenv("TZ", "PET5")       # UTC-5
+    time.tzset()
+    try:
+        clock = Clock(BASE + timedelta(hours=1, minutes=30))
+        scheduler = RideScheduler(dh, start_grace=600, expire_after=3600, clock=clock)
+        assert scheduler.sweep() == 1       # el de las 09:00 UTC, no el de las 09:00 de Lima
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert dh.get_ride(1).status is RideStatus.inprogress and dh.get_ride(2).status is RideStatus.ready
+
+
+# Success: the scheduler thread only runs when RIDES_SCHEDULER=1
+@pytest.mark.parametrize("value, running", [(None, False), ("1", True)])
+def test_scheduler_opt_in(monkeypatch, value, running):
+    monkeypatch.setattr(controller, "data_handler", build())
+    if value is None:
+        monkeypatch.delenv("RIDES_SCHEDULER", raising=False)
+    else:
+        monkeypatch.setenv("RIDES_SCHEDULER", value)
+    with TestClient(controller.app):
+        assert (controller._scheduler()._thread is not None) is running
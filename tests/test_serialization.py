@@ -0,0 +1,122 @@
+# tests/test_serialization.py
+# Pruebas de la caché de rides codificados: invalidación por versión, límite LRU y respuestas de los listados.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import json
+from datetime import datetime
+from fastapi.testclient import TestClient
+import pytest
+
+import src.controller as controller
+from src.models.data_handler import DataHandler
+from src.models.sqlite_handler import SQLiteDataHandler
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.serialization import RideJSONCache, ride_schema
+from src.schemas import UserSchema
+
+
+def make_ride(rideid: int = 1) -> Ride:
+    return Ride(id=rideid, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                allowed_spaces=3, ride_driver="drv")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path, monkeypatch):
+    handler = DataHandler() if request.param == "memory" else SQLiteDataHandler(str(tmp_path / "rides.sqlite"))
+    monkeypatch.setattr(controller, "data_handler", handler)
+    monkeypatch.setattr(controller, "ride_cache", RideJSONCache())
+    controller.create_user(UserSchema(alias="drv", name="Driver", carPlate="ABC123"))
+    controller.create_user(UserSchema(alias="p1", name="P1"))
+    yield TestClient(controller.app)
+    if request.param == "sqlite":
+        handler.close()
+
+
+# Success: a second lookup of an unchanged ride is a hit with the same bytes
+def test_cache_hit():
+    cache, ride = RideJSONCache(), make_ride()
+    first = cache.get(ride)
+    assert cache.get(ride) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert json.loads(first) == ride_schema(ride).model_dump(mode="json")
+
+
+# Success: every mutation of the ride invalidates its entry
+def test_cache_invalidated_by_mutation():
+    cache, ride = RideJSONCache(), make_ride()
+    cache.get(ride)
+    ride.request_join(RideParticipation(participant_alias="p1", destination="UTEC", occupied_spaces=1))
+    assert len(json.loads(cache.get(ride))["participants"]) == 1
+    ride.accept("p1")
+    assert json.loads(cache.get(ride))["participants"][0]["status"] == "confirmed"
+    ride.final_address = "Centro"
+    assert json.loads(cache.get(ride))["finalAddress"] == "Centro"
+    assert cache.hits == 0
+
+
+# Success: the byte bound evicts the least recently used entries
+def test_cache_lru_bound():
+    size = len(RideJSONCache().get(make_ride(1)))
+    cache = RideJSONCache(max_bytes=2 * size)
+    r1, r2, r3 = make_ride(1), make_ride(2), make_ride(3)
+    cache.get(r1)
+    cache.get(r2)
+    cache.get(r1)          # r2 queda como el menos usado
+    cache.get(r3)
+    assert cache.evictions == 1 and cache.size <= cache.max_bytes
+    cache.get(r1)
+    assert cache.hits == 2
+    cache.get(r2)
+    assert cache.misses == 4
+
+
+# Success: max_bytes=0 disables storing
+def test_cache_disabled():
+    cache, ride = RideJSONCache(max_bytes=0), make_ride()
+    cache.get(ride)
+    cache.get(ride)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 0)
+
+
+# Success: rides of another storage never hit entries of the previous one
+def test_cache_new_owner_clears():
+    cache = RideJSONCache()
+    cache.get(make_ride(), owner=object())
+    cache.get(make_ride(), owner=object())
+    assert cache.hits == 0
+
+
+# Success: the listings serve the cached bytes and reflect mutations
+def test_list_endpoints_use_cache(client):
+    rideid = client.post("/rides", params=dict(rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC",
+                                               allowedSpaces=2, rideDriver="drv")).json()["id"]
+    first = client.get("/rides").json()
+    assert client.get("/rides").json() == first
+    assert controller.ride_cache.hits == 1
+    client.post(f"/usuarios/drv/rides/{rideid}/requestToJoin/p1", params={"destination": "UTEC"})
+    listing = client.get("/rides").json()
+    assert listing[0]["participants"][0]["status"] == "waiting"
+    assert listing[0]["participants"][0]["participant"] is None
+    summary = client.get("/usuarios/p1/rides").json()
+    assert summary[0]["id"] == rideid and summary[0]["participants"] == []
+
+
+# Success: under SQLite the version comes from the row, so a write from another worker
+# that started from the same version never reuses a cached encoding
+def test_cache_sqlite_versions_across_workers(tmp_path):
+    path = str(tmp_path / "rides.sqlite")
+    w1, w2 = SQLiteDataHandler(path), SQLiteDataHandler(path)
+    w1.add_ride(make_ride())
+    cache = RideJSONCache()
+    stale = w1.get_ride(1)          # leído antes de que escriba el otro worker
+    w2.get_ride(1).request_join(RideParticipation(participant_alias="p1", destination="UTEC", occupied_spaces=1))
+    cache.get(w2.get_ride(1), owner=w2)
+    stale.request_join(RideParticipation(participant_alias="p2", destination="UTEC", occupied_spaces=1))
+    fresh = w2.get_ride(1)
+    participants = json.loads(cache.get(fresh, owner=w2))["participants"]
+    assert len(participants) == 2 and cache.hits == 0
+    w1.close()
+    w2.close()
@@ -0,0 +1,164 @@
+# tests/test_sharding.py
+# Pruebas del sharding: ids por clase de resto, usuarios sombra y el front que reparte entre procesos.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import anyio.to_thread
+import asyncio
+import pytest
+import threading
+import time
+from datetime import datetime
+from fastapi.testclient import TestClient
+
+import src.controller as controller
+
+from src.models.ride import Ride
+from src.models.ride_participation import RideParticipation
+from src.models.sharding import ShardDataHandler, shard_of_ride, shard_of_user
+from src.models.user import User
+from src.sharding import AUTHKEY, DEFAULT_AUTHKEY, ShardClient, ShardRouter, ShardServer, serve_shard
+
+
+# Success: each shard hands out ride ids of its own residue class
+def test_shard_ride_ids():
+    dh = ShardDataHandler(shard=2, shards=3)
+    ids = [dh.allocate_ride_id() for _ in range(3)]
+    assert ids == [2, 5, 8] and all(dh.owns_ride(rideid) for rideid in ids)
+    dh.add_ride(Ride(id=11, ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                     allowed_spaces=2, ride_driver="d1"))
+    assert dh.allocate_ride_id() == 14 and shard_of_ride(14, 3) == 2
+
+
+# Success: users of other shards are looked up once and keep their local history as shadows
+def test_shard_shadow_users():
+    shards = 2
+    home = next(alias for alias in (f"u{i}" for i in range(100)) if shard_of_user(alias, shards) == 0)
+    away = next(alias for alias in (f"u{i}" for i in range(100)) if shard_of_user(alias, shards) == 1)
+    lookups = []
+
+    def directory(alias):
+        lookups.append(alias)
+        return {"name": alias.upper(), "carPlate": None} if alias == away else None
+
+    dh = ShardDataHandler(shard=0, shards=shards, directory=directory)
+    dh.add_user(User(alias=home, name=home.upper(), carPlate="ABC"))
+    ride = Ride(id=dh.allocate_ride_id(), ride_date_and_time=datetime(2025, 7, 15, 8), final_address="UTEC",
+                allowed_spaces=2, ride_driver=home)
+    dh.add_ride(ride)
+    assert dh.get_user(away).name == away.upper()
+    ride.request_join(RideParticipation(participant_alias=away, destination="UTEC", occupied_spaces=1))
+    assert dh.get_user(away) is dh.local_user(away) and lookups == [away]
+    assert dh.get_user("nobody") is None
+    assert [user.alias for user in dh.users] == [home]       # las sombras no se listan
+    assert dh.local_users([home, away, "nobody"]) == {
+        home: {"name": home.upper(), "carPlate": "ABC", "home": True, "rides": 1},
+        away: {"name": away.upper(), "carPlate": None, "home": False, "rides": 1}}
+
+
+# Error: a shard refuses a persisted backend it would never write to
+@pytest.mark.parametrize("name", ["RIDES_DATA_DIR", "RIDES_DB"])
+def test_shard_refuses_persistence(monkeypatch, tmp_path, name):
+    monkeypatch.setenv(name, str(tmp_path / "data"))
+    with pytest.raises(RuntimeError, match=name):
+        serve_shard(0, 1, str(tmp_path / "shard.sock"), [str(tmp_path / "shard.sock")])
+    with pytest.raises(RuntimeError, match=name):
+        ShardRouter(shards=2).connect()
+    assert not os.path.exists(tmp_path / "data")
+
+
+# Success: /_shard/users is answered even with every worker thread waiting on a peer
+def test_shard_users_outside_threadpool(monkeypatch):
+    away = next(alias for alias in (f"u{i}" for i in range(100)) if shard_of_user(alias, 2) == 1)
+    peer_answered = threading.Event()
+    dh = ShardDataHandler(shard=0, shards=2, directory=lambda alias: peer_answered.wait(5) and None)
+    dh.add_user(User(alias="home", name="Home"))
+    monkeypatch.setattr(controller, "data_handler", dh)
+
+    async def one_thread():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 1
+
+    with TestClient(controller.app) as client:
+        client.portal.call(one_thread)
+        # el único hilo del pool queda esperando al otro shard
+        stuck = threading.Thread(target=client.post, args=("/rides",), kwargs={"params": dict(
+            rideDateAndTime="2025-07-15T08:00:00", finalAddress="UTEC", allowedSpaces=2, rideDriver=away)})
+        stuck.start()
+        time.sleep(0.2)
+        t0 = time.monotonic()
+        response = client.get("/_shard/users", params={"alias": "home"})
+        elapsed = time.monotonic() - t0
+        peer_answered.set()
+        stuck.join()
+    assert response.json()["home"]["home"] is True and elapsed < 1
+
+
+# Success: fetch_sync waits for the body even when the response has no headers
+def test_fetch_sync_without_headers(tmp_path):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.body", "body": b"late", "more_body": False})
+
+    address = str(tmp_path / "shard.sock")
+    threading.Thread(target=ShardServer(app, address).serve_forever, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(address) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client = ShardClient(address)
+    assert client.fetch_sync("GET", "/") == (200, [], b"late")
+    client.close()
+
+
+# Error: TCP shard addresses need a key of their own (the channel unpickles what it gets)
+def test_tcp_needs_shard_key(tmp_path):
+    with pytest.raises(RuntimeError, match="RIDES_SHARD_KEY"):
+        ShardServer(None, ("127.0.0.1", 0), DEFAULT_AUTHKEY)
+    with pytest.raises(RuntimeError, match="RIDES_SHARD_KEY"):
+        ShardClient(("127.0.0.1", 1), DEFAULT_AUTHKEY)
+    with pytest.raises(RuntimeError, match="RIDES_SHARD_KEY"):
+        ShardRouter(addresses=[("127.0.0.1", 1)], authkey=DEFAULT_AUTHKEY)
+    with pytest.raises(RuntimeError, match="RIDES_SHARD_KEY"):
+        serve_shard(0, 1, ("127.0.0.1", 0), [("127.0.0.1", 0)], DEFAULT_AUTHKEY)
+    assert ShardServer(None, ("127.0.0.1", 0), b"secret").address == ("127.0.0.1", 0)
+
+
+@pytest.fixture(scope="module")
+def sharded():
+    router = ShardRouter(shards=2)
+    yield TestClient(router)
+    router.close()
+
+
+# Success: requests reach the owning shard; listings and user totals span all shards
+def test_router_end_to_end(sharded):
+    client = sharded
+    drivers = [alias for alias in (f"d{i}" for i in range(20)) if shard_of_user(alias, 2) == 0][:1]
+    riders = [alias for alias in (f"p{i}" for i in range(20)) if shard_of_user(alias, 2) == 1][:2]
+    for alias in drivers + riders:
+        assert client.post("/usuarios", json={"alias": alias, "name": alias.upper()}).status_code == 200
+    assert client.app.authkey not in (AUTHKEY, DEFAULT_AUTHKEY)     # clave aleatoria de los shards locales
+    ride = client.post("/rides", params={"rideDateAndTime": "2025-07-15T08:00:00", "finalAddress": "UTEC",
+                                         "allowedSpaces": 2, "rideDriver": drivers[0]}).json()
+    assert shard_of_ride(ride["id"], 2) == 0
+    for alias in riders:
+        response = client.post(f"/usuarios/{drivers[0]}/rides/{ride['id']}/requestToJoin/{alias}",
+                               params={"destination": "UTEC"})
+        assert response.status_code == 200
+    assert client.post(f"/usuarios/{drivers[0]}/rides/{ride['id']}/requestToJoin/nobody",
+                       params={"destination": "UTEC"}).status_code == 404
+    assert client.post(f"/usuarios/{drivers[0]}/rides/{ride['id']}/accept/{riders[0]}").status_code == 200
+    detail = client.get(f"/usuarios/{riders[0]}/rides/{ride['id']}").json()
+    assert [p["participant"]["name"] for p in detail["participants"]] == [alias.upper() for alias in riders]
+    assert detail["participants"][0]["status"] == "confirmed"
+    assert client.get(f"/usuarios/{riders[0]}").json()["rides"] == [0]
+    assert client.get("/usuarios/nobody").status_code == 404
+    assert [r["id"] for r in client.get(f"/usuarios/{riders[0]}/rides").json()] == [ride["id"]]
+
+    page = client.get("/usuarios", params={"limit": 2})
+    rest = client.get("/usuarios", params={"limit": 10, "after": page.headers["x-next-cursor"]}).json()
+    aliases = [user["alias"] for user in page.json() + rest]
+    assert aliases == sorted(drivers + riders)
+    assert client.get("/stats/drivers").status_code == 400
+    assert client.get("/stats/drivers", params={"shard": 0}).status_code == 200
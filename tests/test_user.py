@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 from src.models.user import User
 from src.models.ride_participation import RideParticipation
+from src.models.ride import Ride
 from datetime import datetime
 import pytest
 
@@ -38,4 +39,38 @@ def test_user_invalid_carplate():
 def test_user_stats_empty():
     user = User(alias="testuser", name="Test User", carPlate="ABC123")
     stats = user.get_ride_stats()
-    assert stats["previousRidesTotal"] == 0 
\ No newline at end of file
+    assert stats["previousRidesTotal"] == 0 
+# Success: stats follow participation status changes without rescanning
+def test_user_stats_live_counters():
+    user = User(alias="testuser", name="Test User")
+    rps = [RideParticipation(destination="X", occupied_spaces=1, participant_alias="testuser") for _ in range(3)]
+    for rp in rps:
+        user.add_ride(rp)
+    rps[0].status = "inprogress"
+    rps[0].mark_unloaded()
+    rps[1].status = "missing"
+    rps[2].status = "rejected"
+    stats = user.get_ride_stats()
+    assert stats["previousRidesTotal"] == 3
+    assert stats["previousRidesCompleted"] == 1
+    assert stats["previousRidesMissing"] == 1
+    assert stats["previousRidesRejected"] == 1
+
+# Success: driven rides count by ride status
+def test_user_stats_driven_ride():
+    user = User(alias="drv", name="Driver", carPlate="ABC123")
+    ride = Ride(id=1, ride_date_and_time=datetime.now(), final_address="X", allowed_spaces=2, ride_driver="drv")
+    user.add_ride(ride)
+    ride.start()
+    ride.end()
+    assert user.get_ride_stats()["previousRidesCompleted"] == 1
+
+# Success: direct list edits fall back to a single-pass rebuild
+def test_user_stats_rebuild_after_direct_edit():
+    user = User(alias="testuser", name="Test User")
+    rp = RideParticipation(destination="X", occupied_spaces=1, participant_alias="testuser", status="done")
+    user.add_ride(rp)
+    user.rides.clear()
+    assert user.get_ride_stats()["previousRidesCompleted"] == 0
+    rp.status = "missing"  # ya no está en el historial
+    assert user.get_ride_stats()["previousRidesMissing"] == 0